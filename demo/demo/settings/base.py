@@ -15,7 +15,9 @@ import os
 
 from django.core.exceptions import ImproperlyConfigured
 
+from response.slack.async_client import AsyncSlackClient
 from response.slack.client import SlackClient
+from response.slack.rate_limit import create_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -191,8 +193,42 @@ def get_env_var(setting, warn_only=False):
 
 SLACK_TOKEN = get_env_var("SLACK_TOKEN")
 SLACK_APP_TOKEN = get_env_var("SLACK_APP_TOKEN")
-SLACK_CLIENT = SlackClient(SLACK_TOKEN, SLACK_APP_TOKEN)
+SLACK_API_MOCK = os.getenv("SLACK_API_MOCK", None)
+# Set SLACK_RATE_LIMIT_FILE to share Slack rate limits between the processes on
+# this host (e.g. several gunicorn workers). SLACK_CHANNEL_PAGE_SIZE is how many
+# channels to fetch per conversations.list call when looking one up by name
+# (Slack allows up to 1000).
+#
+# Connections to Slack are kept alive between calls, with up to
+# SLACK_HTTP_POOL_SIZE idle ones kept for reuse. SLACK_HTTP_TIMEOUT is how many
+# seconds to wait for a response. Set SLACK_API_MOCK to the host:port of a mock
+# Slack API to send requests there instead (e.g. for the end to end tests).
+#
+# Set SLACK_ASYNC_CLIENT=1 to make Slack calls over a shared pool of aiohttp
+# connections, sending fan-out requests concurrently (needs pip install aiohttp).
+slack_client_class = AsyncSlackClient if os.getenv("SLACK_ASYNC_CLIENT") else SlackClient
+
+SLACK_CLIENT = slack_client_class(
+    SLACK_TOKEN,
+    SLACK_APP_TOKEN,
+    rate_limiter=create_rate_limiter(os.getenv("SLACK_RATE_LIMIT_FILE")),
+    channel_page_size=int(os.getenv("SLACK_CHANNEL_PAGE_SIZE", 800)),
+    base_url=f"http://{SLACK_API_MOCK}/api/" if SLACK_API_MOCK else None,
+    pool_size=int(os.getenv("SLACK_HTTP_POOL_SIZE", 10)),
+    timeout=int(os.getenv("SLACK_HTTP_TIMEOUT", 30)),
+)
 
 # Whether to use https://pypi.org/project/bleach/ to strip potentially dangerous
 # HTML input in string fields
-RESPONSE_SANITIZE_USER_INPUT = True
\ No newline at end of file
+RESPONSE_SANITIZE_USER_INPUT = True
+
+# Clients of the events API can pass wait=<seconds> to hold a request open until
+# there are new events. Each waiting request occupies a (sync) worker for up to
+# this long, polling the database every second, so only raise it if there are
+# workers to spare. Tailing the events/stream/ endpoint is the cheaper option.
+RESPONSE_EVENTS_MAX_WAIT_SECONDS = 0
+
+# How long the list of open incidents shown on every page is cached for. It's
+# also dropped when an incident is saved, but only from this process's cache
+# unless CACHES is shared between processes (e.g. redis or memcached)
+RESPONSE_OPEN_INCIDENTS_CACHE_SECONDS = 30
@@ -44,8 +44,6 @@ SLACK_SIGNING_SECRET = get_env_var("SLACK_SIGNING_SECRET")
 INCIDENT_CHANNEL_NAME = get_env_var("INCIDENT_CHANNEL_NAME")
 INCIDENT_BOT_NAME = get_env_var("INCIDENT_BOT_NAME")
 
-SLACK_API_MOCK = os.getenv("SLACK_API_MOCK", None)
-
 INCIDENT_BOT_ID = os.getenv("INCIDENT_BOT_ID") or SLACK_CLIENT.get_user_id(
     INCIDENT_BOT_NAME
 )
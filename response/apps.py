@@ -21,3 +21,22 @@ class ResponseConfig(AppConfig):
         site_settings.RESPONSE_LOGIN_REQUIRED = getattr(
             site_settings, "RESPONSE_LOGIN_REQUIRED", True
         )
+
+        # Look channels up by name in the database before paging through
+        # every channel in the workspace
+        slack_client = getattr(site_settings, "SLACK_CLIENT", None)
+        if (
+            getattr(site_settings, "RESPONSE_SLACK_CHANNEL_DIRECTORY", True)
+            and slack_client is not None
+            and getattr(slack_client, "channel_directory", False) is None
+        ):
+            from .slack.models import SlackChannel
+
+            slack_client.channel_directory = SlackChannel.objects
+
+        # Run the scheduled jobs in-process rather than relying on something
+        # external hitting the cron_minute/cron_daily endpoints
+        if getattr(site_settings, "RESPONSE_SCHEDULER_AUTOSTART", False):
+            from .slack.scheduler import start_scheduler
+
+            start_scheduler()
@@ -1,6 +1,7 @@
 from .action import Action
 from .event import Event
 from .incident import Incident
+from .search_document import SearchDocument
 from .timeline import TimelineEvent, add_incident_update_event
 from .user_external import ExternalUser
 
@@ -8,6 +9,7 @@ __all__ = (
     "Action",
     "Event",
     "Incident",
+    "SearchDocument",
     "TimelineEvent",
     "ExternalUser",
     "add_incident_update_event",
@@ -1,11 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 
 from response.core.models.incident import Incident
 from response.core.models.user_external import ExternalUser
-from response.core.util import sanitize
+from response.core.util import SanitizedFieldsMixin, SanitizedManager
 
 
-class Action(models.Model):
+class Action(SanitizedFieldsMixin, models.Model):
     created_date = models.DateTimeField(null=True, auto_now_add=True)
     details = models.TextField(blank=True, default="")
     done = models.BooleanField(default=False)
@@ -32,6 +32,9 @@ class Action(models.Model):
         null=True,
     )
 
+    objects = SanitizedManager()
+    sanitized_fields = ("details",)
+
     def icon(self):
         return "🔜️"
 
@@ -39,5 +42,6 @@ class Action(models.Model):
         return f"{self.details}"
 
     def save(self, *args, **kwargs):
-        self.details = sanitize(self.details)
-        super(Action, self).save(*args, **kwargs)
+        # commit any Slack side-effects written to the outbox with the action
+        with transaction.atomic():
+            super(Action, self).save(*args, **kwargs)
@@ -1,5 +1,3 @@
-import json
-
 from django.db import models
 
 
@@ -9,8 +7,28 @@ class Event(models.Model):
 
     timestamp = models.DateTimeField()
     event_type = models.CharField(max_length=50)
-    payload = models.TextField()
+    payload = models.JSONField(default=dict)
+    # Copied out of the payload so the events feed can be filtered by incident
+    incident_id = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        # supports paging through the events feed in (timestamp, id) order,
+        # optionally filtered by incident or event type
+        indexes = [
+            models.Index(fields=["timestamp", "id"]),
+            models.Index(fields=["incident_id", "timestamp", "id"]),
+            models.Index(fields=["event_type", "timestamp", "id"]),
+        ]
 
     def save(self, *args, **kwargs):
-        self.payload = json.dumps(self.payload)
+        if self.incident_id is None:
+            self.incident_id = incident_id_from_payload(self.event_type, self.payload)
         super().save(*args, **kwargs)
+
+
+def incident_id_from_payload(event_type, payload):
+    if not isinstance(payload, dict):
+        return None
+    if event_type == Event.INCIDENT_EVENT_TYPE:
+        return payload.get("id")
+    return payload.get("incident_id")
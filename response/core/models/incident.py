@@ -1,13 +1,18 @@
+import hashlib
 from datetime import datetime
 
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
 
 from response import core, slack
 from response.core.models.user_external import ExternalUser
-from response.core.util import sanitize
+from response.core.util import SanitizedFieldsMixin, SanitizedManager
 
+OPEN_INCIDENTS_CACHE_KEY = "response:open_incidents"
 
-class IncidentManager(models.Manager):
+
+class IncidentManager(SanitizedManager):
     def create_incident(
         self,
         name,
@@ -38,10 +43,87 @@ class IncidentManager(models.Manager):
         )
         return incident
 
+    def touch(self, incident_id, section):
+        """
+        Marks a section of an incident's doc ("actions", "timeline" or
+        "participants") as modified, without saving (and so signalling) the
+        whole incident
+        """
+        self.filter(pk=incident_id).update(**{f"{section}_modified": datetime.now()})
+
+    def doc_version(self, incident_id):
+        """
+        Returns (last_modified, version) for an incident's doc, where
+        last_modified is when anything in it last changed (including
+        participants' message counts) and version also changes when the
+        reporter's or lead's name does. Returns None if there's no such
+        incident.
+        """
+        row = (
+            self.filter(pk=incident_id)
+            .annotate(last_message_at=models.Max("userstats__last_message_at"))
+            .values_list(
+                "start_time",
+                "last_modified",
+                "actions_modified",
+                "timeline_modified",
+                "participants_modified",
+                "last_message_at",
+                "reporter__display_name",
+                "lead__display_name",
+            )
+            .first()
+        )
+        if row is None:
+            return None
 
-class Incident(models.Model):
+        last_modified = max(timestamp for timestamp in row[:6] if timestamp)
+        names = "|".join(name or "" for name in row[6:])
+        version = hashlib.md5(
+            f"{last_modified.isoformat()}|{names}".encode()
+        ).hexdigest()
+        return last_modified, version
+
+    def open_summary(self):
+        """
+        Returns a short summary of each open incident, most recent first.
+
+        The summary is cached until an incident is saved, and for at most
+        RESPONSE_OPEN_INCIDENTS_CACHE_SECONDS (30 by default), as updates
+        that skip save() don't invalidate it. Saves only invalidate the
+        cache of the process making them unless CACHES is shared (e.g.
+        memcached or redis) so with the default local memory cache other
+        processes can show a summary up to that many seconds old.
+        """
+        summary = cache.get(OPEN_INCIDENTS_CACHE_KEY)
+        if summary is None:
+            summary = [
+                {
+                    "pk": incident.pk,
+                    "name": incident.name,
+                    "severity_emoji": incident.severity_emoji(),
+                    "status_text": incident.status_text(),
+                    "badge_type": incident.badge_type(),
+                }
+                for incident in self.filter(end_time__isnull=True)
+                .only("pk", "name", "severity", "end_time")
+                .order_by("-incident_time", "-pk")
+            ]
+            cache.set(
+                OPEN_INCIDENTS_CACHE_KEY,
+                summary,
+                getattr(settings, "RESPONSE_OPEN_INCIDENTS_CACHE_SECONDS", 30),
+            )
+        return summary
+
+    def invalidate_open_summary(self):
+        cache.delete(OPEN_INCIDENTS_CACHE_KEY)
+
+
+class Incident(SanitizedFieldsMixin, models.Model):
 
     objects = IncidentManager()
+    sanitized_fields = ("name", "summary")
 
     # Reporting info
     name = models.CharField(max_length=200)
@@ -95,6 +177,22 @@ class Incident(models.Model):
          max_length=10, blank=True, null=True, choices=NEXT_STATUS_UPDATE
     )
 
+    # When the incident and the other sections of its doc last changed, so
+    # each part of the rendered doc can be cached against its own version
+    last_modified = models.DateTimeField(auto_now=True, null=True)
+    actions_modified = models.DateTimeField(null=True, editable=False)
+    timeline_modified = models.DateTimeField(null=True, editable=False)
+    participants_modified = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        # support the filters on the home page, which always sort by most
+        # recent first
+        indexes = [
+            models.Index(fields=["end_time", "-incident_time"]),
+            models.Index(fields=["severity", "-incident_time"]),
+            models.Index(fields=["-incident_time"]),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -172,6 +270,7 @@ class Incident(models.Model):
         return core.models.TimelineEvent.objects.filter(incident=self)
 
     def save(self, *args, **kwargs):
-        self.name = sanitize(self.name)
-        self.summary = sanitize(self.summary)
-        super(Incident, self).save(*args, **kwargs)
+        # the save signal receivers write Slack side-effects to the outbox,
+        # which need to commit (or roll back) along with the incident
+        with transaction.atomic():
+            super(Incident, self).save(*args, **kwargs)
@@ -0,0 +1,134 @@
+import logging
+import re
+
+from django.db import connection, models
+
+from response.core.models.incident import Incident
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "response_searchdocument_fts"
+
+# (SQL, params) which rank the documents matching a query on each database
+# backend. Both only return documents from public incidents.
+SQLITE_SEARCH = f"""
+    SELECT d.*, bm25({FTS_TABLE}) AS rank
+    FROM {FTS_TABLE}
+    JOIN response_searchdocument d ON d.id = {FTS_TABLE}.rowid
+    JOIN response_incident i ON i.id = d.incident_id
+    WHERE {FTS_TABLE} MATCH %s AND NOT i.private {{filters}}
+    ORDER BY rank
+    LIMIT %s
+"""
+
+POSTGRES_SEARCH = """
+    SELECT d.*, ts_rank(to_tsvector('english', d.text), q) AS rank
+    FROM response_searchdocument d
+    JOIN response_incident i ON i.id = d.incident_id,
+    plainto_tsquery('english', %s) q
+    WHERE to_tsvector('english', d.text) @@ q AND NOT i.private {filters}
+    ORDER BY rank DESC
+    LIMIT %s
+"""
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query or "")
+
+
+class SearchDocumentManager(models.Manager):
+    def index(self, source, object_id, incident_id, text, timestamp):
+        """
+        Adds or updates the document for an object, dropping it if it no
+        longer has any text
+        """
+        if not text:
+            self.remove(source, object_id)
+            return
+
+        self.update_or_create(
+            source=source,
+            object_id=object_id,
+            defaults={"incident_id": incident_id, "text": text, "timestamp": timestamp},
+        )
+
+    def remove(self, source, object_id):
+        self.filter(source=source, object_id=object_id).delete()
+
+    def search(self, query, incident_id=None, source=None, limit=20):
+        """
+        Returns up to limit documents matching all the words in query, best
+        match first, using the database's full-text index where there is one.
+        Pass source to only search one kind of document.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        filters = ""
+        params = []
+        if connection.vendor == "sqlite":
+            sql = SQLITE_SEARCH
+            # quote each term so it's matched as a word rather than parsed
+            # as FTS query syntax, and let the last match as a prefix
+            params.append(" ".join(f'"{term}"' for term in terms) + "*")
+        elif connection.vendor == "postgresql":
+            sql = POSTGRES_SEARCH
+            params.append(" ".join(terms))
+        else:
+            return self._search_fallback(terms, incident_id, source, limit)
+
+        if incident_id is not None:
+            filters += " AND d.incident_id = %s"
+            params.append(incident_id)
+        if source is not None:
+            filters += " AND d.source = %s"
+            params.append(source)
+        params.append(limit)
+
+        documents = list(self.raw(sql.format(filters=filters), params))
+        models.prefetch_related_objects(documents, "incident")
+        return documents
+
+    def _search_fallback(self, terms, incident_id, source, limit):
+        documents = self.filter(incident__private=False).select_related("incident")
+        if incident_id is not None:
+            documents = documents.filter(incident_id=incident_id)
+        if source is not None:
+            documents = documents.filter(source=source)
+        for term in terms:
+            documents = documents.filter(text__icontains=term)
+        return list(documents.order_by("-timestamp")[:limit])
+
+
+class SearchDocument(models.Model):
+    """
+    A piece of searchable text belonging to an incident, kept in step with
+    the object it came from by the save signals. The full-text index over
+    it is maintained by the database (see migration 0039).
+    """
+
+    INCIDENT = "incident"
+    TIMELINE_EVENT = "timeline_event"
+    PINNED_MESSAGE = "pinned_message"
+    ACTION = "action"
+    SOURCES = (
+        (INCIDENT, "Incident"),
+        (TIMELINE_EVENT, "Timeline event"),
+        (PINNED_MESSAGE, "Pinned message"),
+        (ACTION, "Action"),
+    )
+
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE)
+    source = models.CharField(max_length=30, choices=SOURCES)
+    object_id = models.IntegerField()
+    text = models.TextField()
+    timestamp = models.DateTimeField(null=True)
+
+    objects = SearchDocumentManager()
+
+    class Meta:
+        unique_together = ("source", "object_id")
+
+    def __str__(self):
+        return f"{self.source} {self.object_id}"
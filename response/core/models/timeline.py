@@ -4,7 +4,7 @@ from django.db import models
 from jsonfield import JSONField
 
 from response.core.models.incident import Incident
-from response.core.util import sanitize
+from response.core.util import SanitizedFieldsMixin, SanitizedManager
 
 EVENT_TYPES = (
     ("text", "Freeform text field"),
@@ -12,7 +12,7 @@ EVENT_TYPES = (
 )
 
 
-class TimelineEvent(models.Model):
+class TimelineEvent(SanitizedFieldsMixin, models.Model):
 
     incident = models.ForeignKey(Incident, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(
@@ -24,9 +24,8 @@ class TimelineEvent(models.Model):
         help_text="Additional fields that can be added by other event types", null=True
     )
 
-    def save(self, *args, **kwargs):
-        self.text = sanitize(self.text)
-        super(TimelineEvent, self).save(*args, **kwargs)
+    objects = SanitizedManager()
+    sanitized_fields = ("text",)
 
 
 def add_incident_update_event(
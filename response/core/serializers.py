@@ -1,11 +1,55 @@
-import json
-
 import emoji_data_python
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from response.core.models import Action, Event, ExternalUser, Incident, TimelineEvent
+from response.core.models import (
+    Action,
+    Event,
+    ExternalUser,
+    Incident,
+    SearchDocument,
+    TimelineEvent,
+)
 from response.slack.models import CommsChannel
-from response.slack.reference_utils import slack_to_human_readable
+from response.slack.reference_utils import (
+    resolve_user_references,
+    slack_to_human_readable,
+)
+
+
+class HumanReadableListSerializer(serializers.ListSerializer):
+    """
+    Looks up every user referenced in a list of objects in one go, rather
+    than once per object. The child serializer names the field holding Slack
+    text in `human_readable_field`.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        # a parent serializer may have already looked up the users
+        if "user_profiles" in self.context:
+            return super().to_representation(items)
+
+        field = self.child.human_readable_field
+        self.child.user_profiles = resolve_user_references(
+            getattr(item, field) for item in items
+        )
+        try:
+            return super().to_representation(items)
+        finally:
+            self.child.user_profiles = None
+
+
+class HumanReadableMixin(object):
+    user_profiles = None
+
+    def human_readable(self, value):
+        profiles = self.user_profiles
+        if profiles is None:
+            profiles = self.context.get("user_profiles")
+        return emoji_data_python.replace_colons(
+            slack_to_human_readable(value, profiles)
+        )
 
 
 class ExternalUserSerializer(serializers.ModelSerializer):
@@ -21,7 +65,7 @@ class ExternalUserSerializer(serializers.ModelSerializer):
         )
 
 
-class TimelineEventSerializer(serializers.ModelSerializer):
+class TimelineEventSerializer(HumanReadableMixin, serializers.ModelSerializer):
     metadata = serializers.JSONField(allow_null=True, required=False)
     # Read-only field for displaying human-readable slack references. Updates
     # should be applied to the text field.
@@ -31,14 +75,15 @@ class TimelineEventSerializer(serializers.ModelSerializer):
         model = TimelineEvent
         fields = ("id", "timestamp", "text", "event_type", "metadata", "text_ui")
         read_only_fields = ("id",)
+        list_serializer_class = HumanReadableListSerializer
+
+    human_readable_field = "text"
 
     def get_text_ui(self, instance):
-        text_ui = slack_to_human_readable(instance.text)
-        text_ui = emoji_data_python.replace_colons(text_ui)
-        return text_ui
+        return self.human_readable(instance.text)
 
 
-class ActionSerializer(serializers.ModelSerializer):
+class ActionSerializer(HumanReadableMixin, serializers.ModelSerializer):
     created_by = ExternalUserSerializer()
     # Read-only field for displaying human-readable slack references. Updates
     # should be applied to the details field.
@@ -56,6 +101,13 @@ class ActionSerializer(serializers.ModelSerializer):
             "created_date"
         )
         read_only_fields = ("id", "created_date")
+        list_serializer_class = HumanReadableListSerializer
+
+    human_readable_field = "details"
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("created_by")
 
     def create(self, validated_data):
         created_by = ExternalUser.objects.get(
@@ -82,9 +134,7 @@ class ActionSerializer(serializers.ModelSerializer):
         return instance
 
     def get_details_ui(self, instance):
-        details_ui = slack_to_human_readable(instance.details)
-        details_ui = emoji_data_python.replace_colons(details_ui)
-        return details_ui
+        return self.human_readable(instance.details)
 
 
 class CommsChannelSerializer(serializers.ModelSerializer):
@@ -93,12 +143,31 @@ class CommsChannelSerializer(serializers.ModelSerializer):
         fields = ("channel_id", "channel_name")
 
 
+class IncidentListSerializer(serializers.ListSerializer):
+    """
+    Looks up every user referenced by the incidents' actions in one go,
+    rather than once per incident
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        self.context["user_profiles"] = resolve_user_references(
+            action.details for incident in items for action in incident.action_set.all()
+        )
+        try:
+            return super().to_representation(items)
+        finally:
+            del self.context["user_profiles"]
+
+
 class IncidentSerializer(serializers.ModelSerializer):
     reporter = ExternalUserSerializer(read_only=True)
     lead = ExternalUserSerializer()
     updated_by = ExternalUserSerializer()
-    comms_channel = CommsChannelSerializer(read_only=True)
-    action_items = ActionSerializer(read_only=True, many=True)
+    # use the reverse relations rather than the Incident helper methods, so
+    # that setup_eager_loading can fetch them up front
+    comms_channel = CommsChannelSerializer(read_only=True, source="commschannel")
+    action_items = ActionSerializer(read_only=True, many=True, source="action_set")
 
     # This ensures we can't unset severity
     # https://www.django-rest-framework.org/api-guide/fields/#required
@@ -124,6 +193,18 @@ class IncidentSerializer(serializers.ModelSerializer):
             "summary",
             "updated_by",
         )
+        list_serializer_class = IncidentListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related(
+            "reporter", "lead", "updated_by", "commschannel"
+        ).prefetch_related(
+            Prefetch(
+                "action_set",
+                queryset=ActionSerializer.setup_eager_loading(Action.objects.all()),
+            )
+        )
 
     def update(self, instance, validated_data):
         instance.end_time = validated_data.get("end_time", instance.end_time)
@@ -146,12 +227,35 @@ class IncidentSerializer(serializers.ModelSerializer):
 
 
 class EventSerializer(serializers.ModelSerializer):
-    payload = serializers.SerializerMethodField()
+    # the payload is stored as JSON, so is passed through as it is
+    payload = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Event
-        fields = ("id", "timestamp", "event_type", "payload")
-        read_only_fields = ("id", "timestamp", "event_type", "payload")
+        fields = ("id", "timestamp", "event_type", "incident_id", "payload")
+        read_only_fields = ("id", "timestamp", "event_type", "incident_id", "payload")
+
+
+class SearchResultSerializer(HumanReadableMixin, serializers.ModelSerializer):
+    incident_name = serializers.CharField(source="incident.name", read_only=True)
+    rank = serializers.FloatField(read_only=True, default=None)
+    text_ui = serializers.SerializerMethodField()
 
-    def get_payload(self, instance):
-        return json.loads(instance.payload)
+    class Meta:
+        model = SearchDocument
+        fields = (
+            "incident_id",
+            "incident_name",
+            "source",
+            "object_id",
+            "timestamp",
+            "text",
+            "text_ui",
+            "rank",
+        )
+        list_serializer_class = HumanReadableListSerializer
+
+    human_readable_field = "text"
+
+    def get_text_ui(self, instance):
+        return self.human_readable(instance.text)
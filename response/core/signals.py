@@ -2,10 +2,18 @@ import logging
 from datetime import datetime
 
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.module_loading import import_string
 
-from response.core.models import Action, Event, Incident
+from response.core.models import (
+    Action,
+    Event,
+    Incident,
+    SearchDocument,
+    TimelineEvent,
+)
 from response.core.serializers import ActionSerializer, IncidentSerializer
 
 logger = logging.getLogger(__name__)
@@ -21,10 +29,11 @@ class ActionEventHandler:
 
         event = Event()
         event.event_type = Event.ACTION_EVENT_TYPE
+        event.incident_id = instance.incident_id
 
         # Event payload should be a dict for serializing to JSON.
         event.payload = ActionSerializer(instance).data
-        event.payload["incident_id"] = instance.incident.pk
+        event.payload["incident_id"] = instance.incident_id
         if "details_ui" in event.payload:
             del event.payload["details_ui"]
 
@@ -42,6 +51,7 @@ class IncidentEventHandler:
 
         event = Event()
         event.event_type = Event.INCIDENT_EVENT_TYPE
+        event.incident_id = instance.pk
 
         # Event payload should be a dict for serializing to JSON.
         event.payload = IncidentSerializer(instance).data
@@ -64,3 +74,73 @@ if hasattr(settings, "INCIDENT_EVENT_HANDLER_CLASS"):
     post_save.connect(cls.handle, sender=Incident)
 else:
     post_save.connect(IncidentEventHandler.handle, sender=Incident)
+
+
+@receiver(post_save, sender=Action)
+@receiver(post_delete, sender=Action)
+def touch_incident_actions(sender, instance, **kwargs):
+    """
+    Mark the incident's actions as modified when one changes, so cached
+    copies of its doc are refreshed
+    """
+    Incident.objects.touch(instance.incident_id, "actions")
+
+
+@receiver(post_save, sender=TimelineEvent)
+@receiver(post_delete, sender=TimelineEvent)
+def touch_incident_timeline(sender, instance, **kwargs):
+    """
+    Mark the incident's timeline as modified when an event changes, so
+    cached copies of its doc are refreshed
+    """
+    Incident.objects.touch(instance.incident_id, "timeline")
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_delete, sender=Incident)
+def invalidate_open_incidents(sender, instance, **kwargs):
+    transaction.on_commit(Incident.objects.invalidate_open_summary)
+
+
+@receiver(post_save, sender=Incident)
+def index_incident(sender, instance: Incident, **kwargs):
+    text = "\n".join(
+        value
+        for value in (instance.name, instance.summary, instance.status_update)
+        if value
+    )
+    SearchDocument.objects.index(
+        SearchDocument.INCIDENT, instance.pk, instance.pk, text, instance.start_time
+    )
+
+
+@receiver(post_save, sender=TimelineEvent)
+def index_timeline_event(sender, instance: TimelineEvent, **kwargs):
+    SearchDocument.objects.index(
+        SearchDocument.TIMELINE_EVENT,
+        instance.pk,
+        instance.incident_id,
+        instance.text,
+        instance.timestamp,
+    )
+
+
+@receiver(post_save, sender=Action)
+def index_action(sender, instance: Action, **kwargs):
+    SearchDocument.objects.index(
+        SearchDocument.ACTION,
+        instance.pk,
+        instance.incident_id,
+        instance.details,
+        instance.created_date,
+    )
+
+
+@receiver(post_delete, sender=TimelineEvent)
+def unindex_timeline_event(sender, instance, **kwargs):
+    SearchDocument.objects.remove(SearchDocument.TIMELINE_EVENT, instance.pk)
+
+
+@receiver(post_delete, sender=Action)
+def unindex_action(sender, instance, **kwargs):
+    SearchDocument.objects.remove(SearchDocument.ACTION, instance.pk)
@@ -9,6 +9,7 @@ from response.core.views import (
     IncidentsByMonthViewSet,
     IncidentTimelineEventViewSet,
     IncidentViewSet,
+    SearchViewSet,
 )
 
 # Routers provide an easy way of automatically determining the URL conf.
@@ -32,6 +33,7 @@ router.register(
 router.register(r"actions", ActionViewSet)
 router.register(r"users", ExternalUserViewSet)
 router.register(r"events", EventsViewSet)
+router.register(r"search", SearchViewSet, basename="search")
 
 # Wire up our API using automatic URL routing.
 # Additionally, we include login URLs for the browsable API.
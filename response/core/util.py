@@ -1,23 +1,277 @@
+import threading
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
 import bleach
 import bleach_whitelist
 from django.conf import settings
-from rest_framework.pagination import PageNumberPagination
+from django.db import models
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+# bleach cleaners hold parser state, so each thread gets its own
+_cleaners = threading.local()
 
-def sanitize(string):
-    # bleach doesn't handle None so let's not pass it
-    if string and getattr(settings, "RESPONSE_SANITIZE_USER_INPUT", True):
-        return bleach.clean(
-            string,
+
+def _cleaner():
+    cleaner = getattr(_cleaners, "cleaner", None)
+    if cleaner is None:
+        cleaner = _cleaners.cleaner = bleach.Cleaner(
             tags=bleach_whitelist.markdown_tags,
             attributes=bleach_whitelist.markdown_attrs,
             css_sanitizer=bleach_whitelist.all_styles,
         )
+    return cleaner
+
+
+def sanitize(string):
+    # bleach doesn't handle None so let's not pass it
+    if string and getattr(settings, "RESPONSE_SANITIZE_USER_INPUT", True):
+        return _cleaner().clean(string)
 
     return string
 
 
+def sanitize_many(strings):
+    """
+    Sanitizes a list of strings, returning the results in the same order
+    """
+    if not getattr(settings, "RESPONSE_SANITIZE_USER_INPUT", True):
+        return list(strings)
+
+    cleaner = _cleaner()
+    return [cleaner.clean(string) if string else string for string in strings]
+
+
+class DirtyFieldsMixin(object):
+    """
+    Remembers the values of a model's fields as they were loaded from (or
+    last saved to) the database, so that changes can be found without
+    fetching the previous state again.
+
+    The snapshot is kept until save() returns, so pre_save and post_save
+    receivers see the changes being saved.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def _take_snapshot(self, fields=None):
+        snapshot = getattr(self, "_snapshot", {}) if fields else {}
+        for field in self._meta.concrete_fields:
+            if fields and field.name not in fields and field.attname not in fields:
+                continue
+            # deferred fields aren't in __dict__, and aren't saved unless set
+            if field.attname in self.__dict__:
+                snapshot[field.attname] = self.__dict__[field.attname]
+        self._snapshot = snapshot
+
+    def get_dirty_fields(self):
+        """
+        Returns a dict of the names of fields changed since the instance was
+        loaded or saved, and their previous values (IDs for foreign keys).
+        Every loaded field is dirty for an instance that's never been saved.
+        """
+        snapshot = getattr(self, "_snapshot", {})
+        dirty = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue
+            if field.attname not in snapshot:
+                dirty[field.name] = None
+            elif snapshot[field.attname] != self.__dict__[field.attname]:
+                dirty[field.name] = snapshot[field.attname]
+        return dirty
+
+    def is_dirty(self, *fields):
+        dirty = self.get_dirty_fields()
+        return any(field in dirty for field in fields) if fields else bool(dirty)
+
+    def previous_state(self):
+        """
+        Returns an unsaved copy of the instance as it was loaded or last
+        saved, sharing any related objects that haven't changed
+        """
+        if not hasattr(self, "_snapshot"):
+            # the instance was built rather than loaded, so ask the database
+            return type(self)._base_manager.get(pk=self.pk)
+
+        previous = type(self)(**self._snapshot)
+        previous._state.adding = False
+        previous._snapshot = dict(self._snapshot)
+        for field in self._meta.concrete_fields:
+            if (
+                field.is_relation
+                and field.is_cached(self)
+                and self._snapshot.get(field.attname) == getattr(self, field.attname)
+            ):
+                field.set_cached_value(previous, field.get_cached_value(self))
+        return previous
+
+    def save_dirty(self, **kwargs):
+        """
+        Saves only the fields that have changed, returning False without
+        touching the database if there aren't any
+        """
+        if self._state.adding:
+            self.save(**kwargs)
+            return True
+
+        dirty = set(self.get_dirty_fields())
+        if not dirty:
+            return False
+
+        # auto_now fields are only written when they're included
+        dirty.update(
+            field.name
+            for field in self._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        )
+        self.save(update_fields=dirty, **kwargs)
+        return True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._take_snapshot(kwargs.get("update_fields"))
+
+
+class SanitizedFieldsMixin(DirtyFieldsMixin):
+    """
+    Sanitizes the model's `sanitized_fields` when it's saved.
+
+    Values loaded from the database were sanitized when they were saved, so
+    only fields that have changed since are sanitized again.
+    """
+
+    sanitized_fields = ()
+
+    def _unsanitized_fields(self):
+        dirty = self.get_dirty_fields()
+        return [field for field in self.sanitized_fields if field in dirty]
+
+    @classmethod
+    def sanitize_objects(cls, objs, fields=None):
+        """
+        Sanitizes the changed fields of many objects in one go, for bulk
+        creates and updates which don't call save()
+        """
+        pending = [
+            (obj, field)
+            for obj in objs
+            for field in obj._unsanitized_fields()
+            if fields is None or field in fields
+        ]
+        cleaned = sanitize_many(getattr(obj, field) for obj, field in pending)
+        for (obj, field), value in zip(pending, cleaned):
+            setattr(obj, field, value)
+
+    def save(self, *args, **kwargs):
+        for field in self._unsanitized_fields():
+            setattr(self, field, sanitize(getattr(self, field)))
+        super().save(*args, **kwargs)
+
+
+class SanitizedQuerySet(models.QuerySet):
+    """
+    Sanitizes objects passed to bulk_create and bulk_update, which skip the
+    model's save()
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.sanitize_objects(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        self.model.sanitize_objects(objs, fields)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+SanitizedManager = models.Manager.from_queryset(SanitizedQuerySet)
+
+
 class LargeResultsSetPagination(PageNumberPagination):
     page_size = 500
     max_page_size = 1000
     page_size_query_param = "page_size"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages through a queryset in (timestamp, id) order, starting after the
+    position given by the `cursor` query parameter. Unlike offset pagination
+    each page costs the same however deep into the results it is, and rows
+    aren't repeated or shifted between pages as others are added.
+
+    Rows are only picked up if they sort after the cursor, so a row saved
+    with an earlier timestamp than the client has already reached (e.g. a
+    backdated timeline event, or one from a transaction that committed
+    late) is skipped by clients paging or polling from that cursor.
+
+    The response always includes a cursor for the last row returned (or the
+    one passed in, if there were no rows), so a client can poll with it to
+    get only the rows added since.
+    """
+
+    ordering_field = "timestamp"
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+
+    def encode_cursor(self, obj):
+        position = f"{getattr(obj, self.ordering_field).isoformat()}|{obj.pk}"
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            timestamp, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def filter_after(self, queryset, cursor):
+        "Orders the queryset by position, keeping the rows after cursor"
+        queryset = queryset.order_by(self.ordering_field, "pk")
+        if not cursor:
+            return queryset
+
+        timestamp, pk = self.decode_cursor(cursor)
+        return queryset.filter(
+            Q(**{f"{self.ordering_field}__gt": timestamp})
+            | Q(**{self.ordering_field: timestamp, "pk__gt": pk})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        page_size = self.get_page_size(request)
+
+        page = list(self.filter_after(queryset, self.cursor)[: page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        if page:
+            self.cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.has_next:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.cursor
+            )
+        return Response({"next": next_url, "cursor": self.cursor, "results": data})
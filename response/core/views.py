@@ -1,14 +1,35 @@
+import json
+import time
 from datetime import datetime, timedelta
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import pagination, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from response.core import serializers
 from response.core.models.action import Action
 from response.core.models.event import Event
 from response.core.models.incident import Incident
+from response.core.models.search_document import SearchDocument
 from response.core.models.timeline import TimelineEvent
 from response.core.models.user_external import ExternalUser
-from response.core.util import LargeResultsSetPagination
+from response.core.util import KeysetPagination, LargeResultsSetPagination
+
+
+class EagerLoadingMixin(object):
+    """
+    Applies the serializer's setup_eager_loading to the view's queryset, so
+    nested objects are fetched with a fixed number of queries rather than
+    one (or more) per row.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.get_serializer_class().setup_eager_loading(queryset)
 
 
 class ExternalUserViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,13 +39,13 @@ class ExternalUserViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = LargeResultsSetPagination
 
 
-class ActionViewSet(viewsets.ModelViewSet):
+class ActionViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     # ViewSets define the view behavior.
     queryset = Action.objects.all()
     serializer_class = serializers.ActionSerializer
 
 
-class IncidentViewSet(viewsets.ModelViewSet):
+class IncidentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     Allows getting a list of Incidents (sorted by incident time from newest to
     oldest), and updating existing ones.
@@ -43,14 +64,16 @@ class IncidentActionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         incident_pk = self.kwargs["incident_pk"]
-        return Action.objects.filter(incident_id=incident_pk)
+        return self.serializer_class.setup_eager_loading(
+            Action.objects.filter(incident_id=incident_pk)
+        )
 
     def perform_create(self, serializer):
         incident_pk = self.kwargs["incident_pk"]
         serializer.save(incident_id=incident_pk)
 
 
-class IncidentsByMonthViewSet(viewsets.ModelViewSet):
+class IncidentsByMonthViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     Allows getting a list of Incidents for a given year/month (sorted by
     report time from newest to oldest), and updating existing ones.
@@ -64,8 +87,8 @@ class IncidentsByMonthViewSet(viewsets.ModelViewSet):
     pagination_class = pagination.LimitOffsetPagination
 
     def list(self, request, year, month):
-        incidents = self.queryset.filter(
-            incident__year=year, incident__month=month
+        incidents = self.get_queryset().filter(
+            incident_time__year=year, incident_time__month=month
         )
         page = self.paginate_queryset(incidents)
         if page is not None:
@@ -86,12 +109,117 @@ class IncidentTimelineEventViewSet(viewsets.ModelViewSet):
 
 
 class EventsViewSet(viewsets.ModelViewSet):
+    """
+    A feed of incident and action events, in the order they happened.
+
+    Filter with `incident_id` and `event_type` (comma separated). Pass the
+    `cursor` from the last response to get only the events since.
+    `events/stream/` returns every event after the cursor as
+    newline-delimited JSON instead of in pages.
+
+    If RESPONSE_EVENTS_MAX_WAIT_SECONDS is set, `wait` (in seconds) holds a
+    request with a cursor open until there's at least one new event, up to
+    that limit. Each waiting request ties up a worker and polls the database
+    every RESPONSE_EVENTS_POLL_SECONDS, so it's off by default.
+    """
+
     queryset = Event.objects.all()
     serializer_class = serializers.EventSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        from_ts = self.request.query_params.get(
-            "from", datetime.now(tz=None) - timedelta(days=1)
+        params = self.request.query_params
+        queryset = Event.objects.all()
+
+        if "incident_id" in params:
+            try:
+                incident_id = int(params["incident_id"])
+            except ValueError:
+                raise ValidationError("incident_id must be a number")
+            queryset = queryset.filter(incident_id=incident_id)
+        if "event_type" in params:
+            queryset = queryset.filter(event_type__in=params["event_type"].split(","))
+
+        # a cursor carries on from where the client got to, so only limit
+        # to the last day when starting from scratch
+        if "cursor" in params and "from" not in params and "to" not in params:
+            return queryset
+
+        from_ts = params.get("from", datetime.now(tz=None) - timedelta(days=1))
+        to_ts = params.get("to", datetime.now(tz=None))
+        return queryset.filter(timestamp__range=(from_ts, to_ts))
+
+    def get_wait_seconds(self):
+        if "cursor" not in self.request.query_params:
+            return 0
+        try:
+            wait = float(self.request.query_params.get("wait", 0))
+        except ValueError:
+            return 0
+        return max(0, min(wait, getattr(settings, "RESPONSE_EVENTS_MAX_WAIT_SECONDS", 0)))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        deadline = time.monotonic() + self.get_wait_seconds()
+
+        page = self.paginate_queryset(queryset)
+        while not page and time.monotonic() < deadline:
+            time.sleep(getattr(settings, "RESPONSE_EVENTS_POLL_SECONDS", 1))
+            page = self.paginate_queryset(queryset)
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def stream(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        chunk_size = paginator.max_page_size
+
+        def lines():
+            cursor = request.query_params.get(paginator.cursor_query_param)
+            while True:
+                chunk = list(paginator.filter_after(queryset, cursor)[:chunk_size])
+                for event in chunk:
+                    cursor = paginator.encode_cursor(event)
+                    data = dict(self.get_serializer(event).data, cursor=cursor)
+                    yield json.dumps(data, cls=JSONEncoder) + "\n"
+                if len(chunk) < chunk_size:
+                    return
+
+        # check the cursor before starting the response
+        if paginator.cursor_query_param in request.query_params:
+            paginator.decode_cursor(request.query_params[paginator.cursor_query_param])
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Searches the text of incidents, their timelines, pinned messages and
+    actions, best match first.
+
+    Pass the words to search for as `q`, and optionally `incident_id` to
+    search within one incident and `limit` for the number of results.
+    """
+
+    def list(self, request):
+        params = request.query_params
+        query = params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "A search query is required"})
+
+        try:
+            incident_id = int(params["incident_id"]) if "incident_id" in params else None
+            limit = min(
+                int(params.get("limit", 20)),
+                getattr(settings, "RESPONSE_SEARCH_MAX_RESULTS", 100),
+            )
+        except ValueError:
+            raise ValidationError("incident_id and limit must be numbers")
+
+        results = SearchDocument.objects.search(
+            query, incident_id=incident_id, limit=max(limit, 1)
         )
-        to_ts = self.request.query_params.get("to", datetime.now(tz=None))
-        return Event.objects.filter(timestamp__range=(from_ts, to_ts))
+        serializer = serializers.SearchResultSerializer(results, many=True)
+        return Response({"results": serializer.data})
@@ -0,0 +1,24 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from response.slack.models import SchedulerLock
+from response.slack.scheduler import LEADER_LOCK_NAME, SCHEDULER_ID, create_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Runs the scheduled jobs (notifications, user cache updates) in the foreground"
+
+    def handle(self, *args, **options):
+        scheduler = create_scheduler(blocking=True)
+        self.stdout.write(f"Starting scheduler {SCHEDULER_ID}")
+
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            SchedulerLock.objects.release(LEADER_LOCK_NAME, SCHEDULER_ID)
+            self.stdout.write("Scheduler stopped")
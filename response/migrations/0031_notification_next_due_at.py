@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0030_alter_action_updated_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='next_due_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0034_outboxmessage_coalesce_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['timestamp', 'id'], name='response_ev_timesta_ddcc3d_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+"""
+Moves Event.payload from JSON encoded text to a native JSON column, and copies
+the incident ID out of the payload into its own column so it can be indexed.
+
+This is done in stages: add the new columns alongside the old payload, copy the
+payloads across (decoding them as we go), then drop the old column and rename
+the new one into its place.
+"""
+
+import json
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def decode_payload(payload):
+    # payloads of events saved more than once were encoded more than once
+    while isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            return {"raw": payload}
+    return payload
+
+
+def incident_id_from_payload(event_type, payload):
+    if not isinstance(payload, dict):
+        return None
+    if event_type == "incident_event":
+        return payload.get("id")
+    return payload.get("incident_id")
+
+
+def copy_payloads_to_json(apps, schema_editor):
+    Event = apps.get_model("response", "Event")
+    batch = []
+    for event in Event.objects.all().iterator(chunk_size=BATCH_SIZE):
+        event.payload_json = decode_payload(event.payload)
+        event.incident_id = incident_id_from_payload(
+            event.event_type, event.payload_json
+        )
+        batch.append(event)
+        if len(batch) >= BATCH_SIZE:
+            Event.objects.bulk_update(batch, ["payload_json", "incident_id"])
+            batch = []
+    Event.objects.bulk_update(batch, ["payload_json", "incident_id"])
+
+
+def copy_payloads_to_text(apps, schema_editor):
+    Event = apps.get_model("response", "Event")
+    batch = []
+    for event in Event.objects.all().iterator(chunk_size=BATCH_SIZE):
+        event.payload = json.dumps(event.payload_json)
+        batch.append(event)
+        if len(batch) >= BATCH_SIZE:
+            Event.objects.bulk_update(batch, ["payload"])
+            batch = []
+    Event.objects.bulk_update(batch, ["payload"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("response", "0035_event_timestamp_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="payload_json",
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="incident_id",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        # lets the old column be re-added empty if the migration is reversed
+        migrations.AlterField(
+            model_name="event",
+            name="payload",
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(copy_payloads_to_json, copy_payloads_to_text),
+        migrations.RemoveField(
+            model_name="event",
+            name="payload",
+        ),
+        migrations.RenameField(
+            model_name="event",
+            old_name="payload_json",
+            new_name="payload",
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="payload",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["incident_id", "timestamp", "id"],
+                name="response_ev_inciden_f2ee4a_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["event_type", "timestamp", "id"],
+                name="response_ev_event_t_2b539c_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0036_event_json_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
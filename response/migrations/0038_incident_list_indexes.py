@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0037_incident_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['end_time', '-incident_time'], name='response_in_end_tim_1ccc37_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['severity', '-incident_time'], name='response_in_severit_6f694f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-incident_time'], name='response_in_inciden_afd38b_idx'),
+        ),
+    ]
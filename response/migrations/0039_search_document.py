@@ -0,0 +1,164 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:48
+
+"""
+Adds SearchDocument, with a full-text index over it maintained by the
+database: an FTS5 table kept in step by triggers on SQLite, or a GIN index
+over the English tsvector on PostgreSQL. Other databases fall back to
+substring matching.
+
+Existing incidents, timeline events, pins and actions are indexed as part of
+the migration.
+"""
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE response_searchdocument_fts USING fts5(
+        text, content='response_searchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER response_searchdocument_ai AFTER INSERT ON response_searchdocument
+    BEGIN
+        INSERT INTO response_searchdocument_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER response_searchdocument_ad AFTER DELETE ON response_searchdocument
+    BEGIN
+        INSERT INTO response_searchdocument_fts(response_searchdocument_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER response_searchdocument_au AFTER UPDATE ON response_searchdocument
+    BEGIN
+        INSERT INTO response_searchdocument_fts(response_searchdocument_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO response_searchdocument_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS response_searchdocument_au",
+    "DROP TRIGGER IF EXISTS response_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS response_searchdocument_ai",
+    "DROP TABLE IF EXISTS response_searchdocument_fts",
+]
+
+POSTGRES_CREATE = [
+    """
+    CREATE INDEX response_searchdocument_text_fts
+    ON response_searchdocument USING GIN (to_tsvector('english', text))
+    """
+]
+
+POSTGRES_DROP = ["DROP INDEX IF EXISTS response_searchdocument_text_fts"]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_fts_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _execute(schema_editor, SQLITE_CREATE)
+    elif vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_CREATE)
+
+
+def drop_fts_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _execute(schema_editor, SQLITE_DROP)
+    elif vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_DROP)
+
+
+def _join_text(*values):
+    return "\n".join(v for v in values if v)
+
+
+def index_existing(apps, schema_editor):
+    SearchDocument = apps.get_model("response", "SearchDocument")
+    Incident = apps.get_model("response", "Incident")
+    TimelineEvent = apps.get_model("response", "TimelineEvent")
+    PinnedMessage = apps.get_model("response", "PinnedMessage")
+    Action = apps.get_model("response", "Action")
+
+    sources = [
+        (
+            "incident",
+            Incident.objects.all(),
+            lambda i: (i.pk, _join_text(i.name, i.summary, i.status_update), i.start_time),
+        ),
+        (
+            "timeline_event",
+            TimelineEvent.objects.all(),
+            lambda e: (e.incident_id, e.text, e.timestamp),
+        ),
+        (
+            "pinned_message",
+            PinnedMessage.objects.all(),
+            lambda p: (p.incident_id, p.text, p.timestamp),
+        ),
+        (
+            "action",
+            Action.objects.all(),
+            lambda a: (a.incident_id, a.details, a.created_date),
+        ),
+    ]
+
+    for source, objects, fields in sources:
+        batch = []
+        for obj in objects.iterator(chunk_size=BATCH_SIZE):
+            incident_id, text, timestamp = fields(obj)
+            if not text:
+                continue
+            batch.append(
+                SearchDocument(
+                    source=source,
+                    object_id=obj.pk,
+                    incident_id=incident_id,
+                    text=text,
+                    timestamp=timestamp,
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0038_incident_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('incident', 'Incident'), ('timeline_event', 'Timeline event'), ('pinned_message', 'Pinned message'), ('action', 'Action')], max_length=30)),
+                ('object_id', models.IntegerField()),
+                ('text', models.TextField()),
+                ('timestamp', models.DateTimeField(null=True)),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='response.incident')),
+            ],
+            options={
+                'unique_together': {('source', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
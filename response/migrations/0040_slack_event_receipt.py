@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0039_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlackEventReceipt',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True)),
+                ('received_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0040_slack_event_receipt'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commschannel',
+            name='channel_id',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+    ]
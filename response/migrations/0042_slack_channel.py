@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0041_comms_channel_channel_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlackChannel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel_id', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(db_index=True, max_length=80)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
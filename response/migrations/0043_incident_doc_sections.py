@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0042_slack_channel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='actions_modified',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='participants_modified',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='timeline_modified',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
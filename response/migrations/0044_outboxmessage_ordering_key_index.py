@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0043_incident_doc_sections'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['ordering_key', 'status'], name='response_ou_orderin_e67d83_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0044_outboxmessage_ordering_key_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='last_message_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
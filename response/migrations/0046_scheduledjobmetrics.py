@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0045_userstats_last_message_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJobMetrics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=50, unique=True)),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('last_scheduler', models.CharField(blank=True, max_length=100)),
+                ('last_started', models.DateTimeField(blank=True, null=True)),
+                ('last_duration', models.FloatField(blank=True, null=True)),
+                ('max_duration', models.FloatField(default=0.0)),
+                ('total_duration', models.FloatField(default=0.0)),
+            ],
+            options={
+                'verbose_name_plural': 'scheduled job metrics',
+            },
+        ),
+    ]
@@ -1,9 +1,21 @@
-from .core.models import Action, Event, ExternalUser, Incident, TimelineEvent
+from .core.models import (
+    Action,
+    Event,
+    ExternalUser,
+    Incident,
+    SearchDocument,
+    TimelineEvent,
+)
 from .slack.models import (
     CommsChannel,
     HeadlinePost,
     Notification,
+    OutboxMessage,
     PinnedMessage,
+    ScheduledJobMetrics,
+    SchedulerLock,
+    SlackChannel,
+    SlackEventReceipt,
     UserStats,
 )
 
@@ -11,11 +23,17 @@ __all__ = (
     "Action",
     "Event",
     "Incident",
+    "SearchDocument",
     "TimelineEvent",
     "ExternalUser",
     "CommsChannel",
     "HeadlinePost",
     "Notification",
+    "OutboxMessage",
     "PinnedMessage",
+    "ScheduledJobMetrics",
+    "SchedulerLock",
+    "SlackChannel",
+    "SlackEventReceipt",
     "UserStats",
 )
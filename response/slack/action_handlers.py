@@ -41,7 +41,7 @@ def handle_make_me_lead(ac: ActionContext):
 
     ac.incident.lead = lead
     ac.incident.updated_by = lead
-    ac.incident.save()
+    ac.incident.save_dirty()
 
 @action_handler(TAKE_ACTION_BUTTON)
 def handle_take_action(ac: ActionContext):
@@ -55,7 +55,7 @@ def handle_take_action(ac: ActionContext):
 
     action.assigned_to = assigned_to
     action.updated_by = assigned_to
-    action.save()
+    action.save_dirty()
 
 @action_handler(COMPLETE_ACTION_BUTTON)
 def handle_take_action(ac: ActionContext):
@@ -72,7 +72,7 @@ def handle_take_action(ac: ActionContext):
 
     action.updated_by = completed_by
     action.done = True
-    action.save()
+    action.save_dirty()
 
 @action_handler(ADD_SUMMARY_BUTTON)
 def handle_add_summary(ac: ActionContext):
@@ -135,7 +135,7 @@ def handle_close_incident(ac: ActionContext):
     ac.incident.updated_by = updated_by
 
     ac.incident.end_time = datetime.now()
-    ac.incident.save()
+    ac.incident.save_dirty()
 
 @action_handler(HeadlinePost.REQUEST_UPDATE_INCIDENT_BUTTON)
 def handle_request_update(ac: ActionContext):
@@ -4,7 +4,12 @@ from response.slack.models import (
     CommsChannel,
     HeadlinePost,
     Notification,
+    OutboxMessage,
     PinnedMessage,
+    ScheduledJobMetrics,
+    SchedulerLock,
+    SlackChannel,
+    SlackEventReceipt,
     UserStats,
 )
 
@@ -14,3 +19,8 @@ admin.site.register(CommsChannel)
 admin.site.register(Notification)
 admin.site.register(UserStats)
 admin.site.register(PinnedMessage)
+admin.site.register(SchedulerLock)
+admin.site.register(ScheduledJobMetrics)
+admin.site.register(OutboxMessage)
+admin.site.register(SlackEventReceipt)
+admin.site.register(SlackChannel)
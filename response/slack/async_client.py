@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+
+import slack_sdk
+
+from response.slack.client import SlackClient, SlackError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSlackClient(SlackClient):
+    """
+    A SlackClient that makes its calls with slack_sdk's AsyncWebClient over
+    one shared pool of aiohttp connections, on an event loop running in a
+    background thread. aiohttp is an optional dependency
+    (pip install django-incident-response[async]).
+
+    Every SlackClient method works as before, blocking the caller until it's
+    done, so it can be used as settings.SLACK_CLIENT. The fan-out helpers
+    (send_messages, invite_users_to_channel and sync_channel_bookmarks) send
+    their requests concurrently. From async code, await api_call_async or the
+    *_async helpers instead.
+    """
+
+    def __init__(self, api_token, app_token=None, pool_size=100, web_client=None, **kwargs):
+        super().__init__(api_token, app_token, pooled=False, **kwargs)
+        self.pool_size = pool_size
+        self._session = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="slack-async-client", daemon=True
+        )
+        self._thread.start()
+
+        try:
+            self.client = web_client or self.run(self._create_web_client())
+        except ImportError:
+            self.close()
+            raise
+
+    async def _create_web_client(self):
+        try:
+            import aiohttp
+            from slack_sdk.web.async_client import AsyncWebClient
+        except ImportError as e:
+            raise ImportError(
+                "AsyncSlackClient needs aiohttp, install it with pip install aiohttp"
+            ) from e
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size)
+        )
+        kwargs = {"base_url": self.base_url} if self.base_url else {}
+        return AsyncWebClient(
+            token=self.api_token, session=self._session, timeout=self.timeout, **kwargs
+        )
+
+    def run(self, coroutine):
+        "Runs a coroutine on the client's event loop, waiting for its result"
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError(
+                "Can't block on the Slack event loop from inside it, await the *_async methods instead"
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self):
+        "Closes the connection pool and stops the event loop"
+        if self._session is not None:
+            self.run(self._session.close())
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def api_call_async(self, api_method, *args, **kwargs):
+        method_name = api_method.__name__.replace("_", ".")
+        channel = kwargs.get("channel")
+        logger.info(f"Calling Slack API {method_name}")
+
+        kwargs.pop("is_retrying", None)
+
+        for i in range(1, self.max_retry_attempts + 1):
+            wait = self._throttle_seconds(method_name, channel)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                self.stats.incr("calls")
+                return await api_method(*args, **kwargs)
+            except slack_sdk.errors.SlackApiError as e:
+                backoff_seconds = self._retry_backoff_seconds(method_name, channel, e, i)
+                if backoff_seconds:
+                    await asyncio.sleep(backoff_seconds)
+
+    def api_call(self, api_method, *args, **kwargs):
+        return self.run(self.api_call_async(api_method, *args, **kwargs))
+
+    async def send_messages_async(self, messages):
+        return await asyncio.gather(
+            *(
+                self.api_call_async(
+                    self.client.chat_postMessage,
+                    channel=message["channel_id"],
+                    text=message["text"],
+                    blocks=message.get("blocks"),
+                    attachments=message.get("attachments"),
+                    thread_ts=message.get("thread_ts"),
+                )
+                for message in messages
+            )
+        )
+
+    def send_messages(self, messages):
+        return self.run(self.send_messages_async(messages))
+
+    async def _invite_chunk_async(self, user_ids, channel_id):
+        try:
+            return await self.api_call_async(
+                self.client.conversations_invite,
+                users=user_ids,
+                channel=channel_id,
+                force=True,
+            )
+        except SlackError as e:
+            if e.slack_error != "already_in_channel":
+                raise
+
+    async def invite_users_to_channel_async(self, user_ids, channel_id, chunk_size=1000):
+        user_ids = list(user_ids)
+        responses = await asyncio.gather(
+            *(
+                self._invite_chunk_async(user_ids[start : start + chunk_size], channel_id)
+                for start in range(0, len(user_ids), chunk_size)
+            )
+        )
+        return [response for response in responses if response is not None]
+
+    def invite_users_to_channel(self, user_ids, channel_id, chunk_size=1000):
+        return self.run(
+            self.invite_users_to_channel_async(user_ids, channel_id, chunk_size)
+        )
+
+    async def sync_channel_bookmarks_async(self, channel_id, bookmarks):
+        response = await self.api_call_async(
+            self.client.bookmarks_list, channel_id=channel_id
+        )
+        existing = response.data["bookmarks"]
+        return await asyncio.gather(
+            *(
+                self.api_call_async(api_method, **kwargs)
+                for api_method, kwargs in self._bookmark_calls(
+                    channel_id, bookmarks, existing
+                )
+            )
+        )
+
+    def sync_channel_bookmarks(self, channel_id, bookmarks):
+        return self.run(self.sync_channel_bookmarks_async(channel_id, bookmarks))
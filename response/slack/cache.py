@@ -1,6 +1,10 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 
 from django.conf import settings
+from django.core.cache import caches
 from django.db import transaction
 
 from response.core.models import ExternalUser
@@ -8,73 +12,390 @@ from response.slack.client import SlackError
 
 logger = logging.getLogger(__name__)
 
+# Marks a user that Slack doesn't know about
+MISSING = "__missing__"
+
+
+class UserProfileCache(object):
+    """
+    A bounded, process-local LRU cache of user profiles in front of the
+    ExternalUser table, optionally backed by a shared Django cache.
+
+    Unknown users are cached too (as MISSING) for a shorter time, so repeated
+    lookups of a bad ID don't each go to Slack.
+    """
+
+    def __init__(
+        self, max_size=2048, ttl_seconds=300, negative_ttl_seconds=60, backend=None
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _backend_key(self, external_id):
+        return f"response:user_profile:{external_id}"
+
+    def _shared(self):
+        return caches[self.backend] if self.backend else None
+
+    def get_many(self, external_ids):
+        "Returns the cached profiles (or MISSING) for the given IDs"
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for external_id in external_ids:
+                entry = self._entries.get(external_id)
+                if entry is None:
+                    continue
+                profile, expires_at = entry
+                if expires_at < now:
+                    del self._entries[external_id]
+                    continue
+                self._entries.move_to_end(external_id)
+                found[external_id] = profile
+
+        shared = self._shared()
+        remaining = [i for i in external_ids if i not in found]
+        if shared and remaining:
+            from_shared = shared.get_many([self._backend_key(i) for i in remaining])
+            for external_id in remaining:
+                profile = from_shared.get(self._backend_key(external_id))
+                if profile is not None:
+                    self._set_local(external_id, profile)
+                    found[external_id] = profile
+
+        return found
+
+    def _ttl(self, profile):
+        return self.negative_ttl_seconds if profile == MISSING else self.ttl_seconds
+
+    def _set_local(self, external_id, profile):
+        expires_at = time.monotonic() + self._ttl(profile)
+        with self._lock:
+            self._entries[external_id] = (profile, expires_at)
+            self._entries.move_to_end(external_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set(self, external_id, profile):
+        self._set_local(external_id, profile)
+        shared = self._shared()
+        if shared:
+            shared.set(self._backend_key(external_id), profile, self._ttl(profile))
+
+    def invalidate(self, external_ids):
+        with self._lock:
+            for external_id in external_ids:
+                self._entries.pop(external_id, None)
+        shared = self._shared()
+        if shared:
+            shared.delete_many([self._backend_key(i) for i in external_ids])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+profile_cache = UserProfileCache(
+    max_size=getattr(settings, "RESPONSE_USER_CACHE_SIZE", 2048),
+    ttl_seconds=getattr(settings, "RESPONSE_USER_CACHE_TTL_SECONDS", 300),
+    negative_ttl_seconds=getattr(
+        settings, "RESPONSE_USER_CACHE_NEGATIVE_TTL_SECONDS", 60
+    ),
+    # the alias of a Django cache (e.g. memcached or redis) to share profiles
+    # between processes
+    backend=getattr(settings, "RESPONSE_USER_CACHE_BACKEND", None),
+)
+
+
+class UsergroupCache(object):
+    """
+    A process-local copy of the workspace's usergroups, as maps from handle
+    to ID and from ID to members, filled from a single usergroups.list call
+    and refreshed once it's older than ttl_seconds.
+
+    subteam_* events keep it up to date in between (see event_handlers.py).
+    """
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._members = {}
+        self._expires_at = 0
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            if self._expires_at > time.monotonic():
+                return
+
+            usergroups = settings.SLACK_CLIENT.list_usergroups(include_users=True)
+            self._ids = {group["handle"]: group["id"] for group in usergroups}
+            self._members = {
+                group["id"]: list(group.get("users", [])) for group in usergroups
+            }
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            logger.info(f"Cached {len(usergroups)} Slack usergroups")
+
+    def get_id(self, handle):
+        self._refresh_if_stale()
+        return self._ids.get(handle)
+
+    def get_members(self, group_id):
+        self._refresh_if_stale()
+        members = self._members.get(group_id)
+        return list(members) if members is not None else None
+
+    def update(self, usergroup):
+        "Stores a usergroup from a subteam event"
+        with self._lock:
+            for handle in [h for h, i in self._ids.items() if i == usergroup["id"]]:
+                del self._ids[handle]
+            self._ids[usergroup["handle"]] = usergroup["id"]
+            if "users" in usergroup:
+                self._members[usergroup["id"]] = list(usergroup["users"])
+            else:
+                self._members.pop(usergroup["id"], None)
+                self._expires_at = 0
+
+    def update_members(self, group_id, added=(), removed=()):
+        with self._lock:
+            if group_id not in self._members:
+                return
+            removed = set(removed)
+            members = [u for u in self._members[group_id] if u not in removed]
+            members += [u for u in added if u not in members]
+            self._members[group_id] = members
+
+    def clear(self):
+        with self._lock:
+            self._ids = {}
+            self._members = {}
+            self._expires_at = 0
+
+
+usergroup_cache = UsergroupCache(
+    ttl_seconds=getattr(settings, "RESPONSE_USERGROUP_CACHE_TTL_SECONDS", 300)
+)
+
+
+def get_usergroup_id(handle):
+    "Gets the ID of the usergroup with the given handle, or None"
+    return usergroup_cache.get_id(handle)
+
+
+def get_usergroup_users(group_id):
+    "Gets the user IDs of the members of a usergroup, or None"
+    return usergroup_cache.get_members(group_id)
+
+
+def invite_usergroup_to_channel(group_id, channel_id):
+    """
+    Invites the members of a usergroup to a channel, returning the IDs of the
+    users invited
+    """
+    users = get_usergroup_users(group_id)
+    if not users:
+        logger.info(f"No users in usergroup {group_id} to invite to {channel_id}")
+        return []
+
+    settings.SLACK_CLIENT.invite_users_to_channel(users, channel_id)
+    return users
+
+
+def invalidate_user_profiles(external_ids):
+    "Drops users from the in-memory profile cache after their rows change"
+    if external_ids:
+        profile_cache.invalidate(list(external_ids))
+
+
+def _user_profile(external_user):
+    return {
+        "id": external_user.external_id,
+        "name": external_user.display_name,
+        "fullname": external_user.full_name,
+        "email": external_user.email,
+        "deleted": external_user.deleted,
+    }
+
+
+USER_CACHE_FIELDS = ("display_name", "full_name", "email", "deleted")
+
+
+def _cached_user_fields(user):
+    return {
+        "display_name": user["profile"]["display_name_normalized"] or user["name"],
+        "full_name": user["profile"]["real_name"] or user["name"],
+        "email": user["profile"].get("email", None),
+        "deleted": user["deleted"],
+    }
+
+
+def _sync_user_page(users, report):
+    """
+    Brings the cached users in line with a page of Slack members, using a
+    constant number of queries however big the page is
+    """
+    fields_by_id = {user["id"]: _cached_user_fields(user) for user in users}
+
+    existing = {}
+    for external_user in ExternalUser.objects.filter(
+        app_id="slack", external_id__in=fields_by_id.keys()
+    ):
+        existing.setdefault(external_user.external_id, []).append(external_user)
+
+    to_create = []
+    to_update = []
+    for external_id, fields in fields_by_id.items():
+        if external_id not in existing:
+            to_create.append(
+                ExternalUser(app_id="slack", external_id=external_id, **fields)
+            )
+            continue
+
+        for external_user in existing[external_id]:
+            if all(getattr(external_user, f) == v for f, v in fields.items()):
+                report["unchanged"] += 1
+                continue
+            for field, value in fields.items():
+                setattr(external_user, field, value)
+            to_update.append(external_user)
+
+    with transaction.atomic():
+        ExternalUser.objects.bulk_create(to_create)
+        ExternalUser.objects.bulk_update(to_update, USER_CACHE_FIELDS)
+
+    # bulk writes don't send save signals, so invalidate the profiles here
+    invalidate_user_profiles(
+        [u.external_id for u in to_create] + [u.external_id for u in to_update]
+    )
+
+    report["created"] += len(to_create)
+    report["updated"] += len(to_update)
+
 
 def update_user_cache(exclude_bots=False):
+    """
+    Syncs the cached ExternalUsers with the members of the Slack workspace,
+    only writing the users that are new or have changed. Returns a report of
+    how many users were created, updated and left unchanged.
+    """
+    report = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "pages": 0}
+    start = time.monotonic()
+
     cursor = None
     while cursor != "":
         response = settings.SLACK_CLIENT.get_paginated_users(limit=200, cursor=cursor)
 
         users = response["members"]
+        if exclude_bots:
+            report["skipped"] += sum(1 for user in users if user["is_bot"])
+            users = [user for user in users if not user["is_bot"]]
 
         logger.info(f"Updating {len(users)} users in the cache")
-        with transaction.atomic():
-            for user in users:
-                if exclude_bots and user["is_bot"]:
-                    continue
-                ExternalUser.objects.update_or_create_slack(
-                    external_id=user["id"],
-                    defaults={
-                        "display_name": user["profile"]["display_name_normalized"]
-                        or user["name"],
-                        "full_name": user["profile"]["real_name"] or user["name"],
-                        "email": user["profile"].get("email", None),
-                        "deleted": user["deleted"],
-                    },
-                )
+        _sync_user_page(users, report)
+        report["pages"] += 1
         cursor = response["response_metadata"].get("next_cursor")
 
+    logger.info(
+        f"Synced user cache in {time.monotonic() - start:.1f}s over {report['pages']} pages: "
+        f"{report['created']} created, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['skipped']} bots skipped"
+    )
+    return report
+
+
+def _fetch_user_profile(external_id):
+    "Gets a profile from Slack, storing it in the DB"
+    try:
+        user_profile = settings.SLACK_CLIENT.get_user_profile(external_id)
+    except SlackError as e:
+        logger.error(f"Failed to get user {external_id} from DB cache or Slack")
+        if e.slack_error == "user_not_found":
+            profile_cache.set(external_id, MISSING)
+        raise
+
+    # store it in the DB
+    ExternalUser.objects.get_or_create_slack(
+        external_id=user_profile["id"],
+        defaults={
+            "display_name": user_profile["name"],
+            "full_name": user_profile["fullname"],
+            "email": user_profile["email"],
+            "deleted": user_profile["deleted"],
+        },
+    )
+
+    logger.info(f"Got user {external_id} from Slack and cached in DB")
+    return user_profile
+
+
+def get_user_profiles(external_ids, fetch_missing=True):
+    """
+    Gets the slack user profiles for many users at once, as a dict keyed by
+    user ID:
+        - from the in-memory cache if available
+        - or else from the DB cache, in a single query
+        - or else (if fetch_missing) from the Slack API
+    Users Slack doesn't know about are left out.
+    """
+    external_ids = list(dict.fromkeys(i for i in external_ids if i))
+    profiles = profile_cache.get_many(external_ids)
+
+    remaining = [i for i in external_ids if i not in profiles]
+    if remaining:
+        for external_user in ExternalUser.objects.filter(external_id__in=remaining):
+            if external_user.external_id not in profiles:
+                profile = _user_profile(external_user)
+                profile_cache.set(external_user.external_id, profile)
+                profiles[external_user.external_id] = profile
+        logger.debug(f"Looked up {len(remaining)} users in DB cache")
+
+    for external_id in external_ids:
+        if external_id in profiles or not fetch_missing:
+            continue
+        try:
+            profile = _fetch_user_profile(external_id)
+        except SlackError as e:
+            if e.slack_error != "user_not_found":
+                raise
+            continue
+        profile_cache.set(external_id, profile)
+        profiles[external_id] = profile
+
+    return {i: dict(p) for i, p in profiles.items() if p != MISSING}
+
 
 def get_user_profile(external_id):
     """
     Gets a slack user profile:
-        - from the DB cache if available
+        - from the in-memory cache if available
+        - or else from the DB cache
         - or else from the Slack API
     """
     if not external_id:
         return None
 
+    cached = profile_cache.get_many([external_id]).get(external_id)
+    if cached == MISSING:
+        raise SlackError(f"User {external_id} not found", slack_error="user_not_found")
+    if cached is not None:
+        logger.debug(f"Got user {external_id} from memory cache")
+        return dict(cached)
+
     try:
         external_user = ExternalUser.objects.get(external_id=external_id)
-        logger.info(f"Got user {external_id} from DB cache")
-
-        return {
-            "id": external_user.external_id,
-            "name": external_user.display_name,
-            "fullname": external_user.full_name,
-            "email": external_user.email,
-            "deleted": external_user.deleted,
-        }
+        logger.debug(f"Got user {external_id} from DB cache")
+        user_profile = _user_profile(external_user)
     except ExternalUser.DoesNotExist:
         # profile from slack
-        try:
-            user_profile = settings.SLACK_CLIENT.get_user_profile(external_id)
-        except SlackError:
-            logger.error(f"Failed to get user {external_id} from DB cache or Slack")
-            raise
+        user_profile = _fetch_user_profile(external_id)
 
-        # store it in the DB
-        ExternalUser.objects.get_or_create_slack(
-            external_id=user_profile["id"],
-            defaults={
-                "display_name": user_profile["name"],
-                "full_name": user_profile["fullname"],
-                "email": user_profile["email"],
-                "deleted": user_profile["deleted"],
-            },
-        )
-
-        logger.info(f"Got user {external_id} from Slack and cached in DB")
-        return user_profile
+    profile_cache.set(external_id, user_profile)
+    return dict(user_profile)
 
 
 def get_user_profile_by_email(email):
@@ -88,15 +409,9 @@ def get_user_profile_by_email(email):
 
     try:
         external_user = ExternalUser.objects.get(email=email)
-        logger.info(f"Got user with email {email} from DB cache")
-
-        return {
-            "id": external_user.external_id,
-            "name": external_user.display_name,
-            "fullname": external_user.full_name,
-            "email": external_user.email,
-            "deleted": external_user.deleted,
-        }
+        logger.debug(f"Got user with email {email} from DB cache")
+
+        return _user_profile(external_user)
     except ExternalUser.DoesNotExist:
         # profile from slack
         try:
@@ -1,9 +1,14 @@
 import logging
+import random
+import threading
 import time
 
 import slack_sdk
 from slugify import slugify
 
+from response.slack.rate_limit import RateLimiter
+from response.slack.transport import create_web_client
+
 logger = logging.getLogger(__name__)
 
 class SlackError(Exception):
@@ -12,48 +17,164 @@ class SlackError(Exception):
         self.slack_error = slack_error
 
 
+class SlackClientStats(object):
+    """
+    Counts of calls made by a SlackClient, and how often they were held back
+    by the rate limiter or retried
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self.retried = 0
+        self.failed = 0
+
+    def incr(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "throttled_seconds": self.throttled_seconds,
+                "rate_limited": self.rate_limited,
+                "retried": self.retried,
+                "failed": self.failed,
+            }
+
+
 class SlackClient(object):
     def __init__(
         self,
         api_token,
-        app_token,
+        app_token=None,
         max_retry_attempts=10,
         retry_base_backoff_seconds=2,
         retryable_errors=None,
+        max_backoff_seconds=60,
+        rate_limiter=None,
+        channel_directory=None,
+        channel_page_size=800,
+        base_url=None,
+        pooled=True,
+        pool_size=10,
+        connect_timeout=10,
+        timeout=30,
     ):
         self.api_token = api_token
         self.app_token = app_token
-        self.client = slack_sdk.WebClient(token=self.api_token)
+        # base_url points the client at a mock of the Slack API, and with
+        # pooled it keeps connections alive between calls
+        self.base_url = base_url
+        self.timeout = timeout
+        self.client = create_web_client(
+            self.api_token,
+            base_url=base_url,
+            pooled=pooled,
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=timeout,
+        )
         self.max_retry_attempts = max_retry_attempts
         self.retry_base_backoff_seconds = retry_base_backoff_seconds
-        self.retryable_errors = retryable_errors or ["ratelimited"]   
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retryable_errors = retryable_errors or ["ratelimited"]
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # where channel IDs are looked up by name before paging through
+        # conversations.list, e.g. SlackChannel.objects
+        self.channel_directory = channel_directory
+        self.channel_page_size = channel_page_size
+        self.stats = SlackClientStats()
+
+    def _backoff_seconds(self, attempt):
+        "Exponential backoff with jitter, so retrying callers spread out"
+        backoff = min(
+            self.retry_base_backoff_seconds * 2 ** (attempt - 1),
+            self.max_backoff_seconds,
+        )
+        return random.uniform(backoff / 2, backoff)
+
+    def _retry_after_seconds(self, response):
+        headers = getattr(response, "headers", None) or {}
+        for header, value in headers.items():
+            if header.lower() == "retry-after":
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    return None
+        return None
+
+    def _throttle_seconds(self, method_name, channel):
+        "Reserves a call to method_name, returning how long to wait before making it"
+        wait = self.rate_limiter.reserve(method_name, channel)
+        if wait > 0:
+            logger.info(f"Throttling call to {method_name} for {wait:.2f}s")
+            self.stats.incr("throttled")
+            self.stats.incr("throttled_seconds", wait)
+        return wait
+
+    def _retry_backoff_seconds(self, method_name, channel, e, attempt):
+        """
+        Returns how long to back off before retrying a call that failed with
+        the SlackApiError e (0 if the rate limiter will hold the retry back),
+        or raises a SlackError if it shouldn't be retried
+        """
+        error = e.response.get("error", "<no error given>")
+
+        if error in self.retryable_errors and attempt < self.max_retry_attempts:
+            retry_after = self._retry_after_seconds(e.response)
+            if error == "ratelimited":
+                self.stats.incr("rate_limited")
+            if retry_after is not None:
+                backoff_seconds = retry_after
+            else:
+                backoff_seconds = self._backoff_seconds(attempt)
+
+            logger.warning(
+                f"Retrying request to {method_name} after error {error}. Backing off {backoff_seconds:.2f}s (attempt {attempt} of {self.max_retry_attempts})"
+            )
+            self.stats.incr("retried")
+            if retry_after is not None:
+                # hold back every caller of this method, not just us;
+                # the reservation before the next attempt does the wait
+                self.rate_limiter.penalize(method_name, channel, retry_after)
+                return 0
+            return backoff_seconds
+
+        self.stats.incr("failed")
+        raise SlackError(
+            f"Error calling Slack API endpoint '{method_name}': {error}",
+            slack_error=error,
+        )
 
     def api_call(self, api_method, *args, **kwargs):
-        logger.info(f"Calling Slack API {api_method.__name__}")
+        method_name = api_method.__name__.replace("_", ".")
+        channel = kwargs.get("channel")
+        logger.info(f"Calling Slack API {method_name}")
+
+        # Remove 'is_retrying' from kwargs if it exists
+        kwargs.pop('is_retrying', None)
 
         for i in range(1, self.max_retry_attempts + 1):
+            wait = self._throttle_seconds(method_name, channel)
+            if wait > 0:
+                time.sleep(wait)
+
             try:
-                # Remove 'is_retrying' from kwargs if it exists
-                kwargs.pop('is_retrying', None)
-                response = api_method(*args, **kwargs)
+                self.stats.incr("calls")
+                return api_method(*args, **kwargs)
             except slack_sdk.errors.SlackApiError as e:
-                if e.response['ok'] is False:
-                    error = e.response.get("error", "<no error given>")
-
-                    if error in self.retryable_errors:
-                        backoff_seconds = self.retry_base_backoff_seconds ^ i
-                        logging.warning(
-                            f"Retrying request to {api_method.__name__} after error {error}. Backing off {backoff_seconds:.2f}s (attempt {i} of {self.max_retry_attempts})"
-                        )
-                        time.sleep(backoff_seconds)
-                        continue
-
-                raise SlackError(
-                    f"Error calling Slack API endpoint '{api_method.__name__}': {error}",
-                    slack_error=error,
-                )
+                backoff_seconds = self._retry_backoff_seconds(method_name, channel, e, i)
+                if backoff_seconds:
+                    time.sleep(backoff_seconds)
 
-            return response
+    def get_stats(self):
+        return self.stats.as_dict()
 
     def users_list(self):
         logger.info("Listing Slack users")
@@ -82,12 +203,18 @@ class SlackClient(object):
 
     def get_channel_id(self, name, auto_unarchive=False):
         logger.info(f"Getting channel ID for {name}")
+
+        if self.channel_directory is not None:
+            channel_id = self._get_known_channel_id(name, auto_unarchive)
+            if channel_id:
+                return channel_id
+
         next_cursor = None
 
         while next_cursor != "":
             response = self.api_call(self.client.conversations_list, exclude_archived=not auto_unarchive,
                 exclude_members=True,
-                limit=800,
+                limit=self.channel_page_size,
                 cursor=next_cursor,
             )
 
@@ -99,6 +226,12 @@ class SlackClient(object):
                 logger.error(
                     "get_channel_id - I guess checking next_cursor in response object didn't work."
                 )
+                next_cursor = ""
+
+            # remember every channel we page through, so the next lookup
+            # doesn't need to
+            if self.channel_directory is not None:
+                self.channel_directory.record(response["channels"])
 
             for channel in response["channels"]:
                 if channel["name"] == name:
@@ -108,38 +241,67 @@ class SlackClient(object):
 
         raise SlackError(f"Channel '{name}' not found")
 
-    def get_usergroup_id(self, group_handle):
-        response = self.api_call(self.client.usergroups_list)
+    def _get_known_channel_id(self, name, auto_unarchive):
+        """
+        Returns the ID of the channel called name from the channel directory,
+        checking with Slack that it's still called that
+        """
+        known = self.channel_directory.lookup(name)
+        if known is None:
+            return None
+
+        channel_id, _ = known
+        try:
+            response = self.api_call(self.client.conversations_info, channel=channel_id)
+        except SlackError as e:
+            if e.slack_error != "channel_not_found":
+                raise
+            self.channel_directory.remove(channel_id)
+            return None
+
+        channel = response["channel"]
+        self.channel_directory.record([channel])
+        if channel["name"] != name:
+            return None
+
+        if channel.get("is_archived"):
+            if not auto_unarchive:
+                return None
+            self.unarchive_channel(channel_id)
+        return channel_id
+
+    def list_usergroups(self, include_users=False):
+        response = self.api_call(self.client.usergroups_list, include_users=include_users)
         if not response.get("ok", False):
-            raise SlackError(
-                f"Failed to get usergroup with group handle {group_handle} : {response['error']}"
-            )
-        for group in response["usergroups"]:
-            if group["handle"] == group_handle:
-                return group["id"]
-        return None
+            raise SlackError(f"Failed to list usergroups : {response['error']}")
+        return response["usergroups"]
+
+    def get_usergroup_id(self, group_handle):
+        "Looks the usergroup up in the usergroup cache, see response.slack.cache"
+        # imported here as the cache module needs this one
+        from response.slack.cache import usergroup_cache
+
+        return usergroup_cache.get_id(group_handle)
 
     def get_usergroup_users(self, group_id):
-        response = self.api_call(self.client.usergroups_list, include_users=True)
+        "Looks the usergroup up in the usergroup cache, see response.slack.cache"
+        from response.slack.cache import usergroup_cache
 
-        if not response.get("ok", False):
-            raise SlackError(
-                f"Failed to get users from usergroup with id {group_id} : {response['error']}"
-            )
-        for group in response["usergroups"]:
-            if group["id"] == group_id:
-                return group["users"]
-        return None
+        return usergroup_cache.get_members(group_id)
 
     def create_channel(self, name, private):
         response = self.api_call(self.client.conversations_create, name=name, is_private=private)
         try:
-            return response["channel"]["id"]
+            channel_id = response["channel"]["id"]
         except KeyError:
             raise SlackError(
                 "Got unexpected response from Slack API for conversations.create - couldn't find channel.id key"
             )
 
+        if self.channel_directory is not None and not private:
+            self.channel_directory.record([{"id": channel_id, "name": name}])
+        return channel_id
+
     def get_or_create_channel(self, channel_name, auto_unarchive=False, private=False):
         try:
             return self.create_channel(channel_name, private=private)
@@ -175,6 +337,41 @@ class SlackClient(object):
             self.client.bookmarks_add, channel_id=channel_id, title=bookmark, type=type,
             link=link, emoji=emoji
         )
+
+    def _bookmark_calls(self, channel_id, bookmarks, existing):
+        """
+        Returns the (api method, kwargs) calls that add each bookmark to the
+        channel, or edit the one of the existing bookmarks already there.
+        Bookmarks are dicts of title, link and emoji, and optionally a prefix
+        which identifies the existing bookmark by its title (the whole title
+        is used otherwise).
+        """
+        calls = []
+        for bookmark in bookmarks:
+            prefix = bookmark.get("prefix", bookmark["title"])
+            match = next(
+                (item for item in existing if item["title"].startswith(prefix)), None
+            )
+            kwargs = {
+                "channel_id": channel_id,
+                "title": bookmark["title"],
+                "type": "link",
+                "link": bookmark["link"],
+                "emoji": bookmark.get("emoji"),
+            }
+            if match:
+                calls.append((self.client.bookmarks_edit, dict(kwargs, bookmark_id=match["id"])))
+            else:
+                calls.append((self.client.bookmarks_add, kwargs))
+        return calls
+
+    def sync_channel_bookmarks(self, channel_id, bookmarks):
+        "Adds link bookmarks to a channel, editing any that are already there"
+        existing = self.list_channel_bookmarks(channel_id)
+        return [
+            self.api_call(api_method, **kwargs)
+            for api_method, kwargs in self._bookmark_calls(channel_id, bookmarks, existing)
+        ]
        
     def unarchive_channel(self, channel_id):
         response = self.api_call(self.client.conversations_unarchive, channel=channel_id)
@@ -191,6 +388,10 @@ class SlackClient(object):
             thread_ts=thread_ts,
         )
 
+    def send_messages(self, messages):
+        "Sends many messages, given as dicts of send_message's arguments"
+        return [self.send_message(**message) for message in messages]
+
     def send_ephemeral_message(self, channel_id, user_id, text, attachments=None):
         return self.api_call(
             self.client.chat_postEphemeral,
@@ -249,10 +450,29 @@ class SlackClient(object):
             self.client.conversations_invite, users=[user_id], channel=channel_id
         )
 
-    def invite_users_to_channel(self, user_ids, channel_id):
-        return self.api_call(
-            self.client.conversations_invite, users=user_ids, channel=channel_id
-        )
+    def invite_users_to_channel(self, user_ids, channel_id, chunk_size=1000):
+        """
+        Invites users to a channel, in as few calls as conversations.invite
+        allows (it takes up to 1000 users at a time). Users already in the
+        channel are skipped rather than failing the invite.
+        """
+        user_ids = list(user_ids)
+        responses = []
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start : start + chunk_size]
+            try:
+                responses.append(
+                    self.api_call(
+                        self.client.conversations_invite,
+                        users=chunk,
+                        channel=channel_id,
+                        force=True,
+                    )
+                )
+            except SlackError as e:
+                if e.slack_error != "already_in_channel":
+                    raise
+        return responses
     
     def join_channel(self, channel_id):
         return self.api_call(self.client.conversations_join, channel=channel_id)
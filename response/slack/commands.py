@@ -25,12 +25,11 @@ def command_listeners(app: App):
     def incident(ack, body, channel_id, respond):
         ack()
        
-        try:
-            # check if the command is being run from an existing incident channel
-            comms_channel = CommsChannel.objects.get(channel_id=channel_id)
-            incident = comms_channel.incident
+        # check if the command is being run from an existing incident channel
+        incident = CommsChannel.objects.incident_for_channel(channel_id)
+        if incident is not None:
             _handle_existing_incident_command(incident, body, channel_id, respond)
-        except CommsChannel.DoesNotExist:
+        else:
             _handle_new_command(body, channel_id)
     
     def _handle_existing_incident_command(incident, body, channel_id, respond):
@@ -123,6 +122,12 @@ def command_listeners(app: App):
         logger.info(f"Handling Slack event of type '{action_type}'")
 
         if action_type == "event_callback":
-            from response.slack.decorators.event_handler import handle_event
-            handle_event(body)
+            from response.slack.decorators.event_handler import (
+                EventQueueFull,
+                dispatch_event,
+            )
+            try:
+                dispatch_event(body)
+            except EventQueueFull as e:
+                logger.error(f"Dropping Slack event: {e}")
 
@@ -1,6 +1,6 @@
 from .action_handler import ActionContext, action_handler, handle_action
 from .modal_handler import modal_handler, handle_modal
-from .event_handler import handle_event, slack_event
+from .event_handler import dispatch_event, handle_event, slack_event
 from .headline_post_action import headline_post_action
 from .incident_command import handle_incident_command, incident_command
 from .incident_notification import (
@@ -9,11 +9,14 @@ from .incident_notification import (
     single_notification,
 )
 from .keyword_handler import handle_keywords, keyword_handler
+from .outbox_task import enqueue_outbox_task, handle_outbox, outbox_task
+from .scheduled_job import scheduled_job
 
 __all__ = (
     "ActionContext",
     "action_handler",
     "modal_handler",
+    "dispatch_event",
     "handle_event",
     "slack_event",
     "headline_post_action",
@@ -26,4 +29,8 @@ __all__ = (
     "handle_action",
     "handle_modal",
     "handle_notifications",
+    "scheduled_job",
+    "outbox_task",
+    "enqueue_outbox_task",
+    "handle_outbox",
 )
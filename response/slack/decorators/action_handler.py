@@ -63,17 +63,16 @@ def handle_action(payload):
         # we want to tie all actions to an incident, and have two ways to do this:
         # - if action comes from a comms channel, lookup the incident by comms channel id
         # - if not in comms channel, we rely on the button value containing the incident id
-        try:
-            comms_channel = CommsChannel.objects.get(channel_id=channel_id)
-            incident = comms_channel.incident
-        except CommsChannel.DoesNotExist:
+        incident = CommsChannel.objects.incident_for_channel(channel_id)
+        if incident is None:
             incident_id = value
-            incident = Incident.objects.get(pk=incident_id)
-        except Incident.DoesNotExist:
-            logger.error(
-                f"Can't find incident associated with channel {channel_id} or with id {incident_id}"
-            )
-            return
+            try:
+                incident = Incident.objects.get(pk=incident_id)
+            except Incident.DoesNotExist:
+                logger.error(
+                    f"Can't find incident associated with channel {channel_id} or with id {incident_id}"
+                )
+                return
 
         action_context = ActionContext(
             incident=incident,
@@ -1,31 +1,52 @@
 import logging
+import queue
+import threading
+import time
+import zlib
 from collections import defaultdict
 
+from django.conf import settings
+from django.db import close_old_connections
+
 from response.slack.models.comms_channel import CommsChannel
+from response.slack.models.slack_event_receipt import SlackEventReceipt
 
 logger = logging.getLogger(__name__)
 
+class EventQueueFull(Exception):
+    "Raised when an event can't be queued, so Slack should deliver it again"
+
+
 # Stores a map from slack event name to a list of callback functions
 EVENT_MAPPINGS = defaultdict(list)
 
+# Stores a map from slack event name to a list of callback functions called
+# for events in any channel, not just incident channels
+ANY_CHANNEL_EVENT_MAPPINGS = defaultdict(list)
 
-def slack_event(event, func=None):
+
+def slack_event(event, func=None, any_channel=False):
     """
     @slack_event is a decorator which registers a function as a handler
     for a particular slack_event (e.g. app_mention, pin_added, etc.)
 
     Arguments:
         event: Command to invoke this on
+        any_channel: Call the handler for events in any channel, with just
+            the event payload, rather than only for incident channels
 
     Example usage:
 
     @slack_event('pin_added')
-    def handle_pin_added(event_payload):
+    def handle_pin_added(incident, event_payload):
         do_some_stuff()
     """
 
     def _wrapper(fn):
-        EVENT_MAPPINGS[event].append(fn)
+        if any_channel:
+            ANY_CHANNEL_EVENT_MAPPINGS[event].append(fn)
+        else:
+            EVENT_MAPPINGS[event].append(fn)
         return fn
 
     if func:
@@ -33,6 +54,19 @@ def slack_event(event, func=None):
     return _wrapper
 
 
+def event_channel_id(event):
+    # events use either channel_id _or_ channel as the key (thanks Slack)
+    if "channel_id" in event:
+        return event["channel_id"]
+    elif "channel" in event:
+        # even better, on channel_rename events "channel" is actually a dict
+        # with an "id" key 😠
+        if isinstance(event["channel"], dict) and "id" in event["channel"]:
+            return event["channel"]["id"]
+        return event["channel"]
+    return None
+
+
 def handle_event(payload):
     """
     Handles slack event callbacks and routes the action to the correct event handler
@@ -52,28 +86,22 @@ def handle_event(payload):
         return
 
     # if it doesn't exist, error and return
-    if event_type not in EVENT_MAPPINGS:
+    if event_type not in EVENT_MAPPINGS and event_type not in ANY_CHANNEL_EVENT_MAPPINGS:
         logger.error(f"No handler found for event <{event_type}>")
         return
 
-    # events use either channel_id _or_ channel as the key (thanks Slack)
-    if "channel_id" in event:
-        channel_id = event["channel_id"]
-    elif "channel" in event:
-        # even better, on channel_rename events "channel" is actually a dict
-        # with an "id" key 😠
-        if isinstance(event["channel"], dict) and "id" in event["channel"]:
-            channel_id = event["channel"]["id"]
-        else:
-            channel_id = event["channel"]
-    else:
-        channel_id = None
+    for handler in ANY_CHANNEL_EVENT_MAPPINGS.get(event_type, ()):
+        logger.info(f"Calling handler for event type {event_type}")
+        handler(event)
+
+    if event_type not in EVENT_MAPPINGS:
+        return
+
+    channel_id = event_channel_id(event)
 
     # get the incident by the comms_channel_id
-    try:
-        comms_channel = CommsChannel.objects.get(channel_id=channel_id)
-        incident = comms_channel.incident
-    except CommsChannel.DoesNotExist:
+    incident = CommsChannel.objects.incident_for_channel(channel_id)
+    if incident is None:
         logger.error(f"Can't find incident associated with channel_id {channel_id}")
         return
 
@@ -83,3 +111,188 @@ def handle_event(payload):
             f"Calling handler for event type {event_type} for incident {incident.pk}"
         )
         handler(incident, payload["event"])
+
+
+class EventMetrics(object):
+    """
+    Counts and timings for the Slack events handled by this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.duplicates = 0
+        self.handled = 0
+        self.failed = 0
+        self.overflowed = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def record_received(self, duplicate=False):
+        with self._lock:
+            self.received += 1
+            self.duplicates += 1 if duplicate else 0
+
+    def record_overflow(self):
+        with self._lock:
+            self.overflowed += 1
+
+    def record_handled(self, latency, failed):
+        with self._lock:
+            self.handled += 1
+            self.failed += 1 if failed else 0
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self.total_latency += latency
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "duplicates": self.duplicates,
+                "handled": self.handled,
+                "failed": self.failed,
+                "overflowed": self.overflowed,
+                "last_latency_secs": self.last_latency,
+                "max_latency_secs": self.max_latency,
+                "avg_latency_secs": self.total_latency / self.handled
+                if self.handled
+                else None,
+            }
+
+
+class EventWorkers(object):
+    """
+    A fixed pool of threads handling Slack events off bounded queues.
+
+    Events are routed to a worker by channel, so events in the same channel
+    are handled one at a time in the order they arrived.
+    """
+
+    def __init__(self, metrics, workers=4, queue_size=1000):
+        self.metrics = metrics
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i, q in enumerate(self.queues):
+                thread = threading.Thread(
+                    target=self._work, args=(q,), name=f"slack-events-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, channel_id, payload, timeout=0):
+        """
+        Queues the event for its channel's worker, waiting up to timeout
+        seconds for space and returning False if the queue is still full
+        """
+        self._start()
+        index = zlib.crc32((channel_id or "").encode()) % len(self.queues)
+        try:
+            self.queues[index].put(
+                (payload, time.monotonic()), block=timeout > 0, timeout=timeout or None
+            )
+            return True
+        except queue.Full:
+            return False
+
+    def depth(self):
+        return sum(q.qsize() for q in self.queues)
+
+    def _work(self, q):
+        while True:
+            payload, received = q.get()
+            try:
+                _handle_and_record(payload, received, self.metrics)
+            finally:
+                close_old_connections()
+                q.task_done()
+
+    def join(self):
+        "Waits for every queued event to be handled"
+        for q in self.queues:
+            q.join()
+
+
+EVENT_METRICS = EventMetrics()
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def _get_workers():
+    global _workers
+
+    with _workers_lock:
+        if _workers is None:
+            _workers = EventWorkers(
+                EVENT_METRICS,
+                workers=getattr(settings, "RESPONSE_SLACK_EVENT_WORKERS", 4),
+                queue_size=getattr(settings, "RESPONSE_SLACK_EVENT_QUEUE_SIZE", 1000),
+            )
+        return _workers
+
+
+def _handle_and_record(payload, received, metrics):
+    failed = False
+    event_id = payload.get("event_id")
+    try:
+        handle_event(payload)
+    except Exception as e:
+        failed = True
+        logger.exception(f"Error handling Slack event {event_id}: {e}")
+        if event_id:
+            # let a redelivery of the event be handled
+            SlackEventReceipt.objects.forget(event_id)
+    finally:
+        metrics.record_handled(time.monotonic() - received, failed)
+
+
+def dispatch_event(payload):
+    """
+    Hands a Slack event callback to the event workers, so that the request
+    can be acknowledged straight away. Events Slack has already delivered
+    (matched by event_id) are dropped, returning False.
+
+    With RESPONSE_SLACK_EVENTS_ASYNC = False the event is handled before
+    returning instead.
+
+    If the channel's queue is still full after waiting
+    RESPONSE_SLACK_EVENT_QUEUE_WAIT_SECONDS, EventQueueFull is raised and the
+    event isn't recorded as received, so that Slack's retry is handled (in
+    order, as handling it now could overtake events already queued for the
+    channel). Events still queued when the process exits are lost.
+    """
+    event_id = payload.get("event_id")
+    if event_id and not SlackEventReceipt.objects.mark_seen(event_id):
+        logger.info(f"Ignoring Slack event {event_id}, it's already been received")
+        EVENT_METRICS.record_received(duplicate=True)
+        return False
+
+    EVENT_METRICS.record_received()
+
+    if not getattr(settings, "RESPONSE_SLACK_EVENTS_ASYNC", True):
+        _handle_and_record(payload, time.monotonic(), EVENT_METRICS)
+        return True
+
+    channel_id = event_channel_id(payload.get("event", {}))
+    timeout = getattr(settings, "RESPONSE_SLACK_EVENT_QUEUE_WAIT_SECONDS", 1)
+    if not _get_workers().submit(channel_id, payload, timeout=timeout):
+        logger.warning(f"Slack event queue is full, rejecting event {event_id}")
+        EVENT_METRICS.record_overflow()
+        if event_id:
+            SlackEventReceipt.objects.forget(event_id)
+        raise EventQueueFull(f"No room to queue Slack event {event_id}")
+    return True
+
+
+def get_event_metrics():
+    metrics = EVENT_METRICS.as_dict()
+    metrics["queue_depth"] = _workers.depth() if _workers else 0
+    return metrics
@@ -117,21 +117,23 @@ def handle_incident_command(command_name, message, thread_ts, channel_id, user_i
         )
         command = COMMAND_MAPPINGS[command_name]
 
+    incident = CommsChannel.objects.incident_for_channel(channel_id)
+    if incident is None:
+        logger.error("No matching incident found for this channel")
+        return
+
     try:
-        comms_channel = CommsChannel.objects.get(channel_id=channel_id)
-        handled, response = command(comms_channel.incident, user_id, message, respond)
+        handled, response = command(incident, user_id, message, respond)
 
         if thread_ts != None and not handled:
             react_not_ok(channel_id, thread_ts)
 
         if response:
             if thread_ts != None:
-                settings.SLACK_CLIENT.send_message(comms_channel.channel_id, response)
+                settings.SLACK_CLIENT.send_message(channel_id, response)
             elif respond != None:
                 respond(response)
 
-    except CommsChannel.DoesNotExist:
-        logger.error("No matching incident found for this channel")
     except Exception as e:
         logger.error(f"Error handling incident command {command_name} {message}: {e}")
         raise
@@ -1,5 +1,7 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from django.db.models import Q
 
 from response.core.models import Incident
 from response.slack.models.notification import Notification
@@ -20,6 +22,28 @@ class NotificationHandler(object):
     def __str__(self):
         return self.key
 
+    def is_exhausted(self, notification):
+        return notification.completed or (
+            self.max_notifications is not None
+            and notification.repeat_count >= self.max_notifications
+        )
+
+    def next_due(self, incident, notification):
+        """
+        Returns when this handler is next due for the incident, or None if
+        it has sent all the notifications it's going to send.
+        """
+        if notification is None:
+            # we've never sent a notification to this incident/handler pair,
+            # so wait until 'interval_mins' mins have elapsed from start
+            return incident.start_time + timedelta(minutes=self.interval_mins)
+
+        if self.is_exhausted(notification):
+            return None
+
+        # it's not exhausted its max_notifications, so wait 'interval_mins' before sending again
+        return notification.time + timedelta(minutes=self.interval_mins)
+
 
 def single_notification(initial_delay_mins=0, func=None):
     """
@@ -62,63 +86,105 @@ def recurring_notification(interval_mins, max_notifications=1):
     return _wrapper
 
 
+def _next_due_at(incident, notification):
+    """
+    The earliest time any handler sharing this notification's key is due again
+    """
+    due_times = [
+        handler.next_due(incident, notification)
+        for handler in NOTIFICATION_HANDLERS
+        if handler.key == notification.key
+    ]
+    due_times = [t for t in due_times if t is not None]
+    return min(due_times) if due_times else None
+
+
 def handle_notifications():
+    """
+    Calls every due notification handler for every open incident.
+
+    The notifications that are due (by their indexed next_due_at) are loaded
+    up front in a single query, along with the keys of the ones that aren't
+    yet, and written back in bulk once the handlers have run, so the number
+    of queries per tick doesn't grow with the number of open incidents.
+    """
+    now = datetime.now()
 
     # Only notify open incidents with a comms channel
-    open_incidents = Incident.objects.filter(
-        end_time__isnull=True, commschannel__incident__isnull=False
+    open_incidents = list(
+        Incident.objects.filter(
+            end_time__isnull=True, commschannel__incident__isnull=False
+        ).select_related("commschannel", "lead", "reporter")
+    )
+    if not open_incidents:
+        return
+
+    incident_ids = [incident.pk for incident in open_incidents]
+    # next_due_at is null for notifications that are exhausted (or predate
+    # it), which the handlers decide about below
+    notifications = {
+        (n.incident_id, n.key): n
+        for n in Notification.objects.filter(
+            Q(next_due_at__lte=now) | Q(next_due_at__isnull=True),
+            incident_id__in=incident_ids,
+        )
+    }
+    # the rest aren't due, but we need to know they exist so that their
+    # handlers aren't treated as never having been sent
+    not_due = set(
+        Notification.objects.filter(
+            incident_id__in=incident_ids, next_due_at__gt=now
+        ).values_list("incident_id", "key")
     )
 
+    to_create = {}
+    to_update = {}
+
     for incident in open_incidents:
         for handler in NOTIFICATION_HANDLERS:
+            # next_due_at is the earliest time any handler with this key is due,
+            # so if that's in the future there's nothing to do for this pair
+            if (incident.pk, handler.key) in not_due:
+                continue
+            notification = notifications.get((incident.pk, handler.key))
+            if (
+                notification is not None
+                and notification.next_due_at is not None
+                and notification.next_due_at > now
+            ):
+                continue
+
+            due = handler.next_due(incident, notification)
+            if due is None or due > now:
+                continue
+
             try:
-                # get the last sent notification for this incident/handler pair
-                notification = Notification.objects.get(
-                    incident=incident, key=handler.key
-                )
+                handler.callback(incident)
+            except Exception as e:
+                logger.error(f"Error calling notification handler {handler}: {e}")
 
-                # if we can find a previous notification for this incident/handler pair and
-                # it's been set to not repeat, exit here
-                if (
-                    (handler.max_notifications != None and notification.repeat_count >= handler.max_notifications) 
-                    or notification.completed
-                ):
-                    continue
-
-                # it's not exhausted its max_notifications, so wait 'interval_mins' before sending again
-                mins_since_last_notify = int(
-                    (datetime.now() - notification.time).total_seconds() / 60
-                )
-                if mins_since_last_notify >= handler.interval_mins:
-                    try:
-                        handler.callback(incident)
-                    except Exception as e:
-                        logger.error(
-                            f"Error calling notification handler {handler}: {e}"
-                        )
-
-                    notification.time = datetime.now()
-                    notification.repeat_count = notification.repeat_count + 1
-                    notification.save()
-
-            except Notification.DoesNotExist:
-                # we've never sent a notification to this incident/handler pair,
-                # so wait until 'interval_mins' mins have elapsed from start
-                mins_since_started = int(
-                    (datetime.now() - incident.start_time).total_seconds() / 60
+            if notification is None:
+                notification = Notification(
+                    incident=incident, key=handler.key, time=now, repeat_count=0
                 )
-                if mins_since_started >= handler.interval_mins:
-                    try:
-                        handler.callback(incident)
-                    except Exception as e:
-                        logger.error(
-                            f"Error calling notification handler {handler}: {e}"
-                        )
-
-                    notification = Notification(
-                        incident=incident,
-                        key=handler.key,
-                        time=datetime.now(),
-                        repeat_count=0,
-                    )
-                    notification.save()
+                notifications[(incident.pk, handler.key)] = notification
+                to_create[(incident.pk, handler.key)] = notification
+            else:
+                notification.time = now
+                notification.repeat_count = notification.repeat_count + 1
+                if notification.pk:
+                    to_update[notification.pk] = notification
+
+            notification.next_due_at = _next_due_at(incident, notification)
+
+    if to_create:
+        Notification.objects.bulk_create(to_create.values())
+    if to_update:
+        Notification.objects.bulk_update(
+            to_update.values(), ["time", "repeat_count", "next_due_at"]
+        )
+
+    logger.info(
+        f"Handled notifications for {len(open_incidents)} open incidents: "
+        f"{len(to_create)} new, {len(to_update)} repeated"
+    )
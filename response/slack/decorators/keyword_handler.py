@@ -1,4 +1,6 @@
 import logging
+import re
+import threading
 
 from response.core.models.incident import Incident
 from response.slack.models.comms_channel import CommsChannel
@@ -7,11 +9,37 @@ logger = logging.getLogger(__name__)
 
 KEYWORD_HANDLERS = {}
 
+# Keywords that only match whole words, rather than anywhere in the text
+WHOLE_WORD_KEYWORDS = set()
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def keyword_handler(keywords, func=None, whole_word=False):
+    """
+    @keyword_handler is a decorator which registers a function to be called
+    when any of the keywords appear in a message in an incident channel.
+    Keywords are matched case-insensitively anywhere in the text, or only as
+    whole words with whole_word=True.
+
+    Example usage:
+
+    @keyword_handler(['runbook', 'run book'])
+    def runbook_notification(comms_channel, user, keyword, text, ts):
+        do_some_stuff()
+    """
 
-def keyword_handler(keywords, func=None):
     def _wrapper(fn):
+        global _matcher
+
         for keyword in keywords:
             KEYWORD_HANDLERS[keyword] = fn
+            if whole_word:
+                WHOLE_WORD_KEYWORDS.add(keyword)
+            else:
+                WHOLE_WORD_KEYWORDS.discard(keyword)
+        _matcher = None
         return fn
 
     if func:
@@ -19,13 +47,54 @@ def keyword_handler(keywords, func=None):
     return _wrapper
 
 
+class KeywordMatcher(object):
+    """
+    Finds every registered keyword in a message. The text is lowercased once
+    and each keyword looked for with a substring test, and only whole-word
+    keywords that turn up are checked against their word boundary regex.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = [(keyword, keyword.lower()) for keyword in keywords]
+        self.whole_word = {
+            keyword: re.compile(rf"\b{re.escape(lowered)}\b")
+            for keyword, lowered in self.keywords
+            if keyword in WHOLE_WORD_KEYWORDS
+        }
+
+    def find(self, text):
+        "Returns the keywords in text, in the order they were registered"
+        text = text.lower()
+        found = []
+        for keyword, lowered in self.keywords:
+            if lowered not in text:
+                continue
+            pattern = self.whole_word.get(keyword)
+            if pattern is None or pattern.search(text):
+                found.append(keyword)
+        return found
+
+
+def _get_matcher():
+    global _matcher
+
+    with _matcher_lock:
+        if _matcher is None and KEYWORD_HANDLERS:
+            _matcher = KeywordMatcher(KEYWORD_HANDLERS.keys())
+        return _matcher
+
+
 def handle_keywords(incident: Incident, payload):
     text = payload.get("text", "")
     user = payload.get("user", "")
     ts = payload.get("ts", "")
 
+    matcher = _get_matcher()
+    keywords = matcher.find(text) if matcher and text else []
+    if not keywords:
+        return
+
     comms_channel = CommsChannel.objects.get(incident=incident)
 
-    for keyword, handler in KEYWORD_HANDLERS.items():
-        if keyword.lower() in text.lower():
-            handler(comms_channel, user, keyword, text, ts)
+    for keyword in keywords:
+        KEYWORD_HANDLERS[keyword](comms_channel, user, keyword, text, ts)
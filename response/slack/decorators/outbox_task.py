@@ -0,0 +1,218 @@
+import logging
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from response.slack.models.outbox_message import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Stores a map from task name to the function that performs it
+OUTBOX_TASKS = {}
+
+# Stores a map from task name to the function that combines the payloads of
+# two coalesced messages
+OUTBOX_MERGES = {}
+
+# Drains are queued on a single thread so that the request which enqueued
+# the message doesn't wait for Slack
+_dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+_kick_lock = threading.Lock()
+_kick_pending = False
+
+
+def outbox_task(name, func=None, merge=None):
+    """
+    @outbox_task is a decorator which registers a function as a Slack
+    side-effect that can be deferred with enqueue_outbox_task. The function's
+    arguments must be JSON serializable.
+
+    merge(old_payload, new_payload) is used to combine coalesced messages. If
+    it's not given, coalesced messages are simply dropped in favour of the
+    one already waiting.
+
+    Example usage:
+
+    @outbox_task('send_message')
+    def send_message(channel_id, text):
+        settings.SLACK_CLIENT.send_message(channel_id, text)
+    """
+
+    def _wrapper(fn):
+        OUTBOX_TASKS[name] = fn
+        if merge:
+            OUTBOX_MERGES[name] = merge
+        return fn
+
+    if func:
+        return _wrapper(func)
+    return _wrapper
+
+
+def enqueue_outbox_task(task, ordering_key, coalesce_key=None, **payload):
+    """
+    Records a Slack side-effect in the outbox, to be sent once the current
+    transaction commits. Tasks with the same ordering_key are sent in order.
+
+    Tasks given a coalesce_key are held back for RESPONSE_SLACK_COALESCE_SECONDS,
+    and any others with the same key enqueued in that time are folded into
+    them, so a burst of saves results in a single Slack call.
+
+    With RESPONSE_SLACK_OUTBOX_ASYNC = False the task runs immediately instead.
+    """
+    if task not in OUTBOX_TASKS:
+        raise ValueError(f"Unknown outbox task {task}")
+
+    if not getattr(settings, "RESPONSE_SLACK_OUTBOX_ASYNC", True):
+        OUTBOX_TASKS[task](**payload)
+        return None
+
+    if coalesce_key is None:
+        message = OutboxMessage.objects.enqueue(task, ordering_key, payload)
+        transaction.on_commit(kick_outbox)
+        return message
+
+    delay = getattr(settings, "RESPONSE_SLACK_COALESCE_SECONDS", 2)
+    message = OutboxMessage.objects.coalesce(
+        task,
+        ordering_key,
+        coalesce_key,
+        payload,
+        merge=OUTBOX_MERGES.get(task),
+        delay_seconds=delay,
+    )
+    transaction.on_commit(partial(kick_outbox, delay=delay))
+    return message
+
+
+def kick_outbox(delay=None):
+    """
+    Schedules a drain of the outbox on the background dispatcher thread,
+    optionally after a delay in seconds
+    """
+    global _kick_pending
+
+    if delay:
+        timer = threading.Timer(delay, kick_outbox)
+        timer.daemon = True
+        timer.start()
+        return
+
+    with _kick_lock:
+        if _kick_pending:
+            return
+        _kick_pending = True
+
+    _dispatcher.submit(_drain_after_kick)
+
+
+def _drain_after_kick():
+    global _kick_pending
+
+    with _kick_lock:
+        _kick_pending = False
+
+    try:
+        handle_outbox()
+    except Exception as e:
+        logger.exception(f"Error draining Slack outbox: {e}")
+    finally:
+        close_old_connections()
+
+
+def _retry_backoff_seconds(attempts):
+    return min(2 ** attempts, 300)
+
+
+def _send_batch(messages):
+    """
+    Sends a run of messages for a single ordering key, stopping at the first
+    failure so later messages don't overtake it.
+    """
+    lease_seconds = getattr(settings, "RESPONSE_SLACK_OUTBOX_LEASE_SECONDS", 60)
+    max_attempts = getattr(settings, "RESPONSE_SLACK_OUTBOX_MAX_ATTEMPTS", 5)
+    sent = 0
+
+    try:
+        for message in messages:
+            if not message.claim(lease_seconds):
+                break
+
+            try:
+                if message.task not in OUTBOX_TASKS:
+                    raise ValueError(f"Unknown outbox task {message.task}")
+                OUTBOX_TASKS[message.task](**message.payload)
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)
+                message.locked_until = None
+                if message.attempts >= max_attempts:
+                    logger.error(
+                        f"Giving up on outbox message {message.pk} ({message.task} to {message.ordering_key}) after {message.attempts} attempts: {e}"
+                    )
+                    message.status = OutboxMessage.FAILED
+                else:
+                    backoff = _retry_backoff_seconds(message.attempts)
+                    logger.warning(
+                        f"Outbox message {message.pk} ({message.task} to {message.ordering_key}) failed, retrying in {backoff}s: {e}"
+                    )
+                    message.status = OutboxMessage.PENDING
+                    message.next_attempt_at = datetime.now() + timedelta(
+                        seconds=backoff
+                    )
+                message.save()
+
+                if message.status == OutboxMessage.PENDING:
+                    break
+                continue
+
+            message.delete()
+            sent += 1
+    finally:
+        close_old_connections()
+
+    return sent
+
+
+def handle_outbox(limit=500):
+    """
+    Sends the due messages in the outbox, returning how many were sent.
+
+    Messages are grouped by ordering key and each group is sent in order by
+    one worker, with groups spread over a pool of
+    RESPONSE_SLACK_OUTBOX_WORKERS threads.
+    """
+    now = datetime.now()
+
+    groups = OrderedDict()
+    for message in OutboxMessage.objects.pending()[:limit]:
+        groups.setdefault(message.ordering_key, []).append(message)
+
+    batches = []
+    for messages in groups.values():
+        batch = []
+        for message in messages:
+            # stop at the first message that can't go yet, so that nothing
+            # overtakes it
+            if message.is_locked(now) or message.next_attempt_at > now:
+                break
+            batch.append(message)
+        if batch:
+            batches.append(batch)
+
+    if not batches:
+        return 0
+
+    max_workers = min(
+        getattr(settings, "RESPONSE_SLACK_OUTBOX_WORKERS", 4), len(batches)
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        sent = sum(pool.map(_send_batch, batches))
+
+    logger.info(f"Sent {sent} Slack outbox messages")
+    return sent
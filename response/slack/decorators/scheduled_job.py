@@ -0,0 +1,43 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Stores a map from job id to the job function and its APScheduler trigger args
+SCHEDULED_JOBS = {}
+
+
+class ScheduledJob(object):
+    def __init__(self, job_id, callback, trigger, trigger_args):
+        self.job_id = job_id
+        self.callback = callback
+        self.trigger = trigger
+        self.trigger_args = trigger_args
+
+    def __str__(self):
+        return self.job_id
+
+
+def scheduled_job(job_id, trigger, func=None, **trigger_args):
+    """
+    @scheduled_job is a decorator which registers a function to be run
+    periodically by the built-in scheduler (see response.slack.scheduler)
+
+    Arguments:
+        job_id: Unique name for the job
+        trigger: APScheduler trigger type, e.g. 'interval' or 'cron'
+        trigger_args: Arguments for the trigger, e.g. minutes=1
+
+    Example usage:
+
+    @scheduled_job('tidy_up', 'cron', hour=3)
+    def tidy_up():
+        do_some_stuff()
+    """
+
+    def _wrapper(fn):
+        SCHEDULED_JOBS[job_id] = ScheduledJob(job_id, fn, trigger, trigger_args)
+        return fn
+
+    if func:
+        return _wrapper(func)
+    return _wrapper
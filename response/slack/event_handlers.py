@@ -3,12 +3,13 @@ import logging
 import re
 
 from response.core.models.incident import Incident
+from response.slack.cache import usergroup_cache
 from response.slack.decorators import (
     handle_incident_command,
     handle_keywords,
     slack_event,
 )
-from response.slack.models import CommsChannel, PinnedMessage, UserStats
+from response.slack.models import CommsChannel, PinnedMessage, SlackChannel, UserStats
 
 logger = logging.getLogger(__name__)
 
@@ -131,3 +132,47 @@ def handle_channel_rename(incident, payload):
     comms_channel = CommsChannel.objects.get(incident=incident)
     comms_channel.channel_name = new_name
     comms_channel.save()
+
+
+# Keep the channel directory up to date, so channels can be found by name
+# without asking Slack
+
+
+@slack_event("channel_created", any_channel=True)
+@slack_event("channel_rename", any_channel=True)
+def record_channel_name(payload):
+    channel = payload["channel"]
+    SlackChannel.objects.rename(channel["id"], channel["name"])
+
+
+@slack_event("channel_archive", any_channel=True)
+def record_channel_archived(payload):
+    SlackChannel.objects.set_archived(payload["channel"], True)
+
+
+@slack_event("channel_unarchive", any_channel=True)
+def record_channel_unarchived(payload):
+    SlackChannel.objects.set_archived(payload["channel"], False)
+
+
+@slack_event("channel_deleted", any_channel=True)
+def forget_channel(payload):
+    SlackChannel.objects.remove(payload["channel"])
+
+
+# Keep the cached usergroups up to date between refreshes
+
+
+@slack_event("subteam_created", any_channel=True)
+@slack_event("subteam_updated", any_channel=True)
+def record_usergroup(payload):
+    usergroup_cache.update(payload["subteam"])
+
+
+@slack_event("subteam_members_changed", any_channel=True)
+def record_usergroup_members(payload):
+    usergroup_cache.update_members(
+        payload["subteam_id"],
+        added=payload.get("added_users", []),
+        removed=payload.get("removed_users", []),
+    )
@@ -1,7 +1,11 @@
 import logging
 from datetime import datetime
+from urllib.parse import urljoin
 
-from response.core.models import Action, ExternalUser, Incident
+from django.conf import settings
+from django.urls import reverse
+
+from response.core.models import Action, ExternalUser, Incident, SearchDocument
 from response.slack.block_kit import Actions, Button, Message, Section, Text
 from response.slack.cache import get_user_profile
 from response.slack.client import SlackError
@@ -38,7 +42,7 @@ def set_incident_lead(incident: Incident, user_id: str, message: str, respond):
     incident.updated_by = updated_by
     incident.lead = user
     
-    incident.save()
+    incident.save_dirty()
     return True, None
 
 
@@ -54,7 +58,7 @@ def set_severity(incident: Incident, user_id: str, message: str, respond):
         # look for sev name (e.g. critical) or sev id (1)
         if (sev_name in message.lower()) or (sev_id in message.lower()):
             incident.severity = sev_id
-            incident.save()
+            incident.save_dirty()
             return True, None
 
     return False, None
@@ -118,7 +122,7 @@ def close_incident(incident: Incident, user_id: str, message: str, respond):
         return True, None
 
     incident.end_time = datetime.now()
-    incident.save()
+    incident.save_dirty()
 
     #comms_channel.post_in_channel("This incident has been closed! 📖 ⟶ 📕")
     
@@ -192,6 +196,41 @@ def set_action(incident: Incident, user_id: str, message: str, respond):
 
     return True, None
 
+@__default_incident_command(
+    ["search"], helptext="Search past incidents, e.g. `search database failover`"
+)
+def search_incidents(incident: Incident, user_id: str, message: str, respond):
+    if not message.strip():
+        return False, "What should I search for?"
+
+    # show the best match from each of the top few incidents
+    best_matches = {}
+    for document in SearchDocument.objects.search(message, limit=50):
+        best_matches.setdefault(document.incident_id, document)
+        if len(best_matches) == 5:
+            break
+
+    if best_matches:
+        text = f"Incidents matching _{message}_:\n"
+        for document in best_matches.values():
+            doc_url = urljoin(
+                settings.SITE_URL,
+                reverse("incident_doc", kwargs={"incident_id": document.incident_id}),
+            )
+            snippet = document.text if len(document.text) <= 100 else document.text[:100] + "…"
+            text += f"• <{doc_url}|Incident {document.incident_id}: {document.incident.name}> - {snippet}\n"
+    else:
+        text = f"I couldn't find any incidents matching _{message}_"
+
+    if respond != None:
+        respond(text)
+    else:
+        comms_channel = CommsChannel.objects.get(incident=incident)
+        comms_channel.post_in_channel(text)
+
+    return True, None
+
+
 # TODO: decide if needed
 #@keyword_handler(['runbook', 'run book'])
 #def runbook_notification(comms_channel: CommsChannel, user: str, keyword: str, text: str, ts: str):
@@ -17,7 +17,7 @@ SHARE_UPDATE_BUTTON = "share-update-button"
 @single_notification()
 def remind_incident_lead(incident: Incident):
     try:
-        comms_channel = CommsChannel.objects.get(incident=incident)
+        comms_channel = incident.commschannel
         if not incident.lead:
             msg = Message()
 
@@ -36,7 +36,7 @@ def remind_incident_lead(incident: Incident):
 @single_notification()
 def remind_incident_summary(incident: Incident):
     try:
-        comms_channel = CommsChannel.objects.get(incident=incident)
+        comms_channel = incident.commschannel
         if not incident.summary:
             msg = Message()
 
@@ -63,7 +63,7 @@ def remind_close_incident(incident: Incident):
         return
 
     try:
-        comms_channel = CommsChannel.objects.get(incident=incident)
+        comms_channel = incident.commschannel
         if not incident.is_closed():
             user_to_notify = incident.lead or incident.reporter
             comms_channel.post_in_channel(
@@ -75,7 +75,7 @@ def remind_close_incident(incident: Incident):
 @recurring_notification(interval_mins=1, max_notifications=None)
 def remind_share_update(incident: Incident):
     try:
-        comms_channel = CommsChannel.objects.get(incident=incident)
+        comms_channel = incident.commschannel
         if incident.is_closed() or incident.status_update_next is None:
             return
         else:
@@ -95,6 +95,6 @@ def remind_share_update(incident: Incident):
 
         msg.send(comms_channel.channel_id)
         incident.status_update_next = None
-        incident.save()
+        incident.save_dirty()
     except CommsChannel.DoesNotExist:
         pass
\ No newline at end of file
@@ -10,6 +10,7 @@ from response.slack.decorators.headline_post_action import SLACK_HEADLINE_POST_A
 from response.slack.modal_builder import Modal, Section
 from response.slack.models.comms_channel import CommsChannel
 from response.slack.models.headline_post import HeadlinePost
+from response.slack.pipeline import Pipeline
 from response.slack.reference_utils import user_reference
 from response.slack.settings import INCIDENT_CREATE_MODAL, INCIDENT_CREATED_MODAL, INCIDENT_EDIT_MODAL, SHARE_UPDATE_MODAL, UPDATE_SUMMARY_MODAL
 
@@ -51,13 +52,81 @@ def create_incident(
         private=private
     )
 
-    comms_channel = CommsChannel.objects.create_comms_channel(incident, private)
+    create_incident_pipeline(incident, trigger_id).run()
 
+
+def create_incident_pipeline(incident, trigger_id):
+    """
+    The Slack side of creating an incident. Everything but the channel
+    itself only needs the channel to exist, so it's all done at once.
+    """
+    pipeline = Pipeline(f"create incident {incident.pk}")
+
+    def channel_id(results):
+        return results["channel"].channel_id
+
+    pipeline.add(
+        "channel",
+        lambda results: CommsChannel.objects.create_comms_channel(
+            incident, incident.private, invite_reporter=False
+        ),
+    )
+    pipeline.add(
+        "invite_reporter",
+        lambda results: CommsChannel.objects.invite_reporter(
+            incident, channel_id(results)
+        ),
+        requires=["channel"],
+    )
+    pipeline.add(
+        "created_modal",
+        lambda results: _send_created_modal(channel_id(results), trigger_id),
+        requires=["channel"],
+        optional=True,
+    )
+    pipeline.add(
+        "topic",
+        lambda results: CommsChannel.objects.set_comms_channel_topic(
+            incident, channel_id(results)
+        ),
+        requires=["channel"],
+    )
+    pipeline.add(
+        "homepage_bookmark",
+        lambda results: CommsChannel.objects.add_homepage_bookmark(
+            incident, channel_id(results)
+        ),
+        requires=["channel"],
+    )
+    pipeline.add(
+        "status_bookmarks",
+        lambda results: CommsChannel.objects.update_bookmarks_in_comms_channel(
+            incident, channel_id(results)
+        ),
+        requires=["channel"],
+    )
+    if not incident.private:
+        pipeline.add(
+            "headline_post",
+            lambda results: HeadlinePost.objects.create_headline_post(
+                incident, comms_channel=results["channel"]
+            ),
+            requires=["channel"],
+        )
+    pipeline.add(
+        "create_message",
+        lambda results: _send_create_message(incident, channel_id(results)),
+        requires=["channel"],
+    )
+    return pipeline
+
+
+def _send_created_modal(channel_id, trigger_id):
     modal = Modal(
         title=f"Incident created",
         blocks=[
             Section(
-                text=f"Incident has been created 🚨\n\nInvite people into <#{comms_channel.channel_id}> to help manage this incident"
+                text=f"Incident has been created 🚨\n\nInvite people into <#{channel_id}> to help manage this incident"
             )
         ]
     )
@@ -65,20 +134,7 @@ def create_incident(
     try:
         modal.send_open_modal(INCIDENT_CREATED_MODAL, trigger_id=trigger_id)
     except SlackError as e:
-        logger.error(f"Failed to send open modal for {incident_name}. Error: {e}")
-    
-    CommsChannel.objects.enrich_comms_channel(incident=incident,channel_id=comms_channel.channel_id)
-    CommsChannel.objects.update_bookmarks_in_comms_channel(incident=incident,channel_id=comms_channel.channel_id)
-    
-    if(incident.private):
-        _send_create_message(incident)
-        return
-    
-    headline_post = HeadlinePost.objects.create_headline_post(incident=incident)
-    headline_post.comms_channel = comms_channel
-    headline_post.save()
-
-    _send_create_message(incident)
+        logger.error(f"Failed to send open modal for channel {channel_id}. Error: {e}")
 
 @modal_handler(INCIDENT_EDIT_MODAL)
 def edit_incident(
@@ -117,7 +173,7 @@ def edit_incident(
         incident.lead = lead
         incident.severity = severity
         incident.updated_by = updated_by
-        incident.save()
+        incident.save_dirty()
 
     except Incident.DoesNotExist:
         logger.error(f"No incident found for pk {state}")
@@ -136,7 +192,7 @@ def update_summary(
     incident.updated_by = updated_by
 
     incident.summary = summary
-    incident.save()
+    incident.save_dirty()
 
 @modal_handler(SHARE_UPDATE_MODAL)
 def share_update(
@@ -156,10 +212,10 @@ def share_update(
     incident.status_update_last = datetime.utcnow()
     incident.status_update_next = next_update
 
-    incident.save()
+    incident.save_dirty()
 
 
-def _send_create_message(incident):
+def _send_create_message(incident, channel_id):
     from response.slack.block_kit import Header, Message, Section, Text, Actions
     msg = Message()
 
@@ -187,7 +243,7 @@ def _send_create_message(incident):
         msg.add_block(actions)
 
     try:
-        response = msg.send(incident.comms_channel().channel_id)
-        msg.pin(incident.comms_channel().channel_id, response["ts"])
+        response = msg.send(channel_id)
+        msg.pin(channel_id, response["ts"])
     except SlackError as e:
-        logger.error(f"Failed to update channel message in {incident.comms_channel()}. Error: {e}")
\ No newline at end of file
+        logger.error(f"Failed to update channel message in {channel_id}. Error: {e}")
\ No newline at end of file
@@ -1,7 +1,23 @@
 from .comms_channel import CommsChannel
 from .headline_post import HeadlinePost
 from .notification import Notification
+from .outbox_message import OutboxMessage
 from .pinned_message import PinnedMessage
+from .scheduled_job_metrics import ScheduledJobMetrics
+from .scheduler_lock import SchedulerLock
+from .slack_channel import SlackChannel
+from .slack_event_receipt import SlackEventReceipt
 from .user_stats import UserStats
 
-__all__ = ("CommsChannel", "HeadlinePost", "Notification", "PinnedMessage", "UserStats")
+__all__ = (
+    "CommsChannel",
+    "HeadlinePost",
+    "Notification",
+    "OutboxMessage",
+    "PinnedMessage",
+    "ScheduledJobMetrics",
+    "SchedulerLock",
+    "SlackChannel",
+    "SlackEventReceipt",
+    "UserStats",
+)
@@ -1,4 +1,7 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from urllib.parse import urljoin
 
@@ -11,9 +14,75 @@ from response.slack.client import SlackError
 
 logger = logging.getLogger(__name__)
 
+# Incident primary keys by comms channel ID, so that routing a Slack payload
+# to its incident doesn't need the database. Channels that aren't incident
+# channels are cached as None, and expire so that other processes notice
+# when they become one.
+_incident_pks = OrderedDict()
+_incident_pks_lock = threading.Lock()
+CHANNEL_ROUTE_CACHE_SIZE = 10000
+
+
+def forget_comms_channels(channel_ids=None):
+    "Drops channels from the routing cache, or all of them if none are given"
+    with _incident_pks_lock:
+        if channel_ids is None:
+            _incident_pks.clear()
+        for channel_id in channel_ids or ():
+            _incident_pks.pop(channel_id, None)
+
 
 class CommsChannelManager(models.Manager):
-    def create_comms_channel(self, incident: Incident, private: bool):
+    def incident_id_for_channel(self, channel_id):
+        """
+        Returns the primary key of the incident whose comms channel is
+        channel_id, or None if it isn't an incident channel
+        """
+        now = time.monotonic()
+        with _incident_pks_lock:
+            if channel_id in _incident_pks:
+                incident_pk, expires_at = _incident_pks[channel_id]
+                if expires_at is None or expires_at > now:
+                    _incident_pks.move_to_end(channel_id)
+                    return incident_pk
+
+        incident_pk = (
+            self.filter(channel_id=channel_id)
+            .values_list("incident_id", flat=True)
+            .first()
+        )
+
+        expires_at = None
+        if incident_pk is None:
+            expires_at = now + getattr(
+                settings, "RESPONSE_CHANNEL_ROUTE_NEGATIVE_SECONDS", 60
+            )
+        with _incident_pks_lock:
+            _incident_pks[channel_id] = (incident_pk, expires_at)
+            _incident_pks.move_to_end(channel_id)
+            while len(_incident_pks) > CHANNEL_ROUTE_CACHE_SIZE:
+                _incident_pks.popitem(last=False)
+        return incident_pk
+
+    def incident_for_channel(self, channel_id):
+        """
+        Returns the incident whose comms channel is channel_id, or None if it
+        isn't an incident channel
+        """
+        incident_pk = self.incident_id_for_channel(channel_id)
+        if incident_pk is None:
+            return None
+
+        try:
+            return Incident.objects.get(pk=incident_pk)
+        except Incident.DoesNotExist:
+            # deleted by another process since we cached it
+            forget_comms_channels([channel_id])
+            return None
+
+    def create_comms_channel(
+        self, incident: Incident, private: bool, invite_reporter: bool = True
+    ):
         """
         Creates a comms channel in slack, and saves a reference to it in the DB
         """
@@ -32,6 +101,12 @@ class CommsChannelManager(models.Manager):
             incident=incident, channel_id=channel_id, channel_name=name
         )
 
+        if invite_reporter:
+            self.invite_reporter(incident, channel_id)
+
+        return comms_channel
+
+    def invite_reporter(self, incident: Incident, channel_id):
         try:
             logger.info(f"Joining channel {channel_id}")
             settings.SLACK_CLIENT.invite_user_to_channel(incident.reporter.external_id, channel_id)
@@ -40,10 +115,11 @@ class CommsChannelManager(models.Manager):
                 logger.error(f"Failed to join comms channel {e}")
                 raise
 
-        
-        return comms_channel
-
     def enrich_comms_channel(self, incident: Incident, channel_id):
+        self.set_comms_channel_topic(incident, channel_id)
+        self.add_homepage_bookmark(incident, channel_id)
+
+    def set_comms_channel_topic(self, incident: Incident, channel_id):
         try:
             settings.SLACK_CLIENT.set_channel_topic(
                 channel_id, f"INCIDENT-{incident.pk}"
@@ -52,6 +128,7 @@ class CommsChannelManager(models.Manager):
             logger.error(f"Failed to set channel topic {e}")
             raise
 
+    def add_homepage_bookmark(self, incident: Incident, channel_id):
         try:
             doc_url = urljoin(
                 settings.SITE_URL,
@@ -67,7 +144,6 @@ class CommsChannelManager(models.Manager):
     
     def update_bookmarks_in_comms_channel(self, incident: Incident, channel_id):
         try:
-            bookmarks = settings.SLACK_CLIENT.list_channel_bookmarks(channel_id)
             severity = incident.severity_text().upper()
             status = incident.status_text().upper()
             lead = (
@@ -75,36 +151,33 @@ class CommsChannelManager(models.Manager):
                 if incident.lead
                 else "Unassigned"
             )
+            doc_url = urljoin(
+                settings.SITE_URL,
+                reverse("incident_doc", kwargs={"incident_id": incident.pk}),
+            )
 
-            self._add_or_update_bookmarks(incident, bookmarks, channel_id, "Severity", severity, ":fire:")
-            self._add_or_update_bookmarks(incident, bookmarks, channel_id, "Status", status, ":pager:")
-            self._add_or_update_bookmarks(incident, bookmarks, channel_id, "Lead", lead, ":firefighter:")
+            settings.SLACK_CLIENT.sync_channel_bookmarks(
+                channel_id,
+                [
+                    {"prefix": f"{key}:", "title": f"{key}: {text}", "link": doc_url, "emoji": emoji}
+                    for key, text, emoji in (
+                        ("Severity", severity, ":fire:"),
+                        ("Status", status, ":pager:"),
+                        ("Lead", lead, ":firefighter:"),
+                    )
+                ],
+            )
 
         except SlackError as e:
             logger.error(f"Failed to add channel bookmark {e}")
             raise
 
-    def _add_or_update_bookmarks(self, incident, bookmarks, channel_id, key, text, emoji):
-        bookmark = next((item for item in bookmarks if item['title'].startswith(key + ":")), None)
-        doc_url = urljoin(
-                settings.SITE_URL,
-                reverse("incident_doc", kwargs={"incident_id": incident.pk}),
-            )
-        if bookmark:
-            bookmark_id = bookmark['id']
-            settings.SLACK_CLIENT.edit_channel_bookmark(
-                channel_id, bookmark_id, f"{key}: {text}", "link", doc_url, emoji
-            )
-        else:
-            settings.SLACK_CLIENT.add_channel_bookmark(
-                channel_id, f"{key}: {text}", "link", doc_url, emoji
-            )    
 
 class CommsChannel(models.Model):
 
     objects = CommsChannelManager()
     incident = models.OneToOneField(Incident, on_delete=models.CASCADE)
-    channel_id = models.CharField(max_length=20, null=False)
+    channel_id = models.CharField(max_length=20, null=False, db_index=True)
     channel_name = models.CharField(max_length=80, null=False)
 
     def post_in_channel(self, message: str):
@@ -19,8 +19,8 @@ logger = logging.getLogger(__name__)
 
 
 class HeadlinePostManager(models.Manager):
-    def create_headline_post(self, incident):
-        headline_post = self.create(incident=incident)
+    def create_headline_post(self, incident, comms_channel=None):
+        headline_post = self.create(incident=incident, comms_channel=comms_channel)
         headline_post.update_main_in_slack()
         return headline_post
 
@@ -9,6 +9,7 @@ class Notification(models.Model):
     time = models.DateTimeField()
     repeat_count = models.IntegerField(default=0)
     completed = models.BooleanField(default=False)
+    next_due_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         unique_together = ("incident", "key")
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+from django.db import models
+from jsonfield import JSONField
+
+
+class OutboxMessageManager(models.Manager):
+    def enqueue(self, task, ordering_key, payload, coalesce_key=None, delay_seconds=0):
+        return self.create(
+            task=task,
+            ordering_key=ordering_key,
+            coalesce_key=coalesce_key,
+            payload=payload,
+            next_attempt_at=datetime.now() + timedelta(seconds=delay_seconds),
+        )
+
+    def coalesce(
+        self, task, ordering_key, coalesce_key, payload, merge=None, delay_seconds=0
+    ):
+        """
+        Folds a message into one with the same coalesce key that hasn't been
+        picked up yet, or enqueues it to be sent after delay_seconds if there
+        isn't one. merge(old_payload, new_payload) gives the payload of the
+        combined message; by default the existing payload is kept.
+
+        Messages are only folded into the last one waiting for their ordering
+        key, so they're never sent ahead of something enqueued before them.
+        """
+        for pending in self.filter(
+            ordering_key=ordering_key,
+            status__in=(OutboxMessage.PENDING, OutboxMessage.SENDING),
+        ).order_by("-pk")[:1]:
+            if (
+                pending.coalesce_key != coalesce_key
+                or pending.status != OutboxMessage.PENDING
+            ):
+                break
+
+            if merge is None:
+                return pending
+
+            merged = merge(pending.payload, payload)
+            # only merge while it's still pending: once a worker has claimed
+            # the message it may already have been sent
+            if self.filter(pk=pending.pk, status=OutboxMessage.PENDING).update(
+                payload=merged
+            ):
+                pending.payload = merged
+                return pending
+
+        return self.enqueue(
+            task, ordering_key, payload, coalesce_key, delay_seconds=delay_seconds
+        )
+
+    def pending(self):
+        "Messages waiting to be sent (or being sent), oldest first"
+        return self.filter(
+            status__in=(OutboxMessage.PENDING, OutboxMessage.SENDING)
+        ).order_by("pk")
+
+
+class OutboxMessage(models.Model):
+    """
+    A Slack side-effect (e.g. posting a message or updating the headline post)
+    waiting to be sent by the outbox workers.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    FAILED = "failed"
+    STATUSES = ((PENDING, "Pending"), (SENDING, "Sending"), (FAILED, "Failed"))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    task = models.CharField(max_length=50)
+    # Messages with the same ordering key (usually a Slack channel id) are
+    # sent one at a time, in the order they were enqueued
+    ordering_key = models.CharField(max_length=50)
+    payload = JSONField(default=dict)
+    # Pending messages with the same coalesce key are folded into one
+    coalesce_key = models.CharField(max_length=100, blank=True, null=True)
+
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+
+    objects = OutboxMessageManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["coalesce_key", "status"]),
+            models.Index(fields=["ordering_key", "status"]),
+        ]
+
+    def claim(self, lease_seconds):
+        """
+        Marks this message as being sent, returning False if another worker
+        got to it first.
+        """
+        locked_until = datetime.now() + timedelta(seconds=lease_seconds)
+        claimed = OutboxMessage.objects.filter(
+            pk=self.pk, status=self.status, attempts=self.attempts
+        ).update(status=self.SENDING, locked_until=locked_until)
+        if claimed:
+            self.status = self.SENDING
+            self.locked_until = locked_until
+            if self.coalesce_key:
+                # pick up anything merged in since this message was loaded
+                self.refresh_from_db(fields=["payload"])
+        return bool(claimed)
+
+    def is_locked(self, now):
+        return self.status == self.SENDING and self.locked_until > now
+
+    def __str__(self):
+        return f"{self.task} -> {self.ordering_key} ({self.status})"
@@ -0,0 +1,75 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+
+class ScheduledJobMetricsManager(models.Manager):
+    def _increment(self, job_id, **updates):
+        if self.filter(job_id=job_id).update(**updates):
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(job_id=job_id)
+        except IntegrityError:
+            # another replica created it first
+            pass
+        self.filter(job_id=job_id).update(**updates)
+
+    def record_run(self, job_id, scheduler_id, started, duration, failed):
+        self._increment(
+            job_id,
+            runs=F("runs") + 1,
+            failures=F("failures") + (1 if failed else 0),
+            last_scheduler=scheduler_id,
+            last_started=started,
+            last_duration=duration,
+            max_duration=Greatest(
+                F("max_duration"), Value(duration, output_field=models.FloatField())
+            ),
+            total_duration=F("total_duration") + duration,
+        )
+
+    def record_skip(self, job_id):
+        self._increment(job_id, skipped=F("skipped") + 1)
+
+
+class ScheduledJobMetrics(models.Model):
+    """
+    Runtime statistics for a scheduled job, shared by every process running
+    the scheduler so they can be reported from any of them
+    """
+
+    job_id = models.CharField(max_length=50, unique=True)
+    runs = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    last_scheduler = models.CharField(max_length=100, blank=True)
+    last_started = models.DateTimeField(null=True, blank=True)
+    last_duration = models.FloatField(null=True, blank=True)
+    max_duration = models.FloatField(default=0.0)
+    total_duration = models.FloatField(default=0.0)
+
+    objects = ScheduledJobMetricsManager()
+
+    class Meta:
+        verbose_name_plural = "scheduled job metrics"
+
+    def __str__(self):
+        return self.job_id
+
+    def as_dict(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_scheduler": self.last_scheduler or None,
+            "last_started": self.last_started.isoformat()
+            if self.last_started
+            else None,
+            "last_duration_secs": self.last_duration,
+            "max_duration_secs": self.max_duration,
+            "avg_duration_secs": self.total_duration / self.runs
+            if self.runs
+            else None,
+        }
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+
+
+class SchedulerLockManager(models.Manager):
+    def acquire(self, name, owner, ttl_seconds):
+        """
+        Takes (or renews) the named lock for owner, returning whether it's held.
+
+        The lock is a lease: it's only handed to a new owner once the current
+        holder has failed to renew it for ttl_seconds.
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        renewed = (
+            self.filter(name=name)
+            .filter(Q(owner=owner) | Q(expires_at__lt=now))
+            .update(owner=owner, expires_at=expires_at)
+        )
+        if renewed:
+            return True
+
+        try:
+            with transaction.atomic():
+                self.create(name=name, owner=owner, expires_at=expires_at)
+            return True
+        except IntegrityError:
+            # someone else holds the lock
+            return False
+
+    def release(self, name, owner):
+        self.filter(name=name, owner=owner).delete()
+
+
+class SchedulerLock(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    objects = SchedulerLockManager()
+
+    def __str__(self):
+        return f"{self.name} - {self.owner}"
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from django.db import models
+
+
+class SlackChannelManager(models.Manager):
+    def lookup(self, name):
+        """
+        Returns (channel_id, is_archived) for the channel called name, or None
+        if we don't know of one
+        """
+        return (
+            self.filter(name=name)
+            .order_by("is_archived", "-updated_at")
+            .values_list("channel_id", "is_archived")
+            .first()
+        )
+
+    def record(self, channels):
+        """
+        Adds or updates channels from the Slack API, given as dicts with id,
+        name and (optionally) is_archived keys
+        """
+        now = datetime.now()
+        rows = {
+            channel["id"]: SlackChannel(
+                channel_id=channel["id"],
+                name=channel["name"],
+                is_archived=channel.get("is_archived", False),
+                updated_at=now,
+            )
+            for channel in channels
+        }
+        if not rows:
+            return
+
+        self.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=["channel_id"],
+            update_fields=["name", "is_archived", "updated_at"],
+        )
+
+    def rename(self, channel_id, name):
+        updated = self.filter(channel_id=channel_id).update(
+            name=name, updated_at=datetime.now()
+        )
+        if not updated:
+            self.record([{"id": channel_id, "name": name}])
+
+    def set_archived(self, channel_id, is_archived):
+        self.filter(channel_id=channel_id).update(
+            is_archived=is_archived, updated_at=datetime.now()
+        )
+
+    def remove(self, channel_id):
+        self.filter(channel_id=channel_id).delete()
+
+
+class SlackChannel(models.Model):
+    """
+    The names of the Slack channels we've seen, so that finding a channel by
+    name doesn't mean paging through every channel in the workspace. Kept up
+    to date from channel events and the pages of channels we do fetch.
+    """
+
+    channel_id = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=80, db_index=True)
+    is_archived = models.BooleanField(default=False)
+    updated_at = models.DateTimeField()
+
+    objects = SlackChannelManager()
+
+    def __str__(self):
+        return self.name
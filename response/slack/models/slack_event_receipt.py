@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+
+
+class SlackEventReceiptManager(models.Manager):
+    def mark_seen(self, event_id):
+        """
+        Records that the event has been received, returning False if it
+        already had been (i.e. this is a retry)
+        """
+        try:
+            with transaction.atomic():
+                self.create(event_id=event_id, received_at=datetime.now())
+            return True
+        except IntegrityError:
+            return False
+
+    def forget(self, event_id):
+        "Forgets an event, so that Slack's next delivery of it is handled"
+        self.filter(event_id=event_id).delete()
+
+    def prune(self, max_age_seconds=None):
+        """
+        Forgets events received more than max_age_seconds ago (by default
+        RESPONSE_SLACK_EVENT_DEDUPE_SECONDS, an hour)
+        """
+        if max_age_seconds is None:
+            max_age_seconds = getattr(
+                settings, "RESPONSE_SLACK_EVENT_DEDUPE_SECONDS", 60 * 60
+            )
+        cutoff = datetime.now() - timedelta(seconds=max_age_seconds)
+        deleted, _ = self.filter(received_at__lt=cutoff).delete()
+        return deleted
+
+
+class SlackEventReceipt(models.Model):
+    """
+    The IDs of recently received Slack events, so that deliveries Slack
+    retries are only handled once
+    """
+
+    event_id = models.CharField(max_length=100, unique=True)
+    received_at = models.DateTimeField(db_index=True)
+
+    objects = SlackEventReceiptManager()
+
+    def __str__(self):
+        return self.event_id
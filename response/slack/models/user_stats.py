@@ -1,10 +1,160 @@
+import atexit
+import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, models, transaction
+from django.db.models import F
 
 from response.core.models import ExternalUser, Incident
 from response.slack.cache import get_user_profile
 
+logger = logging.getLogger(__name__)
+
+# Slack user IDs of users we've already seen, mapped to their ExternalUser
+# primary keys, so counting their messages doesn't need to look them up
+_user_pks = OrderedDict()
+_user_pks_lock = threading.Lock()
+USER_PK_CACHE_SIZE = 10000
+
+
+def _slack_user_pk(user_id):
+    with _user_pks_lock:
+        if user_id in _user_pks:
+            _user_pks.move_to_end(user_id)
+            return _user_pks[user_id]
+
+    user_pk = (
+        ExternalUser.objects.filter(app_id="slack", external_id=user_id)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if user_pk is None:
+        name = get_user_profile(user_id)["name"]
+        user, _ = ExternalUser.objects.get_or_create_slack(
+            external_id=user_id, display_name=name
+        )
+        user_pk = user.pk
+
+    with _user_pks_lock:
+        _user_pks[user_id] = user_pk
+        while len(_user_pks) > USER_PK_CACHE_SIZE:
+            _user_pks.popitem(last=False)
+    return user_pk
+
+
+def forget_slack_users(user_ids=None):
+    "Drops users from the Slack user ID cache, or all of them if none are given"
+    with _user_pks_lock:
+        if user_ids is None:
+            _user_pks.clear()
+        for user_id in user_ids or ():
+            _user_pks.pop(user_id, None)
+
+
+class UserStatsManager(models.Manager):
+    def add_messages(self, incident_id, user_pk, count=1, first_seen=None):
+        """
+        Adds to a user's message count for an incident, creating their stats
+        if needed. The count is incremented in the database so concurrent
+        updates aren't lost.
+        """
+        increment = {
+            "message_count": F("message_count") + count,
+            "last_message_at": datetime.now(),
+        }
+        if self.filter(incident_id=incident_id, user_id=user_pk).update(**increment):
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(
+                    incident_id=incident_id,
+                    user_id=user_pk,
+                    join_time=first_seen or datetime.now(),
+                    message_count=count,
+                    last_message_at=datetime.now(),
+                )
+        except IntegrityError:
+            # someone else created them first
+            self.filter(incident_id=incident_id, user_id=user_pk).update(**increment)
+
+    def add_message_counts(self, counts):
+        """
+        Applies a batch of {(incident_id, user_pk): (count, first_seen)}
+        message counts in one transaction
+        """
+        with transaction.atomic():
+            for (incident_id, user_pk), (count, first_seen) in counts.items():
+                self.add_messages(incident_id, user_pk, count, first_seen)
+
+
+class UserStatsAggregator(object):
+    """
+    Collects message counts in memory and writes them in one batch every
+    flush_seconds, for busy channels where writing every message is costly
+    """
+
+    def __init__(self, flush_seconds):
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._timer = None
+
+    def add(self, incident_id, user_pk):
+        with self._lock:
+            key = (incident_id, user_pk)
+            count, first_seen = self._counts.get(key, (0, datetime.now()))
+            self._counts[key] = (count + 1, first_seen)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_later(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.exception(f"Error flushing user stats: {e}")
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if counts:
+            UserStats.objects.add_message_counts(counts)
+        return len(counts)
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_user_stats_aggregator():
+    """
+    Returns the process's UserStatsAggregator, or None if messages should
+    be counted straight away (RESPONSE_USER_STATS_FLUSH_SECONDS = 0)
+    """
+    global _aggregator
+
+    flush_seconds = getattr(settings, "RESPONSE_USER_STATS_FLUSH_SECONDS", 0)
+    if not flush_seconds:
+        return None
+
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = UserStatsAggregator(flush_seconds)
+            atexit.register(_aggregator.flush)
+        return _aggregator
+
 
 class UserStats(models.Model):
     user = models.ForeignKey(
@@ -16,26 +166,25 @@ class UserStats(models.Model):
 
     join_time = models.DateTimeField(null=True)
     message_count = models.IntegerField(default=0)
+    # set along with the count, so the incident doc can tell when it changed
+    last_message_at = models.DateTimeField(null=True)
+
+    objects = UserStatsManager()
 
     class Meta:
         unique_together = ("incident", "user")
 
     @staticmethod
     def increment_message_count(incident, user_id):
-        name = get_user_profile(user_id)["name"]
-        user, _ = ExternalUser.objects.get_or_create_slack(
-            external_id=user_id, display_name=name
-        )
-
-        user_stats, created = UserStats.objects.get_or_create(
-            incident=incident, user=user
-        )
-
-        if created:
-            user_stats.join_time = datetime.now()
+        user_pk = _slack_user_pk(user_id)
 
-        user_stats.message_count += 1
-        user_stats.save()
+        # only new participants mark the incident as modified (when their
+        # stats are created), so counting messages is a single UPDATE
+        aggregator = get_user_stats_aggregator()
+        if aggregator:
+            aggregator.add(incident.pk, user_pk)
+        else:
+            UserStats.objects.add_messages(incident.pk, user_pk)
 
     def __str__(self):
         return f"{self.user.display_name} - {self.incident}"
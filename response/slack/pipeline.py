@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# The traces of the most recent pipeline runs in this process
+RECENT_TRACES = deque(maxlen=50)
+
+
+class PipelineStep(object):
+    def __init__(self, name, func, requires=(), optional=False):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.optional = optional
+
+
+class PipelineTrace(object):
+    """
+    When each step of a pipeline run started and how long it took, relative
+    to the start of the run
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.steps = {}
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.total_secs = None
+
+    def record(self, step, status, started=None, finished=None):
+        with self._lock:
+            self.steps[step] = {
+                "status": status,
+                "start_secs": started - self._start if started else None,
+                "duration_secs": finished - started if started else None,
+            }
+
+    def finish(self):
+        self.total_secs = time.monotonic() - self._start
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "total_secs": self.total_secs,
+                "steps": dict(self.steps),
+            }
+
+    def __str__(self):
+        steps = ", ".join(
+            f"{name} {step['status']}"
+            + (f" {step['duration_secs']:.2f}s" if step["duration_secs"] else "")
+            for name, step in self.steps.items()
+        )
+        return f"{self.name} in {self.total_secs or 0:.2f}s: {steps}"
+
+
+class Pipeline(object):
+    """
+    Runs a set of steps that depend on one another, starting each as soon as
+    the steps it requires have finished, so that independent Slack calls are
+    made concurrently on a bounded pool of threads.
+
+    Each step is called with a dict of the results of the steps before it.
+    If a step fails the steps that require it are skipped, and once
+    everything else has run the first failure is raised, unless the step
+    was optional.
+
+    Example usage:
+
+    pipeline = Pipeline("create incident")
+    pipeline.add("channel", lambda results: create_channel())
+    pipeline.add("topic", lambda results: set_topic(results["channel"]), requires=["channel"])
+    pipeline.run()
+    """
+
+    def __init__(self, name, max_workers=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.steps = {}
+
+    def add(self, name, func, requires=(), optional=False):
+        for required in requires:
+            if required not in self.steps:
+                raise ValueError(f"Step {name} requires unknown step {required}")
+        self.steps[name] = PipelineStep(name, func, requires, optional)
+
+    def _workers(self):
+        if self.max_workers is not None:
+            return self.max_workers
+        return getattr(settings, "RESPONSE_SLACK_PIPELINE_WORKERS", 4)
+
+    def run(self):
+        """
+        Runs the steps, returning a dict of their results and the trace of
+        the run
+        """
+        trace = PipelineTrace(self.name)
+        results = {}
+        failures = []
+
+        pending = dict(self.steps)
+        done = set()
+        workers = self._workers()
+
+        def _ready():
+            return [s for s in pending.values() if all(r in done for r in s.requires)]
+
+        def _skip_dependents(failed):
+            for step in list(pending.values()):
+                if failed in step.requires:
+                    del pending[step.name]
+                    trace.record(step.name, "skipped")
+                    _skip_dependents(step.name)
+
+        def _finish(step, outcome):
+            result, error = outcome
+            done.add(step.name)
+            if error is None:
+                results[step.name] = result
+                return
+            if step.optional:
+                logger.error(f"Optional step {step.name} of {self.name} failed: {error}")
+            else:
+                failures.append(error)
+            _skip_dependents(step.name)
+
+        if workers <= 1:
+            while pending:
+                for step in _ready():
+                    del pending[step.name]
+                    _finish(step, self._run_step(step, dict(results), trace))
+        else:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="pipeline"
+            ) as pool:
+                running = {}
+                while pending or running:
+                    for step in _ready():
+                        del pending[step.name]
+                        future = pool.submit(
+                            self._run_step_in_thread, step, dict(results), trace
+                        )
+                        running[future] = step
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        _finish(running.pop(future), future.result())
+
+        trace.finish()
+        RECENT_TRACES.append(trace.as_dict())
+        logger.info(f"Ran {trace}")
+
+        if failures:
+            raise failures[0]
+        return results, trace
+
+    def _run_step(self, step, results, trace):
+        started = time.monotonic()
+        try:
+            result = step.func(results)
+        except Exception as e:
+            trace.record(step.name, "failed", started, time.monotonic())
+            return None, e
+        trace.record(step.name, "ok", started, time.monotonic())
+        return result, None
+
+    def _run_step_in_thread(self, step, results, trace):
+        try:
+            return self._run_step(step, results, trace)
+        finally:
+            close_old_connections()
+
+
+def get_pipeline_traces():
+    "Returns the traces of the most recent pipeline runs, newest last"
+    return list(RECENT_TRACES)
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Slack's published rate limit tiers, as (requests per second, burst)
+# https://api.slack.com/docs/rate-limits
+TIER_1 = (1 / 60, 1)
+TIER_2 = (20 / 60, 5)
+TIER_3 = (50 / 60, 10)
+TIER_4 = (100 / 60, 20)
+# chat.postMessage is limited to roughly one message per second per channel
+POST_MESSAGE = (1, 3)
+
+METHOD_TIERS = {
+    "auth.test": TIER_4,
+    "bookmarks.add": TIER_2,
+    "bookmarks.edit": TIER_2,
+    "bookmarks.list": TIER_2,
+    "chat.postEphemeral": TIER_4,
+    "chat.postMessage": POST_MESSAGE,
+    "chat.update": TIER_3,
+    "conversations.create": TIER_2,
+    "conversations.info": TIER_3,
+    "conversations.invite": TIER_3,
+    "conversations.join": TIER_3,
+    "conversations.leave": TIER_3,
+    "conversations.list": TIER_2,
+    "conversations.rename": TIER_2,
+    "conversations.setTopic": TIER_2,
+    "conversations.unarchive": TIER_2,
+    "pins.add": TIER_2,
+    "reactions.add": TIER_3,
+    "reactions.remove": TIER_2,
+    "usergroups.list": TIER_2,
+    "users.info": TIER_4,
+    "users.list": TIER_2,
+    "users.lookupByEmail": TIER_3,
+    "views.open": TIER_4,
+}
+
+# Methods that are limited per channel rather than across the workspace
+PER_CHANNEL_METHODS = ("chat.postMessage",)
+
+
+class LocalRateLimitStore(object):
+    """
+    Keeps rate limit state in memory, shared by all threads in this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def state(self):
+        with self._lock:
+            yield self._state
+
+
+class FileRateLimitStore(object):
+    """
+    Keeps rate limit state in a JSON file guarded by an exclusive file lock,
+    so that every process on the host shares the same limits
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def state(self):
+        import fcntl
+
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                contents = f.read()
+                try:
+                    state = json.loads(contents) if contents else {}
+                except ValueError:
+                    logger.warning(f"Discarding unreadable rate limit state in {self.path}")
+                    state = {}
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter(object):
+    """
+    Token buckets for Slack API methods, keyed by method (and channel for
+    methods limited per channel).
+
+    Each bucket is stored as the time at which it will next be full (the
+    "theoretical arrival time" of the generic cell rate algorithm), so a
+    reservation is a single read and write of one number.
+    """
+
+    def __init__(self, store=None, method_tiers=None, default_tier=TIER_3):
+        self.store = store or LocalRateLimitStore()
+        self.method_tiers = method_tiers or METHOD_TIERS
+        self.default_tier = default_tier
+
+    def bucket_key(self, method, channel=None):
+        if channel and method in PER_CHANNEL_METHODS:
+            return f"{method}:{channel}"
+        return method
+
+    def reserve(self, method, channel=None):
+        """
+        Takes a token from the method's bucket, returning how many seconds
+        the caller must wait before making the request
+        """
+        rate, burst = self.method_tiers.get(method, self.default_tier)
+        interval = 1 / rate
+        key = self.bucket_key(method, channel)
+        now = time.time()
+
+        with self.store.state() as state:
+            full_at = max(state.get(key, now), now)
+            wait = max(0.0, full_at - interval * (burst - 1) - now)
+            state[key] = full_at + interval
+
+            # forget buckets that have refilled, so the state doesn't grow
+            # with every channel we've ever posted to
+            for stale_key in [k for k, v in state.items() if v < now]:
+                del state[stale_key]
+
+        return wait
+
+    def penalize(self, method, channel, seconds):
+        """
+        Empties the method's bucket for the next `seconds`, for when Slack
+        tells us to back off with Retry-After
+        """
+        rate, burst = self.method_tiers.get(method, self.default_tier)
+        key = self.bucket_key(method, channel)
+        blocked_until = time.time() + seconds + (burst - 1) / rate
+
+        with self.store.state() as state:
+            state[key] = max(state.get(key, 0), blocked_until)
+
+
+def create_rate_limiter(lock_file=None):
+    """
+    Returns a RateLimiter shared across processes through lock_file if given,
+    otherwise one local to this process
+    """
+    if lock_file:
+        os.makedirs(os.path.dirname(os.path.abspath(lock_file)), exist_ok=True)
+        return RateLimiter(FileRateLimitStore(lock_file))
+    return RateLimiter()
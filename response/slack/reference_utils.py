@@ -13,22 +13,61 @@ def user_reference(user_id):
     return f"<@{user_id}>"
 
 
+USER_REFERENCE = re.compile(r"<@(U[A-Z0-9]+)>")
+CHANNEL_REFERENCE = re.compile(r"<#C[A-Z0-9]+\|([\-a-zA-Z0-9]+)>")
+
+
 def reference_to_id(value):
     """take a string containing <@U123ABCD> refs and extract first match"""
-    m = re.search(r"<@(U[A-Z0-9]+)>", value)
+    m = USER_REFERENCE.search(value)
     return m.group(1) if m else None
 
 
-def user_ref_to_username(value):
+def user_ids_in(values):
+    """returns the IDs of all the users referenced in some strings"""
+    user_ids = set()
+    for value in values:
+        if value:
+            user_ids.update(USER_REFERENCE.findall(value))
+    return user_ids
+
+
+def resolve_user_references(values):
+    """
+    Looks up the profiles of every user referenced in some strings in one go,
+    returning them keyed by user ID. This also warms the profile cache, so
+    later slack_to_human_readable calls for the same strings are cheap.
+    """
+    return cache.get_user_profiles(user_ids_in(values))
+
+
+def user_ref_to_username(value, profiles=None):
     """takes a <@U123ABCD> style ref and returns an @username"""
-    # strip the '<@' and '>'
-    user_id = reference_to_id(value.group())
-    user_profile = cache.get_user_profile(user_id)
-    return "@" + user_profile["name"] or user_id
+    user_id = value.group(1)
+    if profiles is None:
+        user_profile = cache.get_user_profile(user_id)
+    else:
+        user_profile = profiles.get(user_id)
+    return "@" + (user_profile["name"] if user_profile else user_id)
+
+
+def slack_to_human_readable(value, profiles=None):
+    """
+    Replaces Slack user and channel references with readable names.
 
+    profiles is a dict of user profiles from resolve_user_references; if it's
+    not given the users are looked up here.
+    """
+    if profiles is None:
+        profiles = resolve_user_references([value])
 
-def slack_to_human_readable(value):
     # replace user references (<@U3231FFD>) with usernames (@chrisevans)
-    value = re.sub(r"(<@U[A-Z0-9]+>)", user_ref_to_username, value)
-    value = re.sub(r"(<#C[A-Z0-9]+\|([\-a-zA-Z0-9]+)>)", r"#\2", value)
+    value = USER_REFERENCE.sub(lambda m: user_ref_to_username(m, profiles), value)
+    value = CHANNEL_REFERENCE.sub(r"#\1", value)
     return value
+
+
+def slack_to_human_readable_many(values):
+    """slack_to_human_readable for many strings, looking up all the users at once"""
+    profiles = resolve_user_references(values)
+    return [slack_to_human_readable(value, profiles) for value in values]
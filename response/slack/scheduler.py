@@ -0,0 +1,195 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from response.slack.cache import update_user_cache
+from response.slack.decorators import handle_notifications, handle_outbox, scheduled_job
+from response.slack.decorators.scheduled_job import SCHEDULED_JOBS
+from response.slack.models import ScheduledJobMetrics, SchedulerLock, SlackEventReceipt
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_NAME = "response-scheduler"
+
+# Identifies this process when competing with other replicas for the leader lock
+SCHEDULER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_job_metrics():
+    return {
+        metrics.job_id: metrics.as_dict()
+        for metrics in ScheduledJobMetrics.objects.order_by("job_id")
+    }
+
+
+def get_leader():
+    "Returns the ID of the scheduler currently holding the leader lock, if any"
+    lock = SchedulerLock.objects.filter(
+        name=LEADER_LOCK_NAME, expires_at__gte=datetime.now()
+    ).first()
+    return lock.owner if lock else None
+
+
+def _lock_ttl_seconds():
+    return getattr(settings, "RESPONSE_SCHEDULER_LOCK_TTL_SECONDS", 120)
+
+
+class LeaseHeartbeat(threading.Thread):
+    """
+    Keeps renewing the leader lock while a job runs, so a job that takes
+    longer than the lock's TTL doesn't let another replica take over and
+    start running jobs alongside it.
+    """
+
+    def __init__(self, ttl_seconds):
+        super().__init__(name="scheduler-lease-heartbeat", daemon=True)
+        self.ttl_seconds = ttl_seconds
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.ttl_seconds / 3):
+                try:
+                    if not SchedulerLock.objects.acquire(
+                        LEADER_LOCK_NAME, SCHEDULER_ID, self.ttl_seconds
+                    ):
+                        logger.warning(
+                            f"Scheduler {SCHEDULER_ID} lost the leader lock mid-job"
+                        )
+                except Exception as e:
+                    logger.exception(f"Error renewing the scheduler leader lock: {e}")
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """
+    Runs a scheduled job if this process holds the leader lock, recording how
+    long it took. Only the leader runs jobs, so with several replicas running
+    the scheduler each job still runs once per tick.
+    """
+    close_old_connections()
+    try:
+        ttl = _lock_ttl_seconds()
+        if not SchedulerLock.objects.acquire(LEADER_LOCK_NAME, SCHEDULER_ID, ttl):
+            logger.info(f"Skipping job {job} as this scheduler isn't the leader")
+            ScheduledJobMetrics.objects.record_skip(job.job_id)
+            return
+
+        heartbeat = LeaseHeartbeat(ttl)
+        heartbeat.start()
+
+        started = datetime.now()
+        start = time.monotonic()
+        failed = False
+        try:
+            job.callback()
+        except Exception as e:
+            failed = True
+            logger.exception(f"Error running scheduled job {job}: {e}")
+        finally:
+            heartbeat.stop()
+            duration = time.monotonic() - start
+            ScheduledJobMetrics.objects.record_run(
+                job.job_id, SCHEDULER_ID, started, duration, failed
+            )
+            logger.info(f"Ran scheduled job {job} in {duration:.2f}s")
+    finally:
+        close_old_connections()
+
+
+def create_scheduler(blocking=False):
+    """
+    Builds an APScheduler scheduler with all the @scheduled_job jobs added.
+
+    Jobs coalesce missed runs and never overlap with themselves, so a slow
+    tick delays the next one rather than running alongside it.
+    """
+    if blocking:
+        from apscheduler.schedulers.blocking import BlockingScheduler as Scheduler
+    else:
+        from apscheduler.schedulers.background import BackgroundScheduler as Scheduler
+
+    scheduler = Scheduler(
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 30}
+    )
+    for job in SCHEDULED_JOBS.values():
+        scheduler.add_job(
+            run_job, job.trigger, args=[job], id=job.job_id, **job.trigger_args
+        )
+    return scheduler
+
+
+def start_scheduler():
+    """
+    Starts the scheduler in a background thread of this process
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+
+        logger.info(f"Starting scheduler {SCHEDULER_ID}")
+        _scheduler = create_scheduler()
+        _scheduler.start()
+        return _scheduler
+
+
+def stop_scheduler():
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            return
+
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+        SchedulerLock.objects.release(LEADER_LOCK_NAME, SCHEDULER_ID)
+
+
+@scheduled_job("cron_minute", "interval", minutes=1)
+def cron_minute():
+    "Handles actions that need to take place every minute"
+    handle_notifications()
+
+
+@scheduled_job(
+    "slack_outbox",
+    "interval",
+    seconds=getattr(settings, "RESPONSE_SLACK_OUTBOX_INTERVAL_SECONDS", 15),
+)
+def slack_outbox():
+    "Retries Slack side-effects that failed or were left behind by another process"
+    handle_outbox()
+
+
+@scheduled_job("slack_event_receipts", "interval", minutes=10)
+def slack_event_receipts():
+    "Forgets received Slack events once Slack will no longer retry them"
+    SlackEventReceipt.objects.prune()
+
+
+@scheduled_job(
+    "cron_daily",
+    "cron",
+    hour=getattr(settings, "RESPONSE_SCHEDULER_DAILY_HOUR", 3),
+    minute=0,
+)
+def cron_daily():
+    "Handles actions that need to take place every day"
+    update_user_cache()
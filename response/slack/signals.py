@@ -1,18 +1,107 @@
+import logging
 from urllib.parse import urljoin
 
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.urls import reverse
 
-from response.core.models import Incident, add_incident_update_event
+from response.core.models import (
+    ExternalUser,
+    Incident,
+    SearchDocument,
+    add_incident_update_event,
+)
 from response.core.models.action import Action
 from response.core.serializers import ExternalUserSerializer
-from response.slack.models import HeadlinePost
+from response.slack.models import HeadlinePost, PinnedMessage, UserStats
 from response.slack.block_kit import Context, Message, Section, Text
-from response.slack.models.comms_channel import CommsChannel
+from response.slack.cache import invalidate_user_profiles
+from response.slack.decorators import enqueue_outbox_task, outbox_task
+from response.slack.models.comms_channel import CommsChannel, forget_comms_channels
+from response.slack.models.user_stats import forget_slack_users
 from response.slack.reference_utils import user_reference
 
+logger = logging.getLogger(__name__)
+
+
+# Slack side-effects of saving incidents/actions. These are deferred through the
+# outbox so that saving doesn't wait on the Slack API.
+
+
+@outbox_task("send_message")
+def send_message(channel_id, text):
+    settings.SLACK_CLIENT.send_message(channel_id, text)
+
+
+@outbox_task("send_message_blocks")
+def send_message_blocks(channel_id, blocks, fallback_text):
+    settings.SLACK_CLIENT.send_or_update_message_block(
+        channel_id, blocks=blocks, fallback_text=fallback_text
+    )
+
+
+@outbox_task("post_to_headline_thread")
+def post_to_headline_thread(incident_id, blocks, fallback_text):
+    try:
+        headline_post = HeadlinePost.objects.get(incident_id=incident_id)
+    except HeadlinePost.DoesNotExist:
+        logger.error(f"No headline post for incident {incident_id}, not posting update")
+        return
+
+    settings.SLACK_CLIENT.send_message(
+        settings.INCIDENT_CHANNEL_ID,
+        text=fallback_text,
+        blocks=blocks,
+        thread_ts=headline_post.message_ts,
+    )
+
+
+@outbox_task("update_headline_post")
+def update_headline_post(incident_id):
+    try:
+        headline_post = HeadlinePost.objects.get(incident_id=incident_id)
+    except HeadlinePost.DoesNotExist:
+        # will be created shortly
+        return
+
+    headline_post.update_main_in_slack()
+
+
+@outbox_task("sync_bookmarks")
+def sync_bookmarks(incident_id, channel_id):
+    try:
+        incident = Incident.objects.select_related("lead").get(pk=incident_id)
+    except Incident.DoesNotExist:
+        return
+
+    CommsChannel.objects.update_bookmarks_in_comms_channel(
+        incident=incident, channel_id=channel_id
+    )
+
+
+def _merge_change_notices(old_payload, new_payload):
+    return dict(old_payload, lines=old_payload["lines"] + new_payload["lines"])
+
+
+@outbox_task("send_change_notice", merge=_merge_change_notices)
+def send_change_notice(lines, updated_by=None, channel_id=None, incident_id=None):
+    """
+    Posts the changes made to an incident as a single message, either to a
+    channel or (given incident_id) to the incident's headline post thread
+    """
+    msg = _change_notice_message("\n".join(lines), updated_by)
+    if incident_id is not None:
+        post_to_headline_thread(
+            incident_id, blocks=msg.serialize(), fallback_text=msg.fallback_text
+        )
+    else:
+        send_message_blocks(
+            channel_id, blocks=msg.serialize(), fallback_text=msg.fallback_text
+        )
+
+
 @receiver(post_save, sender=Incident)
 def update_headline_after_incident_save(sender, instance, **kwargs):
     """
@@ -21,21 +110,32 @@ def update_headline_after_incident_save(sender, instance, **kwargs):
     Important: this is called in the synchronous /incident flow so must remain fast (<2 secs)
 
     """
-    try:
-        comms_channel = instance.comms_channel()
-        if comms_channel != None:
-            CommsChannel.objects.update_bookmarks_in_comms_channel(incident=instance,channel_id=comms_channel.channel_id)
-        
-        if instance.private:
-            return
-        
-        headline_post = HeadlinePost.objects.get(incident=instance)
-        headline_post.update_main_in_slack()
+    comms_channel = instance.comms_channel()
+    if comms_channel != None:
+        # bookmarks and the headline post are re-rendered from the incident as
+        # it is when they're sent, so a burst of saves only needs one update
+        enqueue_outbox_task(
+            "sync_bookmarks",
+            f"bookmarks:{instance.pk}",
+            coalesce_key=f"bookmarks:{instance.pk}",
+            incident_id=instance.pk,
+            channel_id=comms_channel.channel_id,
+        )
 
-    except HeadlinePost.DoesNotExist:
-        # will be created shortly
+    if instance.private:
         return
 
+    _enqueue_headline_update(instance.pk)
+
+
+def _enqueue_headline_update(incident_id):
+    enqueue_outbox_task(
+        "update_headline_post",
+        f"headline:{incident_id}",
+        coalesce_key=f"headline:{incident_id}",
+        incident_id=incident_id,
+    )
+
 
 @receiver(pre_save, sender=Incident)
 def prompt_incident_report(sender, instance: Incident, **kwargs):
@@ -43,21 +143,22 @@ def prompt_incident_report(sender, instance: Incident, **kwargs):
     Prompt incident lead to complete a report when an incident is closed.
     """
 
-    try:
-        prev_state = Incident.objects.get(pk=instance.pk)
-    except Incident.DoesNotExist:
-        # Incident hasn't been saved yet, nothing to do here.
+    if instance._state.adding or not instance.is_dirty("end_time"):
+        # Incident hasn't been saved yet or isn't being closed, nothing to do here.
         return
 
+    prev_state = instance.previous_state()
     if instance.is_closed() and not prev_state.is_closed():
         user_to_notify = instance.lead or instance.reporter
         doc_url = urljoin(
             settings.SITE_URL,
             reverse("incident_doc", kwargs={"incident_id": instance.pk}),
         )
-        settings.SLACK_CLIENT.send_message(
+        enqueue_outbox_task(
+            "send_message",
             user_to_notify.external_id,
-            f"👋 Don't forget to fill out an incident report, the timeline from: {doc_url} may be helpful.",
+            channel_id=user_to_notify.external_id,
+            text=f"👋 Don't forget to fill out an incident report, the timeline from: {doc_url} may be helpful.",
         )
 
 
@@ -67,13 +168,63 @@ def update_headline_after_save(sender, instance, **kwargs):
     Reflect changes to headline posts in slack
 
     """
-    instance.update_main_in_slack()
+    _enqueue_headline_update(instance.incident_id)
+
+@receiver(post_save, sender=ExternalUser)
+@receiver(post_delete, sender=ExternalUser)
+def invalidate_cached_user_profile(sender, instance, **kwargs):
+    """
+    Drop edited users from the in-memory caches once the change is
+    committed, so the next lookup sees it
+    """
+    external_id = instance.external_id
+
+    def invalidate():
+        invalidate_user_profiles([external_id])
+        forget_slack_users([external_id])
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=CommsChannel)
+@receiver(post_delete, sender=CommsChannel)
+def invalidate_channel_route(sender, instance, **kwargs):
+    """
+    Drop created, renamed and deleted comms channels from the routing cache
+    once the change is committed, so payloads from them find the incident
+    """
+    channel_id = instance.channel_id
+    transaction.on_commit(lambda: forget_comms_channels([channel_id]))
+
+
+@receiver(post_save, sender=UserStats)
+def touch_incident_after_user_stats_save(sender, instance, **kwargs):
+    """
+    Participants are listed in the incident doc, so changes to them mark the
+    incident's participants as modified
+    """
+    Incident.objects.touch(instance.incident_id, "participants")
+
+
+@receiver(post_save, sender=PinnedMessage)
+def index_pinned_message(sender, instance, **kwargs):
+    SearchDocument.objects.index(
+        SearchDocument.PINNED_MESSAGE,
+        instance.pk,
+        instance.incident_id,
+        instance.text,
+        instance.timestamp,
+    )
+
+
+@receiver(post_delete, sender=PinnedMessage)
+def unindex_pinned_message(sender, instance, **kwargs):
+    SearchDocument.objects.remove(SearchDocument.PINNED_MESSAGE, instance.pk)
+
 
 @receiver(pre_save, sender=Action)
 def add_timeline_events(sender, instance, **kwargs):
-    try:
-        prev_state = Action.objects.get(pk=instance.pk)
-    except Action.DoesNotExist:
+    if instance._state.adding:
         # New action
         text = f"Action created: {instance.details}"
         add_incident_update_event(
@@ -84,9 +235,14 @@ def add_timeline_events(sender, instance, **kwargs):
             new_value=text,
         )
         return
-    
+
+    dirty = instance.get_dirty_fields()
+    if "assigned_to" not in dirty and "done" not in dirty:
+        return
+
+    prev_state = instance.previous_state()
     msg = ""
-    if prev_state.assigned_to != instance.assigned_to:
+    if "assigned_to" in dirty:
         old_assigned = None
         if prev_state.assigned_to:
             old_assigned = ExternalUserSerializer(prev_state.assigned_to).data
@@ -106,7 +262,7 @@ def add_timeline_events(sender, instance, **kwargs):
         text += "\n"
         msg += text
     
-    if prev_state.done != instance.done:
+    if "done" in dirty:
         text = f":white_check_mark: {user_reference(instance.assigned_to.display_name)} has completed action #{instance.pk} - {instance.details}"
         add_incident_update_event(
             incident=instance.incident,
@@ -121,46 +277,62 @@ def add_timeline_events(sender, instance, **kwargs):
     if msg != "":
         _notify_message_text(instance, msg)
 
+# Incident fields whose changes are recorded in the timeline
+TIMELINE_INCIDENT_FIELDS = {
+    "lead",
+    "name",
+    "summary",
+    "severity",
+    "status_update_last",
+    "end_time",
+}
+
+
 @receiver(pre_save, sender=Incident)
 def add_timeline_events(sender, instance: Incident, **kwargs):
-    try:
-        prev_state = Incident.objects.get(pk=instance.pk)
-    except Incident.DoesNotExist:
+    if instance._state.adding:
         # Incident hasn't been saved yet, nothing to do here.
         return
 
-    text = ""
-    if prev_state.lead != instance.lead:
-        text = update_incident_lead_event(prev_state, instance)
-        _notify_message_text(instance, text)
+    dirty = instance.get_dirty_fields()
+    if not dirty.keys() & TIMELINE_INCIDENT_FIELDS:
+        return
+
+    prev_state = instance.previous_state()
+    changes = []
+    if "lead" in dirty:
+        changes.append(update_incident_lead_event(prev_state, instance))
+
+    if "name" in dirty:
+        changes.append(update_incident_name_event(prev_state, instance))
 
-    if prev_state.name != instance.name:
-        text = update_incident_name_event(prev_state, instance)
-        _notify_message_text(instance, text)
+    if "summary" in dirty:
+        changes.append(update_incident_summary_event(prev_state, instance))
 
-    if prev_state.summary != instance.summary:
-        text = update_incident_summary_event(prev_state, instance)
-        _notify_message_text(instance, text)
+    if "severity" in dirty:
+        changes.append(update_incident_severity_event(prev_state, instance))
 
-    if prev_state.severity != instance.severity:
-        text = update_incident_severity_event(prev_state, instance)
-        _notify_message_text(instance, text)
+    if changes:
+        _notify_changes(instance, changes)
 
-    if prev_state.status_update_last != instance.status_update_last:
+    if "status_update_last" in dirty:
         text = share_incident_update_event(prev_state, instance)
         _notify_message_text(instance, text, instance.status_update_text())
 
-    if prev_state.is_closed() != instance.is_closed():
+    if "end_time" in dirty and prev_state.is_closed() != instance.is_closed():
         msg = share_incident_closed_event(prev_state, instance)
         _notify(instance, msg)
         doc_url = urljoin(
                 settings.SITE_URL,
                 reverse("incident_doc", kwargs={"incident_id": instance.pk}),
             )
-        settings.SLACK_CLIENT.send_message(
-            instance.comms_channel().channel_id,
-            f"👋 Don't forget to fill out an incident report, the timeline from: {doc_url} may be helpful.",
-            )
+        channel_id = instance.comms_channel().channel_id
+        enqueue_outbox_task(
+            "send_message",
+            channel_id,
+            channel_id=channel_id,
+            text=f"👋 Don't forget to fill out an incident report, the timeline from: {doc_url} may be helpful.",
+        )
 
 def _notify(instance, msg):
     if type(instance) == Action:
@@ -170,16 +342,61 @@ def _notify(instance, msg):
         channel_id = instance.comms_channel().channel_id
         incident = instance
 
-    msg.send(channel_id)
+    enqueue_outbox_task(
+        "send_message_blocks",
+        channel_id,
+        channel_id=channel_id,
+        blocks=msg.serialize(),
+        fallback_text=msg.fallback_text,
+    )
 
     if incident.private:
         return
-    
-    headline_post = HeadlinePost.objects.get(incident=incident)
-    headline_post.post_to_thread(msg)
 
+    enqueue_outbox_task(
+        "post_to_headline_thread",
+        settings.INCIDENT_CHANNEL_ID,
+        incident_id=incident.pk,
+        blocks=msg.serialize(),
+        fallback_text=msg.fallback_text,
+    )
 
-def _notify_message_text(instance, msg_text, next_update = None):
+
+def _notify_changes(incident, lines):
+    """
+    Sends field-change notices for an incident as one message. Changes made
+    by the same person within RESPONSE_SLACK_COALESCE_SECONDS of each other
+    are combined into the same message.
+    """
+    updated_by = None
+    if incident.updated_by != None:
+        updated_by = incident.updated_by.display_name
+
+    channel_id = incident.comms_channel().channel_id
+    coalesce_key = f"changes:{incident.pk}:{incident.updated_by_id}"
+    enqueue_outbox_task(
+        "send_change_notice",
+        channel_id,
+        coalesce_key=f"{coalesce_key}:channel",
+        lines=lines,
+        updated_by=updated_by,
+        channel_id=channel_id,
+    )
+
+    if incident.private:
+        return
+
+    enqueue_outbox_task(
+        "send_change_notice",
+        settings.INCIDENT_CHANNEL_ID,
+        coalesce_key=f"{coalesce_key}:headline",
+        lines=lines,
+        updated_by=updated_by,
+        incident_id=incident.pk,
+    )
+
+
+def _change_notice_message(msg_text, updated_by=None, next_update=None):
     msg = Message()
     msg.set_fallback_text(msg_text)
     msg.add_block(
@@ -190,8 +407,8 @@ def _notify_message_text(instance, msg_text, next_update = None):
     )
     
     context_text = None
-    if(instance.updated_by != None):
-        context_text = f"Updated by {user_reference(instance.updated_by.display_name)}"
+    if(updated_by != None):
+        context_text = f"Updated by {user_reference(updated_by)}"
     if(next_update != None):
         context_text += f", next update due in {next_update}"    
     if(context_text != None):
@@ -199,7 +416,15 @@ def _notify_message_text(instance, msg_text, next_update = None):
         context.add_element(Text(context_text))
         msg.add_block(context)
 
-    _notify(instance, msg)
+    return msg
+
+
+def _notify_message_text(instance, msg_text, next_update = None):
+    updated_by = None
+    if(instance.updated_by != None):
+        updated_by = instance.updated_by.display_name
+
+    _notify(instance, _change_notice_message(msg_text, updated_by, next_update))
 
 def update_incident_lead_event(prev_state, instance):
     old_lead = None
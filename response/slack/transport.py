@@ -0,0 +1,191 @@
+import http.client
+import io
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+import slack_sdk
+
+logger = logging.getLogger(__name__)
+
+# Errors from reusing a connection the server has already closed
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class KeepAliveTransport(object):
+    """
+    Sends HTTP requests over persistent connections, so that calls to the
+    same host don't each pay for a new TCP connection and TLS handshake.
+
+    A connection is only used by one thread at a time: each request takes
+    the most recently used idle connection to the host (or opens one) and
+    hands it back afterwards. Up to pool_size idle connections are kept per
+    host, and connections idle for longer than idle_seconds are closed
+    rather than reused, as the server has probably dropped them.
+    """
+
+    def __init__(
+        self,
+        pool_size=10,
+        connect_timeout=10,
+        read_timeout=30,
+        idle_seconds=50,
+        ssl_context=None,
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_seconds = idle_seconds
+        self.ssl_context = ssl_context
+        self._lock = threading.Lock()
+        self._idle = defaultdict(list)
+        self.opened = 0
+        self.reused = 0
+
+    def _new_connection(self, scheme, host, port):
+        with self._lock:
+            self.opened += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.connect_timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+
+    def _checkout(self, key):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                connection, last_used = idle.pop()
+                if now - last_used < self.idle_seconds:
+                    self.reused += 1
+                    return connection, True
+                connection.close()
+        return self._new_connection(*key), False
+
+    def _checkin(self, key, connection):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.pool_size:
+                idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def _send(self, connection, method, path, body, headers):
+        if connection.sock is None:
+            connection.connect()
+            connection.sock.settimeout(self.read_timeout)
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Makes a request, returning (status, headers, body bytes). The
+        connection is kept for reuse unless the server asked to close it.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+
+        connection, reused = self._checkout(key)
+        try:
+            response, data = self._send(connection, method, path, body, headers or {})
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            # the server closed the idle connection, so try a fresh one
+            logger.debug(f"Reopening stale connection to {parts.hostname}")
+            connection = self._new_connection(*key)
+            try:
+                response, data = self._send(connection, method, path, body, headers or {})
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(key, connection)
+        return response.status, response.msg, data
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for connection, _ in idle:
+                    connection.close()
+            self._idle.clear()
+
+
+class PooledWebClient(slack_sdk.WebClient):
+    """
+    A WebClient which sends its requests through a transport (by default a
+    KeepAliveTransport) instead of opening a new connection with urlopen
+    for every call
+    """
+
+    def __init__(self, *args, transport=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transport = transport or KeepAliveTransport(
+            read_timeout=self.timeout, ssl_context=self.ssl
+        )
+
+    def _perform_urllib_http_request_internal(self, url, req):
+        # proxied requests are left to urllib
+        if self.proxy is not None or not url.lower().startswith("http"):
+            return super()._perform_urllib_http_request_internal(url, req)
+
+        status, headers, body = self.transport.request(
+            req.get_method(), url, body=req.data, headers=dict(req.header_items())
+        )
+        if status >= 400:
+            # WebClient handles error responses (e.g. 429s) as urlopen raises
+            # them
+            reason = http.client.responses.get(status, "")
+            raise HTTPError(url, status, reason, headers, io.BytesIO(body))
+
+        if headers.get_content_type() == "application/gzip":
+            return {"status": status, "headers": headers, "body": body}
+        charset = headers.get_content_charset() or "utf-8"
+        return {"status": status, "headers": headers, "body": body.decode(charset)}
+
+
+def create_web_client(
+    token,
+    base_url=None,
+    pooled=True,
+    pool_size=10,
+    connect_timeout=10,
+    read_timeout=30,
+):
+    """
+    Returns the WebClient a SlackClient uses to call the Slack API.
+
+    base_url points the client at another server implementing the Slack API
+    (e.g. the mock server the end to end tests run against). With pooled the
+    client keeps up to pool_size connections per host alive between calls.
+    """
+    kwargs = {"token": token, "timeout": read_timeout}
+    if base_url:
+        kwargs["base_url"] = base_url
+    if not pooled:
+        return slack_sdk.WebClient(**kwargs)
+
+    transport = KeepAliveTransport(
+        pool_size=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+    )
+    return PooledWebClient(transport=transport, **kwargs)
@@ -7,4 +7,6 @@ urlpatterns = [
     path("event", views.event, name="event"),
     path("cron_minute", views.cron_minute, name="cron_minute"),
     path("cron_daily", views.cron_daily, name="cron_daily"),
+    path("scheduler_status", views.scheduler_status, name="scheduler_status"),
+    path("event_status", views.event_status, name="event_status"),
 ]
@@ -2,18 +2,21 @@ import json
 import logging
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
 from response.core.models.incident import Incident
+from response.decorators import response_login_required
 from response.slack.authentication import slack_authenticate
 from response.slack.cache import update_user_cache
 from response.slack.decorators import (
+    dispatch_event,
     handle_action,
     handle_modal,
-    handle_event,
     handle_notifications,
+    handle_outbox,
 )
+from response.slack.decorators.event_handler import EventQueueFull, get_event_metrics
 from response.slack.modal_builder import (
     Modal,
     SelectFromUsers,
@@ -21,6 +24,8 @@ from response.slack.modal_builder import (
     Text,
     TextArea,
 )
+from response.slack.models import SlackEventReceipt
+from response.slack.scheduler import get_job_metrics, get_leader
 from response.slack.settings import INCIDENT_CREATE_MODAL
 
 logger = logging.getLogger(__name__)
@@ -61,6 +66,10 @@ def event(request):
 
     See here for reference: https://api.slack.com/events-api
 
+    Events are acknowledged as soon as they're queued, as Slack retries
+    deliveries that take more than a few seconds. Retries of events that
+    have already been received are ignored.
+
     @param request the request from slack containing an event
     @return: return a HTTP response to indicate the request was handled
     """
@@ -69,8 +78,17 @@ def event(request):
 
     logger.info(f"Handling Slack event of type '{action_type}'")
 
+    if "HTTP_X_SLACK_RETRY_NUM" in request.META:
+        logger.info(
+            f"Slack retry {request.META['HTTP_X_SLACK_RETRY_NUM']} of event {payload.get('event_id')} ({request.META.get('HTTP_X_SLACK_RETRY_REASON')})"
+        )
+
     if action_type == "event_callback":
-        handle_event(payload)
+        try:
+            dispatch_event(payload)
+        except EventQueueFull:
+            # Slack delivers the event again if it isn't acknowledged
+            return HttpResponse(status=503)
     elif action_type == "url_verification":
         # the url_verification event is called when we change the registered event callback url
         # in the Sl ack app configuration.  It expects us to return the challenge token sent in
@@ -84,6 +102,8 @@ def event(request):
 def cron_minute(request):
     "Handles actions that need to take place every minute"
     handle_notifications()
+    handle_outbox()
+    SlackEventReceipt.objects.prune()
     return HttpResponse()
 
 
@@ -92,3 +112,15 @@ def cron_daily(request):
     "Handles actions that need to take place every day"
     update_user_cache()
     return HttpResponse()
+
+
+@response_login_required
+def scheduler_status(request):
+    "Reports runtime metrics for the built-in scheduler's jobs, across all replicas"
+    return JsonResponse({"leader": get_leader(), "jobs": get_job_metrics()})
+
+
+@response_login_required
+def event_status(request):
+    "Reports the Slack event queue depth and handling metrics for this process"
+    return JsonResponse(get_event_metrics())
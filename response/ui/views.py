@@ -1,36 +1,193 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.paginator import Paginator
 from django.http import Http404, HttpRequest
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
 
-from response.core.models import Action, Incident
+from response.core.models import Action, ExternalUser, Incident, SearchDocument
 from response.decorators import response_login_required
-from response.slack.models import PinnedMessage, UserStats
+from response.slack.models import UserStats
+from response.slack.reference_utils import resolve_user_references
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+def _filter_incidents(params):
+    """
+    Applies the home page filters in params to the incident list, returning
+    the filtered queryset and the filters that were understood
+    """
+    incidents = Incident.objects.all()
+    filters = {}
+
+    status = params.get("status")
+    if status == "open":
+        incidents = incidents.filter(end_time__isnull=True)
+    elif status == "closed":
+        incidents = incidents.filter(end_time__isnull=False)
+    else:
+        status = ""
+    filters["status"] = status
+
+    severity = params.get("severity", "")
+    if severity in dict(Incident.SEVERITIES):
+        incidents = incidents.filter(severity=severity)
+    else:
+        severity = ""
+    filters["severity"] = severity
+
+    # compare against datetimes rather than incident_time__date, so the
+    # incident_time index can be used
+    since = _parse_date(params.get("since"))
+    if since:
+        incidents = incidents.filter(
+            incident_time__gte=datetime.combine(since, time.min)
+        )
+    filters["since"] = since.isoformat() if since else ""
+
+    until = _parse_date(params.get("until"))
+    if until:
+        incidents = incidents.filter(
+            incident_time__lt=datetime.combine(until + timedelta(days=1), time.min)
+        )
+    filters["until"] = until.isoformat() if until else ""
+
+    lead = params.get("lead", "")
+    if lead.isdigit():
+        incidents = incidents.filter(lead_id=lead)
+    else:
+        lead = ""
+    filters["lead"] = lead
+
+    # matched against the incidents' search documents, so the full-text
+    # index is used rather than scanning every name and summary (private
+    # incidents are never matched)
+    q = params.get("q", "").strip()
+    if q:
+        matches = SearchDocument.objects.search(
+            q,
+            source=SearchDocument.INCIDENT,
+            limit=getattr(settings, "RESPONSE_HOME_SEARCH_MAX_RESULTS", 500),
+        )
+        incidents = incidents.filter(pk__in=[match.incident_id for match in matches])
+    filters["q"] = q
+
+    return incidents, filters
 
 
 @response_login_required
 def home(request: HttpRequest):
-    incidents = Incident.objects.all
-    return render(request, template_name="home.html", context={"incidents": incidents})
+    incidents, filters = _filter_incidents(request.GET)
+    paginator = Paginator(
+        incidents.order_by("-incident_time", "-pk"),
+        getattr(settings, "RESPONSE_HOME_PAGE_SIZE", 50),
+    )
+    page = paginator.get_page(request.GET.get("page"))
+
+    open_incidents = Incident.objects.open_summary()
+    # look up everyone mentioned up front, rather than once per incident as
+    # the names are rendered
+    resolve_user_references(
+        [incident.name for incident in page]
+        + [incident["name"] for incident in open_incidents]
+    )
+
+    # keep the filters when moving between pages
+    query = request.GET.copy()
+    query.pop("page", None)
+
+    return render(
+        request,
+        template_name="home.html",
+        context={
+            "open_incidents": open_incidents,
+            "page": page,
+            "filters": filters,
+            "filter_query": query.urlencode(),
+            "severities": Incident.SEVERITIES,
+            "leads": ExternalUser.objects.filter(lead__isnull=False)
+            .distinct()
+            .order_by("display_name"),
+        },
+    )
+
+
+def _incident_doc_version(request: HttpRequest, incident_id: str):
+    # shared by the ETag and Last-Modified checks, so the incident's only
+    # looked up once per request
+    if not hasattr(request, "_incident_doc_version"):
+        request._incident_doc_version = Incident.objects.doc_version(incident_id)
+    return request._incident_doc_version
+
+
+def _incident_doc_last_modified(request: HttpRequest, incident_id: str):
+    doc_version = _incident_doc_version(request, incident_id)
+    if doc_version is None:
+        return None
+    last_modified = doc_version[0]
+    if timezone.is_naive(last_modified):
+        last_modified = timezone.make_aware(last_modified)
+    return last_modified
+
+
+def _incident_doc_etag(request: HttpRequest, incident_id: str):
+    doc_version = _incident_doc_version(request, incident_id)
+    if doc_version is None:
+        return None
+    return f"incident-{incident_id}-{doc_version[1]}"
 
 
 @response_login_required
+@condition(etag_func=_incident_doc_etag, last_modified_func=_incident_doc_last_modified)
 def incident_doc(request: HttpRequest, incident_id: str):
     try:
-        incident = Incident.objects.get(pk=incident_id)
+        incident = Incident.objects.select_related("reporter", "lead").get(
+            pk=incident_id
+        )
     except Incident.DoesNotExist:
         raise Http404("Incident does not exist")
 
-    events = PinnedMessage.objects.filter(incident=incident).order_by("timestamp")
-    actions = Action.objects.filter(incident=incident).order_by("created_date")
-    user_stats = UserStats.objects.filter(incident=incident).order_by("-message_count")[
-        :5
-    ]
+    actions = (
+        Action.objects.filter(incident=incident)
+        .select_related("assigned_to")
+        .order_by("created_date")
+    )
+    user_stats = (
+        UserStats.objects.filter(incident=incident)
+        .select_related("user")
+        .order_by("-message_count")[:5]
+    )
+
+    def load_timeline_events():
+        timeline_events = list(incident.timeline_events())
+        # look up everyone mentioned in the doc up front, rather than once per
+        # mention as the text is rendered
+        resolve_user_references(
+            [incident.summary] + [e.text for e in timeline_events]
+        )
+        return timeline_events
+
     return render(
         request,
         template_name="incident_doc.html",
         context={
             "incident": incident,
-            "events": events,
             "actions": actions,
             "user_stats": user_stats,
+            # only loaded if the rendered timeline isn't already cached
+            "timeline_events": SimpleLazyObject(load_timeline_events),
+            "cache_seconds": getattr(
+                settings, "RESPONSE_INCIDENT_DOC_CACHE_SECONDS", 60 * 60
+            ),
         },
     )
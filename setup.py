@@ -30,4 +30,5 @@ setup(
     version=VERSION,
     packages=find_packages(exclude="demo"),
     install_requires=INSTALL_REQUIRES,
+    extras_require={"async": ["aiohttp>=3.8"]},
 )
@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIRequestFactory
 
 from tests.factories import ExternalUserFactory
@@ -13,3 +15,20 @@ def arf():
 def api_user(transactional_db):
     e = ExternalUserFactory()
     return e.owner
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Returns a function that calls a view and counts the queries it made, for
+    checking that list endpoints don't make queries per row
+    """
+
+    def _count_queries(view, request, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = view(request, **kwargs)
+            response.render()
+        assert response.status_code == 200, "Got non-200 response from API"
+        return len(context.captured_queries)
+
+    return _count_queries
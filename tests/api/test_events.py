@@ -2,6 +2,7 @@ import json
 from datetime import datetime, timedelta
 
 from django.urls import reverse
+from rest_framework.request import Request
 from rest_framework.test import force_authenticate
 
 from response.core.signals import ActionEventHandler, IncidentEventHandler
@@ -114,3 +115,109 @@ def test_omit_private_action(arf, api_user):
     assert "results" in content, "Response didn't have results key"
     events = content["results"]
     assert len(events) == 0, "Expected zero events"
+
+
+def list_events(arf, api_user, **params):
+    req = arf.get(reverse("event-list"), data=params)
+    force_authenticate(req, user=api_user)
+
+    response = EventsViewSet.as_view({"get": "list"})(req)
+    assert response.status_code == 200, "Got non-200 response from API"
+    return json.loads(response.rendered_content)
+
+
+def test_page_through_events_with_cursor(arf, api_user):
+    now = datetime.now()
+    # several events share a timestamp, so the id has to break ties
+    for i in range(25):
+        EventFactory(timestamp=now - timedelta(minutes=i // 3))
+
+    seen = []
+    content = list_events(arf, api_user, page_size=10)
+    while True:
+        seen += [event["id"] for event in content["results"]]
+        if not content["next"]:
+            break
+        content = list_events(arf, api_user, page_size=10, cursor=content["cursor"])
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+
+
+def test_events_since_cursor(arf, api_user):
+    EventFactory.create_batch(3, timestamp=datetime.now())
+
+    content = list_events(arf, api_user)
+    assert len(content["results"]) == 3
+    cursor = content["cursor"]
+
+    # nothing new, so we get the same cursor back to poll with
+    content = list_events(arf, api_user, cursor=cursor)
+    assert content["results"] == []
+    assert content["cursor"] == cursor
+
+    new_event = EventFactory(timestamp=datetime.now())
+    content = list_events(arf, api_user, cursor=cursor)
+    assert [event["id"] for event in content["results"]] == [new_event.id]
+
+
+def test_events_invalid_cursor(arf, api_user):
+    req = arf.get(reverse("event-list"), data={"cursor": "not-a-cursor"})
+    force_authenticate(req, user=api_user)
+
+    response = EventsViewSet.as_view({"get": "list"})(req)
+    assert response.status_code == 404
+
+
+def test_events_invalid_incident_id(arf, api_user):
+    req = arf.get(reverse("event-list"), data={"incident_id": "abc"})
+    force_authenticate(req, user=api_user)
+
+    response = EventsViewSet.as_view({"get": "list"})(req)
+    assert response.status_code == 400
+
+
+def test_stream_events(arf, api_user):
+    events = EventFactory.create_batch(3, timestamp=datetime.now())
+
+    req = arf.get(reverse("event-stream"))
+    force_authenticate(req, user=api_user)
+    response = EventsViewSet.as_view({"get": "stream"})(req)
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    streamed = [json.loads(line) for line in lines]
+    assert [event["id"] for event in streamed] == [event.id for event in events]
+    assert streamed[0]["payload"]["report"]
+
+    # carrying on from the last event's cursor returns nothing more
+    req = arf.get(reverse("event-stream"), data={"cursor": streamed[-1]["cursor"]})
+    force_authenticate(req, user=api_user)
+    response = EventsViewSet.as_view({"get": "stream"})(req)
+    assert b"".join(response.streaming_content) == b""
+
+
+def test_filter_events_by_incident_and_type(arf, api_user):
+    incident = IncidentFactory()
+    IncidentEventHandler.handle(None, incident)
+    ActionEventHandler.handle(None, ActionFactory.create(incident=incident))
+    IncidentEventHandler.handle(None, IncidentFactory())
+
+    content = list_events(arf, api_user, incident_id=incident.pk)
+    assert len(content["results"]) == 2
+    assert {event["incident_id"] for event in content["results"]} == {incident.pk}
+
+    content = list_events(
+        arf, api_user, incident_id=incident.pk, event_type="action_event"
+    )
+    assert [event["event_type"] for event in content["results"]] == ["action_event"]
+    assert content["results"][0]["payload"]["incident_id"] == incident.pk
+
+
+def test_events_wait_is_opt_in(arf, settings):
+    req = arf.get(reverse("event-list"), data={"cursor": "x", "wait": "10"})
+    view = EventsViewSet(request=Request(req))
+    assert view.get_wait_seconds() == 0
+
+    settings.RESPONSE_EVENTS_MAX_WAIT_SECONDS = 5
+    assert view.get_wait_seconds() == 5
@@ -287,3 +287,41 @@ def test_can_access_incident_logged_out_if_configured(client, db, settings):
     response = client.get(reverse("incident_doc", args=(incident.pk,)))
 
     assert response.status_code == 200
+
+
+def test_list_incidents_query_count_is_constant(arf, api_user, count_queries):
+    def list_incidents():
+        req = arf.get(reverse("incident-list"), {"limit": 100})
+        force_authenticate(req, user=api_user)
+        return count_queries(IncidentViewSet.as_view({"get": "list"}), req)
+
+    IncidentFactory.create_batch(2)
+    few = list_incidents()
+
+    IncidentFactory.create_batch(10)
+    many = list_incidents()
+
+    assert few == many
+
+
+def test_list_incidents_by_month_query_count_is_constant(
+    arf, api_user, count_queries
+):
+    now = datetime.datetime.now()
+    year, month = str(now.year), f"{now.month:02d}"
+
+    def list_incidents():
+        req = arf.get(
+            reverse("incidents-bymonth-list", kwargs={"year": year, "month": month})
+        )
+        force_authenticate(req, user=api_user)
+        view = IncidentsByMonthViewSet.as_view({"get": "list"})
+        return count_queries(view, req, year=year, month=month)
+
+    IncidentFactory.create_batch(2, incident_time=now)
+    few = list_incidents()
+
+    IncidentFactory.create_batch(10, incident_time=now)
+    many = list_incidents()
+
+    assert few == many
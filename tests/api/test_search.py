@@ -0,0 +1,115 @@
+import json
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import force_authenticate
+
+from response.core.models import Action, SearchDocument, TimelineEvent
+from response.core.views import SearchViewSet
+from response.slack.incident_commands.incident_commands import search_incidents
+from tests.factories import IncidentFactory
+
+
+@pytest.fixture
+def incident(db):
+    incident = IncidentFactory.create(
+        name="Database failover",
+        summary="Primary database ran out of disk",
+        severity="2",
+    )
+    # the factory doesn't send save signals
+    incident.save()
+    return incident
+
+
+def search(arf, api_user, **params):
+    req = arf.get(reverse("search-list"), params)
+    force_authenticate(req, user=api_user)
+    response = SearchViewSet.as_view({"get": "list"})(req)
+    return response.status_code, json.loads(response.rendered_content)
+
+
+def test_search_finds_incident(arf, api_user, incident):
+    status, content = search(arf, api_user, q="failover")
+
+    assert status == 200
+    assert [(r["incident_id"], r["source"]) for r in content["results"]] == [
+        (incident.pk, SearchDocument.INCIDENT)
+    ]
+    assert content["results"][0]["incident_name"] == "Database failover"
+
+
+def test_search_matches_all_words_and_prefixes(arf, api_user, incident):
+    _, content = search(arf, api_user, q="database dis")
+    assert len(content["results"]) == 1
+
+    _, content = search(arf, api_user, q="database network")
+    assert content["results"] == []
+
+
+def test_search_index_follows_timeline_and_actions(arf, api_user, incident):
+    event = TimelineEvent.objects.create(
+        incident=incident, text="Restarted the kubelet", event_type="text"
+    )
+    action = Action.objects.create(incident=incident, details="Tune kubelet memory")
+
+    _, content = search(arf, api_user, q="kubelet")
+    sources = {(r["source"], r["object_id"]) for r in content["results"]}
+    assert (SearchDocument.TIMELINE_EVENT, event.pk) in sources
+    assert (SearchDocument.ACTION, action.pk) in sources
+
+    event.text = "Restarted the node"
+    event.save()
+    action_pk = action.pk
+    action.delete()
+
+    _, content = search(arf, api_user, q="kubelet")
+    sources = {(r["source"], r["object_id"]) for r in content["results"]}
+    assert (SearchDocument.TIMELINE_EVENT, event.pk) not in sources
+    assert (SearchDocument.ACTION, action_pk) not in sources
+
+    _, content = search(arf, api_user, q="node")
+    assert [r["object_id"] for r in content["results"]] == [event.pk]
+
+
+def test_search_ranks_better_matches_first(arf, api_user, incident):
+    other = IncidentFactory.create(
+        name="Cards declined", summary="Database slow", severity="2"
+    )
+    other.save()
+
+    _, content = search(arf, api_user, q="database")
+
+    assert [r["incident_id"] for r in content["results"]][:2] == [incident.pk, other.pk]
+
+
+def test_search_skips_private_incidents(arf, api_user, incident):
+    incident.private = True
+    incident.save()
+
+    _, content = search(arf, api_user, q="failover")
+    assert content["results"] == []
+
+
+def test_search_within_incident(arf, api_user, incident):
+    other = IncidentFactory.create(name="Another failover", severity="2")
+    other.save()
+
+    _, content = search(arf, api_user, q="failover", incident_id=other.pk)
+    assert [r["incident_id"] for r in content["results"]] == [other.pk]
+
+
+def test_search_requires_query(arf, api_user, db):
+    status, _ = search(arf, api_user, q=" ")
+    assert status == 400
+
+
+def test_search_command(incident):
+    respond = mock.Mock()
+
+    handled, response = search_incidents(incident, "U123", "failover", respond)
+
+    assert handled
+    text = respond.call_args.args[0]
+    assert f"Incident {incident.pk}: Database failover" in text
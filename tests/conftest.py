@@ -8,7 +8,10 @@ from django.conf import settings
 from django.urls import reverse
 
 from response.slack.authentication import generate_signature
+from response.slack.cache import profile_cache, usergroup_cache
 from response.slack.client import SlackClient
+from response.slack.models.comms_channel import forget_comms_channels
+from response.slack.models.user_stats import forget_slack_users
 
 
 @pytest.fixture(autouse=True)
@@ -20,6 +23,35 @@ def mock_slack(monkeypatch):
     return mock_slack
 
 
+@pytest.fixture(autouse=True)
+def slack_outbox_sync(monkeypatch):
+    # Send Slack side-effects immediately rather than via the outbox workers
+    monkeypatch.setattr(settings, "RESPONSE_SLACK_OUTBOX_ASYNC", False, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def slack_events_sync(monkeypatch):
+    # Handle Slack events in the request rather than on the event workers
+    monkeypatch.setattr(settings, "RESPONSE_SLACK_EVENTS_ASYNC", False, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def slack_pipeline_sync(monkeypatch):
+    # Run pipeline steps one after another in the test's thread, so they see
+    # the test's transaction
+    monkeypatch.setattr(settings, "RESPONSE_SLACK_PIPELINE_WORKERS", 0, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def clear_user_profile_cache():
+    # the database is rolled back between tests without sending any signals
+    yield
+    profile_cache.clear()
+    forget_slack_users()
+    forget_comms_channels()
+    usergroup_cache.clear()
+
+
 @pytest.fixture(scope="session")
 def slack_signing_secret():
     return os.getenv("SLACK_SIGNING_SECRET", "signingsecretnotset")
@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from response.core.models import Action, Incident, TimelineEvent
+from tests.factories import ExternalUserFactory, IncidentFactory
+
+
+@pytest.fixture
+def incident(db):
+    incident = IncidentFactory.create(severity="2", end_time=None)
+    return Incident.objects.get(pk=incident.pk)
+
+
+def test_loaded_incident_is_clean(incident):
+    assert incident.get_dirty_fields() == {}
+    assert not incident.is_dirty()
+
+
+def test_dirty_fields_have_previous_values(incident):
+    old_lead_id = incident.lead_id
+    incident.severity = "1"
+    incident.lead = ExternalUserFactory()
+
+    assert incident.get_dirty_fields() == {"severity": "2", "lead": old_lead_id}
+    assert incident.is_dirty("severity")
+    assert not incident.is_dirty("name")
+
+    previous = incident.previous_state()
+    assert previous.severity == "2"
+    assert previous.lead_id == old_lead_id
+
+
+def test_saving_clears_dirty_fields(incident):
+    incident.severity = "1"
+    incident.save()
+
+    assert incident.get_dirty_fields() == {}
+    assert incident.previous_state().severity == "1"
+
+
+def test_save_without_previous_state_query(incident):
+    incident.name = "Renamed"
+
+    with CaptureQueriesContext(connection) as queries:
+        incident.save()
+
+    # the receivers used to fetch the previous state before the UPDATE
+    sql = [q["sql"] for q in queries.captured_queries]
+    update = next(i for i, q in enumerate(sql) if q.startswith('UPDATE "response_incident"'))
+    assert not [
+        q
+        for q in sql[:update]
+        if q.startswith("SELECT") and 'FROM "response_incident"' in q
+    ]
+    assert TimelineEvent.objects.filter(
+        incident=incident, metadata__contains="incident_name"
+    ).exists()
+
+
+def test_save_dirty_writes_changed_columns(incident, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        assert not incident.save_dirty()
+
+    Incident.objects.filter(pk=incident.pk).update(summary="Changed elsewhere")
+    incident.status_update_next = "30"
+    assert incident.save_dirty()
+
+    incident.refresh_from_db()
+    assert incident.status_update_next == "30"
+    # columns that weren't changed here aren't overwritten
+    assert incident.summary == "Changed elsewhere"
+
+
+def test_action_receivers_skip_unrelated_changes(incident):
+    action = Action.objects.create(incident=incident, details="Check the logs")
+    events = TimelineEvent.objects.filter(incident=incident).count()
+
+    action.details = "Check all the logs"
+    action.save()
+    assert TimelineEvent.objects.filter(incident=incident).count() == events
+
+    action.assigned_to = ExternalUserFactory()
+    action.save()
+    assert TimelineEvent.objects.filter(incident=incident).count() == events + 1
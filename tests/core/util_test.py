@@ -1,8 +1,13 @@
+from datetime import datetime
 from unittest import mock
 
+import bleach
+import bleach_whitelist
 import pytest
 
-from response.core.util import sanitize
+from response.core.models import TimelineEvent
+from response.core.util import sanitize, sanitize_many
+from tests.factories import IncidentFactory
 
 
 def test_sanitise_handles_none():
@@ -13,6 +18,64 @@ def test_sanitise_handles_none():
 
 
 def test_sanitise_sends_sends_to_bleach():
-    with mock.patch("bleach.clean", return_value="good text string"):
+    with mock.patch.object(bleach.Cleaner, "clean", return_value="good text string"):
         actual = sanitize("bad text string")
         assert actual == "good text string"
+
+
+def test_sanitize_many():
+    assert sanitize_many(["<script>x</script>", None, "fine"]) == [
+        "&lt;script&gt;x&lt;/script&gt;",
+        None,
+        "fine",
+    ]
+
+
+def test_sanitize_matches_bleach_clean():
+    text = "<@U0ABC> in <#C0ABC|inc-x> <b>ok</b> <script>x</script> a & b"
+    expected = bleach.clean(
+        text,
+        tags=bleach_whitelist.markdown_tags,
+        attributes=bleach_whitelist.markdown_attrs,
+        css_sanitizer=bleach_whitelist.all_styles,
+    )
+
+    assert sanitize(text) == expected
+    assert sanitize_many([text]) == [expected]
+
+
+@pytest.fixture
+def incident(db):
+    return IncidentFactory.create(severity="2")
+
+
+def test_unchanged_fields_are_not_sanitized_again(incident):
+    event = TimelineEvent(incident=incident, text="<b>bold</b>", event_type="text")
+    event.save()
+    event = TimelineEvent.objects.get(pk=event.pk)
+
+    with mock.patch.object(bleach.Cleaner, "clean", side_effect=lambda s: s) as clean:
+        event.event_type = "slack_pin"
+        event.save()
+        assert clean.call_count == 0
+
+        event.text = "<i>changed</i>"
+        event.save()
+        assert clean.call_count == 1
+
+
+def test_bulk_create_sanitizes(incident):
+    TimelineEvent.objects.bulk_create(
+        [
+            TimelineEvent(
+                incident=incident,
+                timestamp=datetime.now(),
+                text="<script>alert(1)</script>",
+                event_type="import",
+            )
+        ]
+    )
+
+    assert TimelineEvent.objects.get(incident=incident, event_type="import").text == (
+        "&lt;script&gt;alert(1)&lt;/script&gt;"
+    )
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+import slack_sdk
+
+from response.slack.async_client import AsyncSlackClient
+from response.slack.client import SlackError
+from response.slack.rate_limit import RateLimiter
+
+
+def slack_error(error):
+    response = slack_sdk.web.SlackResponse(
+        client=None,
+        http_verb="POST",
+        api_url="https://slack.com/api/test",
+        req_args={},
+        data={"ok": False, "error": error},
+        headers={},
+        status_code=429 if error == "ratelimited" else 200,
+    )
+    return slack_sdk.errors.SlackApiError(error, response)
+
+
+class FakeAsyncWebClient(object):
+    "Records calls and answers them after yielding to the event loop"
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.errors = []
+        self.bookmarks = []
+
+    async def _call(self, method, kwargs, response):
+        self.calls.append((method, kwargs))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.errors:
+                raise self.errors.pop(0)
+            return response
+        finally:
+            self.in_flight -= 1
+
+    async def users_info(self, **kwargs):
+        user = {
+            "name": "spengler",
+            "deleted": False,
+            "profile": {"real_name": "Egon Spengler"},
+        }
+        return await self._call("users_info", kwargs, {"ok": True, "user": user})
+
+    async def chat_postMessage(self, **kwargs):
+        return await self._call("chat_postMessage", kwargs, {"ok": True})
+
+    async def conversations_invite(self, **kwargs):
+        return await self._call("conversations_invite", kwargs, {"ok": True})
+
+    async def bookmarks_list(self, **kwargs):
+        response = slack_sdk.web.SlackResponse(
+            client=None,
+            http_verb="POST",
+            api_url="https://slack.com/api/bookmarks.list",
+            req_args={},
+            data={"ok": True, "bookmarks": self.bookmarks},
+            headers={},
+            status_code=200,
+        )
+        return await self._call("bookmarks_list", kwargs, response)
+
+    async def bookmarks_add(self, **kwargs):
+        return await self._call("bookmarks_add", kwargs, {"ok": True})
+
+    async def bookmarks_edit(self, **kwargs):
+        return await self._call("bookmarks_edit", kwargs, {"ok": True})
+
+
+@pytest.fixture
+def web_client():
+    return FakeAsyncWebClient()
+
+
+@pytest.fixture
+def async_client(web_client):
+    c = AsyncSlackClient(
+        "test-token",
+        web_client=web_client,
+        retry_base_backoff_seconds=0.01,
+        rate_limiter=RateLimiter(method_tiers={}, default_tier=(1000, 1000)),
+    )
+    yield c
+    c.close()
+
+
+def test_sync_facade(async_client):
+    profile = async_client.get_user_profile("W012A3CDE")
+
+    assert profile["name"] == "spengler"
+    assert profile["fullname"] == "Egon Spengler"
+
+
+def test_retries_with_backoff(async_client, web_client):
+    web_client.errors = [slack_error("ratelimited"), slack_error("ratelimited")]
+
+    assert async_client.send_message("C1", "hello") == {"ok": True}
+    assert len(web_client.calls) == 3
+    assert async_client.get_stats()["retried"] == 2
+
+
+def test_errors_are_raised(async_client, web_client):
+    web_client.errors = [slack_error("channel_not_found")]
+
+    with pytest.raises(SlackError) as e:
+        async_client.send_message("C1", "hello")
+    assert e.value.slack_error == "channel_not_found"
+
+
+def test_send_messages_concurrently(async_client, web_client):
+    async_client.send_messages(
+        [{"channel_id": f"C{i}", "text": "hello"} for i in range(5)]
+    )
+
+    assert len(web_client.calls) == 5
+    assert web_client.max_in_flight == 5
+
+
+def test_invite_chunks_concurrently(async_client, web_client):
+    user_ids = [f"U{i}" for i in range(2500)]
+    web_client.errors = [slack_error("already_in_channel")]
+
+    responses = async_client.invite_users_to_channel(user_ids, "C1")
+
+    assert len(responses) == 2
+    assert web_client.max_in_flight == 3
+    assert sorted(len(kwargs["users"]) for _, kwargs in web_client.calls) == [
+        500,
+        1000,
+        1000,
+    ]
+
+
+def test_sync_channel_bookmarks(async_client, web_client):
+    web_client.bookmarks = [{"id": "B1", "title": "Severity: MAJOR"}]
+
+    async_client.sync_channel_bookmarks(
+        "C1",
+        [
+            {"prefix": "Severity:", "title": "Severity: CRITICAL", "link": "https://x"},
+            {"prefix": "Status:", "title": "Status: LIVE", "link": "https://x"},
+        ],
+    )
+
+    methods = {method: kwargs for method, kwargs in web_client.calls}
+    assert methods["bookmarks_edit"]["bookmark_id"] == "B1"
+    assert methods["bookmarks_add"]["title"] == "Status: LIVE"
+    assert web_client.max_in_flight == 2
+
+
+def test_blocking_inside_the_loop_is_refused(async_client):
+    async def block():
+        async_client.send_message("C1", "hello")
+
+    with pytest.raises(RuntimeError):
+        async_client.run(block())
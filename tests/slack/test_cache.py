@@ -2,10 +2,19 @@ import pytest
 
 from response.core.models import ExternalUser
 from response.slack.cache import (
+    MISSING,
+    UsergroupCache,
+    UserProfileCache,
     get_user_profile,
     get_user_profile_by_email,
+    get_user_profiles,
+    get_usergroup_id,
+    get_usergroup_users,
+    invite_usergroup_to_channel,
     update_user_cache,
 )
+from response.slack.client import SlackClient, SlackError
+from response.slack.decorators.event_handler import handle_event
 from tests.slack.slack_payloads import (
     users_list_new,
     users_list_page_1,
@@ -196,3 +205,210 @@ def test_get_user_profile_by_email_in_cache(mock_slack):
 
     # check cache is unchanged
     assert len(ExternalUser.objects.all()) == 1
+
+
+@pytest.mark.django_db
+def test_update_cache_only_writes_changed_users(mock_slack):
+    mock_slack.get_paginated_users.return_value = users_list_response
+
+    report = update_user_cache()
+    assert report["created"] == 2
+
+    ExternalUser.objects.filter(external_id="U12345678").update(display_name="Glinda")
+    report = update_user_cache()
+
+    assert report["created"] == 0
+    assert report["updated"] == 1
+    assert report["unchanged"] == 1
+    assert (
+        ExternalUser.objects.get(external_id="U12345678").display_name
+        == "Glinda the Fairly Good"
+    )
+
+
+@pytest.mark.django_db
+def test_update_cache_queries_per_page_are_constant(
+    mock_slack, django_assert_max_num_queries
+):
+    mock_slack.get_paginated_users.return_value = users_list_response
+    update_user_cache()
+    ExternalUser.objects.update(display_name="stale")
+
+    many_users = dict(users_list_response)
+    many_users["members"] = users_list_response["members"] + [
+        dict(user, id=f"{user['id']}{i}")
+        for i in range(100)
+        for user in users_list_response["members"]
+    ]
+    mock_slack.get_paginated_users.return_value = many_users
+
+    # a select, a bulk insert (in two batches on SQLite) and a bulk update,
+    # plus the savepoint
+    with django_assert_max_num_queries(6):
+        report = update_user_cache()
+    assert report["created"] == 200
+    assert report["updated"] == 2
+
+
+@pytest.mark.django_db
+def test_get_user_profile_is_cached_in_memory(mock_slack, django_assert_num_queries):
+    ExternalUser.objects.create(external_id="U12345678", display_name="spengler")
+    get_user_profile("U12345678")
+
+    with django_assert_num_queries(0):
+        assert get_user_profile("U12345678")["name"] == "spengler"
+
+
+@pytest.mark.django_db
+def test_get_user_profile_sees_edits(mock_slack, django_capture_on_commit_callbacks):
+    user = ExternalUser.objects.create(external_id="U12345678", display_name="spengler")
+    get_user_profile("U12345678")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.display_name = "egon"
+        user.save()
+
+    assert get_user_profile("U12345678")["name"] == "egon"
+
+
+@pytest.mark.django_db
+def test_update_cache_invalidates_profiles(mock_slack):
+    ExternalUser.objects.create(
+        app_id="slack", external_id="U12345678", display_name="Glinda"
+    )
+    assert get_user_profile("U12345678")["name"] == "Glinda"
+
+    mock_slack.get_paginated_users.return_value = users_list_response
+    update_user_cache()
+
+    assert get_user_profile("U12345678")["name"] == "Glinda the Fairly Good"
+
+
+@pytest.mark.django_db
+def test_unknown_user_is_negatively_cached(mock_slack):
+    mock_slack.get_user_profile.side_effect = SlackError(
+        "not found", slack_error="user_not_found"
+    )
+
+    for _ in range(2):
+        with pytest.raises(SlackError):
+            get_user_profile("U0BADBAD")
+    assert mock_slack.get_user_profile.call_count == 1
+
+    assert get_user_profiles(["U0BADBAD"]) == {}
+    assert mock_slack.get_user_profile.call_count == 1
+
+
+@pytest.mark.django_db
+def test_get_user_profiles_uses_one_query(mock_slack, django_assert_num_queries):
+    for i in range(5):
+        ExternalUser.objects.create(external_id=f"U{i}", display_name=f"user{i}")
+
+    with django_assert_num_queries(1):
+        profiles = get_user_profiles([f"U{i}" for i in range(5)] + ["U0", None])
+
+    assert {i: p["name"] for i, p in profiles.items()} == {
+        f"U{i}": f"user{i}" for i in range(5)
+    }
+    mock_slack.get_user_profile.assert_not_called()
+
+
+def test_user_profile_cache_evicts_least_recently_used():
+    cache = UserProfileCache(max_size=2)
+    cache.set("U1", {"id": "U1"})
+    cache.set("U2", {"id": "U2"})
+    cache.get_many(["U1"])
+    cache.set("U3", MISSING)
+
+    assert set(cache.get_many(["U1", "U2", "U3"])) == {"U1", "U3"}
+
+
+def test_user_profile_cache_expires_entries():
+    cache = UserProfileCache(ttl_seconds=-1)
+    cache.set("U1", {"id": "U1"})
+
+    assert cache.get_many(["U1"]) == {}
+
+
+def test_user_profile_cache_shares_through_django_cache():
+    first = UserProfileCache(backend="default")
+    second = UserProfileCache(backend="default")
+    first.set("U1", {"id": "U1"})
+
+    assert second.get_many(["U1"]) == {"U1": {"id": "U1"}}
+
+    first.invalidate(["U1"])
+    second.clear()
+    assert second.get_many(["U1"]) == {}
+
+
+USERGROUPS = [
+    {"id": "S1", "handle": "oncall", "users": ["U1", "U2"]},
+    {"id": "S2", "handle": "platform", "users": ["U3"]},
+]
+
+
+def test_usergroups_are_listed_once(mock_slack):
+    mock_slack.list_usergroups.return_value = USERGROUPS
+
+    assert get_usergroup_id("oncall") == "S1"
+    assert get_usergroup_users("S1") == ["U1", "U2"]
+    assert get_usergroup_id("missing") is None
+
+    mock_slack.list_usergroups.assert_called_once_with(include_users=True)
+
+
+def test_client_usergroup_lookups_use_cache(mock_slack):
+    mock_slack.list_usergroups.return_value = USERGROUPS
+    client = SlackClient("test-token")
+
+    assert client.get_usergroup_id("oncall") == "S1"
+    assert client.get_usergroup_users("S1") == ["U1", "U2"]
+
+    mock_slack.list_usergroups.assert_called_once_with(include_users=True)
+
+
+def test_usergroup_cache_refreshes_after_ttl(mock_slack):
+    mock_slack.list_usergroups.return_value = USERGROUPS
+    cache = UsergroupCache(ttl_seconds=-1)
+
+    cache.get_id("oncall")
+    cache.get_id("oncall")
+
+    assert mock_slack.list_usergroups.call_count == 2
+
+
+def test_usergroup_events_update_cache(mock_slack):
+    mock_slack.list_usergroups.return_value = USERGROUPS
+    get_usergroup_id("oncall")
+
+    handle_event(
+        {
+            "event": {
+                "type": "subteam_updated",
+                "subteam": {"id": "S1", "handle": "firefighters", "users": ["U1"]},
+            }
+        }
+    )
+    assert get_usergroup_id("oncall") is None
+    assert get_usergroup_id("firefighters") == "S1"
+
+    handle_event(
+        {
+            "event": {
+                "type": "subteam_members_changed",
+                "subteam_id": "S1",
+                "added_users": ["U4"],
+                "removed_users": ["U1"],
+            }
+        }
+    )
+    assert get_usergroup_users("S1") == ["U4"]
+    mock_slack.list_usergroups.assert_called_once()
+
+
+def test_invite_usergroup_to_channel(mock_slack):
+    mock_slack.list_usergroups.return_value = USERGROUPS
+
+    assert invite_usergroup_to_channel("S1", "C1") == ["U1", "U2"]
+    mock_slack.invite_users_to_channel.assert_called_once_with(["U1", "U2"], "C1")
@@ -0,0 +1,125 @@
+from unittest import mock
+
+import pytest
+import slack_sdk
+
+from response.slack import client
+from response.slack.decorators.event_handler import handle_event
+from response.slack.models import SlackChannel
+
+
+@pytest.fixture
+def slack_api_mock():
+    api = mock.Mock(spec=slack_sdk.WebClient)
+    for name in ("conversations_list", "conversations_info", "conversations_create"):
+        getattr(api, name).__name__ = name
+    return api
+
+
+@pytest.fixture
+def slack_client(db, slack_api_mock):
+    c = client.SlackClient(
+        "test-token", channel_directory=SlackChannel.objects, channel_page_size=2
+    )
+    c.client = slack_api_mock
+    return c
+
+
+def channel(channel_id, name, is_archived=False):
+    return {"id": channel_id, "name": name, "is_archived": is_archived}
+
+
+def channels_page(channels, next_cursor=""):
+    return {
+        "ok": True,
+        "channels": channels,
+        "response_metadata": {"next_cursor": next_cursor},
+    }
+
+
+def test_scan_records_channels(slack_client, slack_api_mock):
+    slack_api_mock.conversations_list.side_effect = [
+        channels_page([channel("C1", "general"), channel("C2", "random")], "page2"),
+        channels_page([channel("C3", "inc-1"), channel("C4", "inc-2")], "page3"),
+    ]
+
+    assert slack_client.get_channel_id("inc-1") == "C3"
+
+    # stops at the page with the channel on it
+    assert slack_api_mock.conversations_list.call_count == 2
+    assert slack_api_mock.conversations_list.call_args.kwargs["limit"] == 2
+    assert SlackChannel.objects.lookup("random") == ("C2", False)
+    assert SlackChannel.objects.lookup("inc-2") == ("C4", False)
+
+
+def test_known_channel_skips_scan(slack_client, slack_api_mock):
+    SlackChannel.objects.record([channel("C3", "inc-1")])
+    slack_api_mock.conversations_info.return_value = {
+        "ok": True,
+        "channel": channel("C3", "inc-1"),
+    }
+
+    assert slack_client.get_channel_id("inc-1") == "C3"
+    slack_api_mock.conversations_list.assert_not_called()
+
+
+def test_renamed_channel_falls_back_to_scan(slack_client, slack_api_mock):
+    SlackChannel.objects.record([channel("C3", "inc-1")])
+    slack_api_mock.conversations_info.return_value = {
+        "ok": True,
+        "channel": channel("C3", "inc-1-renamed"),
+    }
+    slack_api_mock.conversations_list.return_value = channels_page(
+        [channel("C9", "inc-1")]
+    )
+
+    assert slack_client.get_channel_id("inc-1") == "C9"
+    assert SlackChannel.objects.lookup("inc-1-renamed") == ("C3", False)
+
+
+def test_archived_channel_is_unarchived(slack_client, slack_api_mock):
+    SlackChannel.objects.record([channel("C3", "inc-1", is_archived=True)])
+    slack_api_mock.conversations_info.return_value = {
+        "ok": True,
+        "channel": channel("C3", "inc-1", is_archived=True),
+    }
+    slack_api_mock.conversations_unarchive.__name__ = "conversations_unarchive"
+
+    assert slack_client.get_channel_id("inc-1", auto_unarchive=True) == "C3"
+    slack_api_mock.conversations_unarchive.assert_called_once_with(channel="C3")
+
+
+def test_scan_without_cursor_stops(slack_client, slack_api_mock):
+    slack_api_mock.conversations_list.return_value = {"ok": True, "channels": []}
+
+    with pytest.raises(client.SlackError):
+        slack_client.get_channel_id("missing")
+    assert slack_api_mock.conversations_list.call_count == 1
+
+
+def test_created_channels_are_recorded(slack_client, slack_api_mock):
+    slack_api_mock.conversations_create.return_value = {
+        "ok": True,
+        "channel": {"id": "C5"},
+    }
+
+    slack_client.get_or_create_channel("inc-new")
+    assert SlackChannel.objects.lookup("inc-new") == ("C5", False)
+
+
+def test_channel_events_update_directory(db):
+    handle_event(
+        {"event": {"type": "channel_created", "channel": channel("C1", "new-channel")}}
+    )
+    assert SlackChannel.objects.lookup("new-channel") == ("C1", False)
+
+    handle_event(
+        {"event": {"type": "channel_rename", "channel": channel("C1", "renamed")}}
+    )
+    assert SlackChannel.objects.lookup("new-channel") is None
+
+    handle_event({"event": {"type": "channel_archive", "channel": "C1"}})
+    assert SlackChannel.objects.lookup("renamed") == ("C1", True)
+
+    handle_event({"event": {"type": "channel_deleted", "channel": "C1"}})
+    assert SlackChannel.objects.lookup("renamed") is None
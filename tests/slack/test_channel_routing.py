@@ -0,0 +1,76 @@
+from unittest import mock
+
+import pytest
+
+from response.slack.decorators import event_handler
+from response.slack.decorators.event_handler import handle_event
+from response.slack.models import CommsChannel
+from tests.factories import IncidentFactory
+
+
+@pytest.fixture
+def comms_channel(db):
+    incident = IncidentFactory.create(severity="2")
+    return CommsChannel.objects.get(incident=incident)
+
+
+@pytest.fixture
+def test_event_handler(monkeypatch):
+    handler = mock.Mock()
+    monkeypatch.setitem(event_handler.EVENT_MAPPINGS, "test_event", [handler])
+    return handler
+
+
+def event_payload(channel_id):
+    return {"event": {"type": "test_event", "channel": channel_id}}
+
+
+def test_routes_to_incident(comms_channel):
+    incident = CommsChannel.objects.incident_for_channel(comms_channel.channel_id)
+    assert incident == comms_channel.incident
+
+
+def test_unrelated_channel_is_cached(
+    db, test_event_handler, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        handle_event(event_payload("C-NOT-AN-INCIDENT"))
+
+    with django_assert_num_queries(0):
+        handle_event(event_payload("C-NOT-AN-INCIDENT"))
+
+    test_event_handler.assert_not_called()
+
+
+def test_incident_channel_route_is_cached(
+    comms_channel, test_event_handler, django_assert_num_queries
+):
+    CommsChannel.objects.incident_id_for_channel(comms_channel.channel_id)
+
+    # only the incident itself is fetched
+    with django_assert_num_queries(1):
+        handle_event(event_payload(comms_channel.channel_id))
+
+    test_event_handler.assert_called_once()
+    assert test_event_handler.call_args.args[0] == comms_channel.incident
+
+
+def test_negative_routes_expire(db, settings):
+    settings.RESPONSE_CHANNEL_ROUTE_NEGATIVE_SECONDS = 0
+    incident = IncidentFactory.create(severity="2")
+    assert CommsChannel.objects.incident_id_for_channel("C-LATER") is None
+
+    # e.g. the channel was linked to an incident by another process
+    CommsChannel.objects.filter(incident=incident).update(channel_id="C-LATER")
+    assert CommsChannel.objects.incident_id_for_channel("C-LATER") == incident.pk
+
+
+def test_saving_channel_invalidates_route(db, django_capture_on_commit_callbacks):
+    incident = IncidentFactory.create(severity="2")
+    assert CommsChannel.objects.incident_id_for_channel("C-NEW") is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        CommsChannel.objects.filter(incident=incident).update(channel_id="C-NEW")
+        incident.comms_channel().save()
+
+    assert CommsChannel.objects.incident_id_for_channel("C-NEW") == incident.pk
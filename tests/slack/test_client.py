@@ -2,79 +2,163 @@ from unittest import mock
 
 import pytest
 import slack_sdk
-from django.conf import settings
 
 from response.slack import client
+from response.slack.rate_limit import FileRateLimitStore, RateLimiter
 from tests.slack.slack_payloads import user_by_email
 
 
 @pytest.fixture
-def slack_api_mock(monkeypatch):
-    client_mock = mock.Mock(spec=slack_sdk.WebClient)
-    monkeypatch.setattr(settings.SLACK_CLIENT, "client", client_mock)
-    return client_mock
+def sleeps(monkeypatch):
+    # record backoffs rather than waiting for them
+    sleep_mock = mock.Mock()
+    monkeypatch.setattr(client.time, "sleep", sleep_mock)
+    return sleep_mock
 
 
 @pytest.fixture
-def slack_client(slack_api_mock):
-    # We set the backoff ridiculously low so that we're not hanging around
-    # waiting for retries in tests
-    c = client.WebClient("test-token", retry_base_backoff_seconds=0.0000001)
+def slack_api_mock():
+    return mock.Mock(spec=slack_sdk.WebClient)
+
+
+@pytest.fixture
+def slack_client(slack_api_mock, sleeps):
+    c = client.SlackClient("test-token", retry_base_backoff_seconds=1)
     c.client = slack_api_mock
     return c
 
 
-def test_slack_api_call_success(slack_client, slack_api_mock):
+def api_method(name, *responses):
+    method = mock.Mock(side_effect=list(responses))
+    method.__name__ = name
+    return method
+
+
+def slack_error(error, headers=None):
+    response = slack_sdk.web.SlackResponse(
+        client=None,
+        http_verb="POST",
+        api_url="https://slack.com/api/test",
+        req_args={},
+        data={"ok": False, "error": error},
+        headers=headers or {},
+        status_code=429 if error == "ratelimited" else 200,
+    )
+    return slack_sdk.errors.SlackApiError(error, response)
+
+
+def test_slack_api_call_success(slack_client):
     expected_resp = {"ok": True, "response": "bar"}
-    slack_api_mock.api_call.return_value = expected_resp
+    method = api_method("users_info", expected_resp)
 
-    resp = slack_client.api_call("test_endpoint", "arg1", kwarg2="foo")
+    resp = slack_client.api_call(method, "arg1", kwarg2="foo")
     assert resp == expected_resp
-    slack_api_mock.api_call.assert_called_with("test_endpoint", "arg1", kwarg2="foo")
+    method.assert_called_with("arg1", kwarg2="foo")
 
 
-def test_slack_api_call_error(slack_client, slack_api_mock):
-    slack_api_mock.api_call.return_value = {"ok": False, "error": "test_error"}
+def test_slack_api_call_error(slack_client):
+    method = api_method("users_info", slack_error("test_error"))
 
     with pytest.raises(client.SlackError) as e:
-        slack_client.api_call("test_endpoint", "arg1", kwarg2="foo")
-        assert e.slack_error == "test_error"
+        slack_client.api_call(method, "arg1", kwarg2="foo")
+    assert e.value.slack_error == "test_error"
 
-    slack_api_mock.api_call.assert_called_with("test_endpoint", "arg1", kwarg2="foo")
+    assert method.call_count == 1
+    assert slack_client.get_stats()["failed"] == 1
 
 
-def test_slack_backoff_rate_limit_succeeded(slack_client, slack_api_mock):
+def test_slack_backoff_rate_limit_succeeded(slack_client, sleeps):
     expected_resp = {"ok": True, "response": "bar"}
-    slack_api_mock.api_call.side_effect = [
-        {"ok": False, "error": "ratelimited"},
-        {"ok": False, "error": "ratelimited"},
-        {"ok": False, "error": "ratelimited"},
-        {"ok": False, "error": "ratelimited"},
-        {"ok": False, "error": "ratelimited"},
-        expected_resp,
-    ]
+    method = api_method(
+        "users_info", *[slack_error("ratelimited") for _ in range(5)], expected_resp
+    )
 
-    resp = slack_client.api_call("test_endpoint", "arg1", kwarg2="foo")
+    with mock.patch.object(client.random, "uniform", lambda low, high: high):
+        resp = slack_client.api_call(method, "arg1", kwarg2="foo")
     assert resp == expected_resp
-    assert slack_api_mock.api_call.call_count == 6
+    assert method.call_count == 6
+
+    # exponential, not 2 ^ attempt
+    assert [c.args[0] for c in sleeps.call_args_list] == [1, 2, 4, 8, 16]
+    stats = slack_client.get_stats()
+    assert stats["retried"] == 5
+    assert stats["rate_limited"] == 5
 
 
-def test_slack_backoff_rate_limit_max_retry_attempts(slack_client, slack_api_mock):
-    slack_api_mock.api_call.return_value = {"ok": False, "error": "ratelimited"}
+def test_slack_backoff_rate_limit_max_retry_attempts(slack_client):
+    slack_client.max_retry_attempts = 3
+    method = api_method("users_info", *[slack_error("ratelimited") for _ in range(3)])
 
     with pytest.raises(client.SlackError) as e:
-        slack_client.api_call("test_endpoint", "arg1", kwarg2="foo")
-        assert e.slack_error == "test_error"
+        slack_client.api_call(method, "arg1", kwarg2="foo")
+    assert e.value.slack_error == "ratelimited"
+    assert method.call_count == 3
+
+
+def test_slack_backoff_honours_retry_after(slack_client, sleeps):
+    method = api_method(
+        "users_info",
+        slack_error("ratelimited", headers={"Retry-After": "30"}),
+        {"ok": True},
+    )
+
+    slack_client.api_call(method)
+
+    sleeps.assert_called_once()
+    assert sleeps.call_args.args[0] == pytest.approx(30, abs=0.1)
+    # other callers of the method are held back too
+    assert slack_client.rate_limiter.reserve("users.info") > 29
+
+
+def test_rate_limiter_throttles_after_burst():
+    limiter = RateLimiter(method_tiers={"test.method": (1, 2)})
+
+    assert limiter.reserve("test.method") == 0
+    assert limiter.reserve("test.method") == 0
+    assert limiter.reserve("test.method") == pytest.approx(1, abs=0.1)
+    assert limiter.reserve("test.method") == pytest.approx(2, abs=0.1)
+
+
+def test_rate_limiter_limits_post_message_per_channel():
+    limiter = RateLimiter()
+
+    for _ in range(3):
+        assert limiter.reserve("chat.postMessage", "C1") == 0
+    assert limiter.reserve("chat.postMessage", "C1") > 0
+    assert limiter.reserve("chat.postMessage", "C2") == 0
+
+
+def test_rate_limiter_file_store_is_shared(tmp_path):
+    lock_file = str(tmp_path / "slack-rate-limits.json")
+    method_tiers = {"test.method": (1, 1)}
+    first = RateLimiter(FileRateLimitStore(lock_file), method_tiers=method_tiers)
+    second = RateLimiter(FileRateLimitStore(lock_file), method_tiers=method_tiers)
+
+    assert first.reserve("test.method") == 0
+    assert second.reserve("test.method") == pytest.approx(1, abs=0.1)
+
+
+def test_slack_api_call_is_throttled(slack_client, sleeps):
+    slack_client.rate_limiter = RateLimiter(method_tiers={"users.info": (1, 1)})
+    method = api_method("users_info", {"ok": True}, {"ok": True})
+
+    slack_client.api_call(method)
+    slack_client.api_call(method)
+
+    assert sleeps.call_count == 1
+    assert slack_client.get_stats()["throttled"] == 1
+    assert slack_client.get_stats()["calls"] == 2
 
 
 def test_get_user_profile_by_email(slack_client, slack_api_mock):
-    slack_api_mock.api_call.return_value = user_by_email
+    slack_api_mock.users_lookupByEmail.__name__ = "users_lookupByEmail"
+    slack_api_mock.users_lookupByEmail.return_value = user_by_email
 
     # request a user by email
     user = slack_client.get_user_profile_by_email("spengler@ghostbusters.example.com")
 
-    slack_api_mock.api_call.assert_called_with(
-        "users.lookupByEmail", email="spengler@ghostbusters.example.com"
+    slack_api_mock.users_lookupByEmail.assert_called_with(
+        email="spengler@ghostbusters.example.com"
     )
 
     # check we get back the expected user profile
@@ -82,3 +166,19 @@ def test_get_user_profile_by_email(slack_client, slack_api_mock):
     assert user["name"] == "spengler"
     assert user["fullname"] == "Egon Spengler"
     assert user["email"] == "spengler@ghostbusters.example.com"
+
+
+def test_invite_users_to_channel_in_chunks(slack_client, slack_api_mock):
+    slack_api_mock.conversations_invite.__name__ = "conversations_invite"
+    slack_api_mock.conversations_invite.side_effect = [
+        {"ok": True},
+        slack_error("already_in_channel"),
+        {"ok": True},
+    ]
+    user_ids = [f"U{i}" for i in range(2500)]
+
+    slack_client.invite_users_to_channel(user_ids, "C1")
+
+    chunks = [c.kwargs["users"] for c in slack_api_mock.conversations_invite.call_args_list]
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert sum(chunks, []) == user_ids
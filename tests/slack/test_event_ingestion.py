@@ -0,0 +1,164 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from response.slack import views
+from response.slack.decorators import event_handler
+from response.slack.decorators.event_handler import (
+    EventMetrics,
+    EventQueueFull,
+    EventWorkers,
+    dispatch_event,
+)
+from response.slack.models import CommsChannel, SlackEventReceipt
+from tests.factories import IncidentFactory
+
+
+@pytest.fixture
+def comms_channel(db):
+    incident = IncidentFactory.create(severity="2")
+    return CommsChannel.objects.get(incident=incident)
+
+
+@pytest.fixture
+def test_event_handler(monkeypatch):
+    handler = mock.Mock()
+    monkeypatch.setitem(event_handler.EVENT_MAPPINGS, "test_event", [handler])
+    return handler
+
+
+def event_payload(event_id, channel_id):
+    return {
+        "type": "event_callback",
+        "event_id": event_id,
+        "event": {"type": "test_event", "channel": channel_id},
+    }
+
+
+def test_dispatch_event_handles_event(comms_channel, test_event_handler):
+    assert dispatch_event(event_payload("Ev1", comms_channel.channel_id))
+
+    test_event_handler.assert_called_once()
+    assert test_event_handler.call_args.args[0] == comms_channel.incident
+
+
+def test_dispatch_event_ignores_retries(comms_channel, test_event_handler):
+    payload = event_payload("Ev1", comms_channel.channel_id)
+
+    assert dispatch_event(payload)
+    assert not dispatch_event(payload)
+    assert dispatch_event(event_payload("Ev2", comms_channel.channel_id))
+
+    assert test_event_handler.call_count == 2
+
+
+def test_handler_errors_are_recorded(comms_channel, test_event_handler, monkeypatch):
+    metrics = EventMetrics()
+    monkeypatch.setattr(event_handler, "EVENT_METRICS", metrics)
+    test_event_handler.side_effect = Exception("boom")
+
+    dispatch_event(event_payload("Ev1", comms_channel.channel_id))
+
+    assert metrics.as_dict()["failed"] == 1
+    assert metrics.as_dict()["handled"] == 1
+
+
+def test_failed_events_can_be_redelivered(comms_channel, test_event_handler):
+    payload = event_payload("Ev1", comms_channel.channel_id)
+    test_event_handler.side_effect = [Exception("boom"), None]
+
+    dispatch_event(payload)
+
+    assert not SlackEventReceipt.objects.filter(event_id="Ev1").exists()
+    assert dispatch_event(payload)
+    assert test_event_handler.call_count == 2
+
+
+def test_full_queue_rejects_event(comms_channel, rf, settings, monkeypatch):
+    settings.RESPONSE_SLACK_EVENTS_ASYNC = True
+    settings.RESPONSE_SLACK_EVENT_QUEUE_WAIT_SECONDS = 0
+    workers = mock.Mock()
+    workers.submit.return_value = False
+    monkeypatch.setattr(event_handler, "_get_workers", lambda: workers)
+    payload = event_payload("Ev1", comms_channel.channel_id)
+
+    with pytest.raises(EventQueueFull):
+        dispatch_event(payload)
+    assert not SlackEventReceipt.objects.exists()
+
+    request = rf.post(
+        "/slack/event", data=json.dumps(payload), content_type="application/json"
+    )
+    with mock.patch("response.slack.authentication.authenticate", return_value=True):
+        response = views.event(request)
+    assert response.status_code == 503
+
+
+def test_prune_event_receipts(db):
+    SlackEventReceipt.objects.create(
+        event_id="old", received_at=datetime.now() - timedelta(hours=2)
+    )
+    SlackEventReceipt.objects.create(event_id="new", received_at=datetime.now())
+
+    assert SlackEventReceipt.objects.prune(60 * 60) == 1
+    assert list(SlackEventReceipt.objects.values_list("event_id", flat=True)) == [
+        "new"
+    ]
+
+
+def test_cron_minute_prunes_event_receipts(db, rf):
+    SlackEventReceipt.objects.create(
+        event_id="old", received_at=datetime.now() - timedelta(hours=2)
+    )
+
+    views.cron_minute(rf.post("/slack/cron_minute"))
+
+    assert not SlackEventReceipt.objects.exists()
+
+
+def test_event_workers_keep_channel_order(monkeypatch):
+    handled = []
+    lock = threading.Lock()
+
+    def fake_handle_event(payload):
+        with lock:
+            handled.append((payload["event"]["channel"], payload["n"]))
+
+    monkeypatch.setattr(event_handler, "handle_event", fake_handle_event)
+    monkeypatch.setattr(event_handler, "close_old_connections", lambda: None)
+    workers = EventWorkers(EventMetrics(), workers=3, queue_size=100)
+
+    for n in range(20):
+        for channel in ("C1", "C2", "C3", "C4"):
+            assert workers.submit(channel, {"event": {"channel": channel}, "n": n})
+    workers.join()
+
+    for channel in ("C1", "C2", "C3", "C4"):
+        assert [n for c, n in handled if c == channel] == list(range(20))
+    assert workers.metrics.as_dict()["handled"] == 80
+    assert workers.depth() == 0
+
+
+def test_event_workers_report_full_queue(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_handle_event(payload):
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(event_handler, "handle_event", blocking_handle_event)
+    monkeypatch.setattr(event_handler, "close_old_connections", lambda: None)
+    workers = EventWorkers(EventMetrics(), workers=1, queue_size=1)
+
+    assert workers.submit("C1", {})
+    started.wait(5)
+    assert workers.submit("C1", {})
+    assert not workers.submit("C1", {})
+    assert workers.depth() == 1
+
+    release.set()
+    workers.join()
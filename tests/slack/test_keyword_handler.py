@@ -0,0 +1,76 @@
+import importlib
+from unittest import mock
+
+import pytest
+
+from response.slack.decorators.keyword_handler import KeywordMatcher, handle_keywords
+from response.slack.models import CommsChannel
+from tests.factories import IncidentFactory
+
+# the decorators package exports a function of the same name
+keywords = importlib.import_module("response.slack.decorators.keyword_handler")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(keywords, "KEYWORD_HANDLERS", {})
+    monkeypatch.setattr(keywords, "WHOLE_WORD_KEYWORDS", set())
+    monkeypatch.setattr(keywords, "_matcher", None)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("nothing to see", []),
+        ("Where's the RUNBOOK?", ["runbook", "book"]),
+        ("the run book says", ["run book", "book"]),
+        ("book the run book now", ["run book", "book", "book now"]),
+        ("runbooks", ["runbook", "book"]),
+    ],
+)
+def test_matcher_finds_all_keywords(text, expected):
+    matcher = KeywordMatcher(["runbook", "run book", "book", "book now"])
+    assert sorted(matcher.find(text)) == sorted(expected)
+
+
+def test_whole_word_keywords(registry):
+    keywords.keyword_handler(["sev"], whole_word=True, func=mock.Mock())
+    keywords.keyword_handler(["page"], func=mock.Mock())
+    matcher = keywords._get_matcher()
+
+    assert matcher.find("several pages") == ["page"]
+    assert matcher.find("is this a sev?") == ["sev"]
+
+
+def test_registering_rebuilds_matcher(registry):
+    keywords.keyword_handler(["runbook"], func=mock.Mock())
+    assert keywords._get_matcher().find("dashboard") == []
+
+    keywords.keyword_handler(["dashboard"], func=mock.Mock())
+    assert keywords._get_matcher().find("dashboard") == ["dashboard"]
+
+
+def test_handle_keywords_calls_handlers(registry, db):
+    incident = IncidentFactory.create(severity="2")
+    handler = mock.Mock()
+    keywords.keyword_handler(["runbook", "run book"], func=handler)
+
+    handle_keywords(incident, {"text": "Runbook please", "user": "U1", "ts": "1"})
+
+    handler.assert_called_once_with(
+        CommsChannel.objects.get(incident=incident),
+        "U1",
+        "runbook",
+        "Runbook please",
+        "1",
+    )
+
+
+def test_handle_keywords_skips_db_without_match(
+    registry, db, django_assert_num_queries
+):
+    incident = IncidentFactory.create(severity="2")
+    keywords.keyword_handler(["runbook"], func=mock.Mock())
+
+    with django_assert_num_queries(0):
+        handle_keywords(incident, {"text": "all fine here", "user": "U1", "ts": "1"})
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from response.core.models import Incident
+from response.slack.decorators import incident_notification
+from response.slack.decorators.incident_notification import (
+    handle_notifications,
+    recurring_notification,
+    single_notification,
+)
+from response.slack.models import CommsChannel, Notification
+from tests.factories import ExternalUserFactory
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(incident_notification, "NOTIFICATION_HANDLERS", [])
+    calls = []
+
+    @recurring_notification(interval_mins=10, max_notifications=3)
+    @single_notification()
+    def remind(incident):
+        calls.append(incident.pk)
+
+    return calls
+
+
+def create_open_incidents(count, started_mins_ago=0):
+    user = ExternalUserFactory()
+    incidents = []
+    for i in range(count):
+        start = datetime.now() - timedelta(minutes=started_mins_ago)
+        incident = Incident.objects.create_incident(
+            name=f"incident {i}", reporter=user, incident_time=start
+        )
+        CommsChannel.objects.create(
+            incident=incident, channel_id=f"C{i}", channel_name=f"inc-{i}"
+        )
+        incidents.append(incident)
+    return incidents
+
+
+@pytest.mark.django_db
+def test_single_notification_sent_once_per_open_incident(mock_slack, handlers):
+    incidents = create_open_incidents(3)
+    Incident.objects.filter(pk=incidents[0].pk).update(end_time=datetime.now())
+
+    handle_notifications()
+    handle_notifications()
+
+    assert sorted(handlers) == sorted(i.pk for i in incidents[1:])
+    assert Notification.objects.count() == 2
+    for notification in Notification.objects.all():
+        assert notification.repeat_count == 0
+        assert notification.next_due_at == notification.time + timedelta(minutes=10)
+
+
+def backdate_notifications(mins):
+    last_sent = datetime.now() - timedelta(minutes=mins)
+    Notification.objects.update(
+        time=last_sent, next_due_at=last_sent + timedelta(minutes=10)
+    )
+
+
+@pytest.mark.django_db
+def test_recurring_notification_repeats_until_exhausted(mock_slack, handlers):
+    (incident,) = create_open_incidents(1)
+
+    handle_notifications()
+    for _ in range(2):
+        backdate_notifications(11)
+        handle_notifications()
+
+    notification = Notification.objects.get(incident=incident)
+    assert notification.repeat_count == 2
+    assert notification.next_due_at is None
+
+    backdate_notifications(11)
+    handle_notifications()
+    assert len(handlers) == 3
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_open_incidents(mock_slack, handlers):
+    create_open_incidents(2)
+    with CaptureQueriesContext(connection) as few:
+        handle_notifications()
+
+    Notification.objects.all().delete()
+    create_open_incidents(8)
+    with CaptureQueriesContext(connection) as many:
+        handle_notifications()
+
+    assert len(handlers) == 12
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_only_due_notifications_are_loaded(mock_slack, handlers):
+    create_open_incidents(3)
+    handle_notifications()
+    backdate_notifications(5)
+
+    with CaptureQueriesContext(connection) as queries:
+        handle_notifications()
+
+    assert len(handlers) == 3
+    notification_queries = [
+        q["sql"] for q in queries if 'FROM "response_notification"' in q["sql"]
+    ]
+    assert all('"next_due_at"' in sql.split("WHERE")[1] for sql in notification_queries)
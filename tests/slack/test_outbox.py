@@ -0,0 +1,217 @@
+from datetime import datetime
+from importlib import import_module
+from unittest.mock import MagicMock
+
+import pytest
+from django.conf import settings
+
+from response.core.models import Incident
+from response.slack.decorators.outbox_task import (
+    enqueue_outbox_task,
+    handle_outbox,
+)
+from response.slack.models import CommsChannel, OutboxMessage
+from tests.factories import ExternalUserFactory
+
+# the module, rather than the decorator of the same name
+outbox = import_module("response.slack.decorators.outbox_task")
+
+
+@pytest.fixture
+def outbox_async(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_SLACK_OUTBOX_ASYNC", True, raising=False)
+    # drain explicitly in the tests rather than on the dispatcher thread
+    monkeypatch.setattr(outbox, "kick_outbox", MagicMock())
+
+
+@pytest.fixture
+def test_task(monkeypatch):
+    task = MagicMock()
+    monkeypatch.setitem(outbox.OUTBOX_TASKS, "test_task", task)
+    return task
+
+
+@pytest.fixture
+def incident():
+    user = ExternalUserFactory()
+    incident = Incident.objects.create_incident(
+        name="Something happened",
+        reporter=user,
+        incident_time=datetime.now(),
+        severity="2",
+    )
+    CommsChannel.objects.create(incident=incident, channel_id="C1", channel_name="inc")
+    return incident
+
+
+def test_enqueue_runs_task_immediately_when_not_async(test_task):
+    enqueue_outbox_task("test_task", "C1", text="hello")
+
+    test_task.assert_called_once_with(text="hello")
+
+
+def test_enqueue_unknown_task():
+    with pytest.raises(ValueError):
+        enqueue_outbox_task("no_such_task", "C1")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_outbox_sends_messages_in_order(outbox_async, test_task):
+    for i in range(3):
+        enqueue_outbox_task("test_task", "C1", n=i)
+    enqueue_outbox_task("test_task", "C2", n=3)
+
+    test_task.assert_not_called()
+    assert OutboxMessage.objects.count() == 4
+
+    assert handle_outbox() == 4
+
+    sent_to_c1 = [c.kwargs["n"] for c in test_task.call_args_list if c.kwargs["n"] < 3]
+    assert sent_to_c1 == [0, 1, 2]
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_message_holds_back_its_channel(outbox_async, test_task):
+    def fail_first(n):
+        if n == 0:
+            raise ValueError("slack is down")
+
+    test_task.side_effect = fail_first
+    enqueue_outbox_task("test_task", "C1", n=0)
+    enqueue_outbox_task("test_task", "C1", n=1)
+    enqueue_outbox_task("test_task", "C2", n=2)
+
+    assert handle_outbox() == 1
+
+    failed = OutboxMessage.objects.get(payload__contains='"n": 0')
+    assert failed.status == OutboxMessage.PENDING
+    assert failed.attempts == 1
+    assert failed.next_attempt_at > datetime.now()
+    assert "slack is down" in failed.last_error
+    assert OutboxMessage.objects.filter(ordering_key="C1").count() == 2
+
+    # nothing on C1 can be sent until the failed message is due again
+    assert handle_outbox() == 0
+
+    OutboxMessage.objects.update(next_attempt_at=datetime.now())
+    test_task.side_effect = None
+    assert handle_outbox() == 2
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_message_is_abandoned_after_max_attempts(outbox_async, test_task, monkeypatch):
+    monkeypatch.setattr(
+        settings, "RESPONSE_SLACK_OUTBOX_MAX_ATTEMPTS", 1, raising=False
+    )
+    test_task.side_effect = ValueError("channel_not_found")
+    enqueue_outbox_task("test_task", "C1", n=0)
+    enqueue_outbox_task("test_task", "C1", n=1)
+
+    handle_outbox()
+
+    # later messages aren't held up by one that's been abandoned
+    assert test_task.call_count == 2
+    assert OutboxMessage.objects.filter(status=OutboxMessage.FAILED).count() == 2
+    assert handle_outbox() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_incident_save_only_writes_to_outbox(outbox_async, mock_slack, incident):
+    incident.summary = "Something has happened"
+    incident.save()
+
+    assert not mock_slack.send_or_update_message_block.called
+    assert not mock_slack.send_message.called
+    assert set(OutboxMessage.objects.values_list("task", flat=True)) == {
+        "sync_bookmarks",
+        "update_headline_post",
+        "send_change_notice",
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_coalesced_messages_are_sent_once(outbox_async, test_task):
+    for i in range(3):
+        enqueue_outbox_task("test_task", "C1", coalesce_key="incident:1", n=i)
+    enqueue_outbox_task("test_task", "C1", coalesce_key="incident:2", n=3)
+
+    assert OutboxMessage.objects.count() == 2
+    # held back so that anything else in the window is folded in
+    assert handle_outbox() == 0
+
+    OutboxMessage.objects.update(next_attempt_at=datetime.now())
+    assert handle_outbox() == 2
+    assert [c.kwargs["n"] for c in test_task.call_args_list] == [0, 3]
+
+    # once the first has gone, the next change needs another message
+    enqueue_outbox_task("test_task", "C1", coalesce_key="incident:1", n=4)
+    assert OutboxMessage.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_coalesced_messages_are_merged(outbox_async, test_task, monkeypatch):
+    monkeypatch.setitem(
+        outbox.OUTBOX_MERGES,
+        "test_task",
+        lambda old, new: {"lines": old["lines"] + new["lines"]},
+    )
+    enqueue_outbox_task("test_task", "C1", coalesce_key="changes", lines=["a"])
+    enqueue_outbox_task("test_task", "C1", coalesce_key="changes", lines=["b"])
+
+    OutboxMessage.objects.update(next_attempt_at=datetime.now())
+    assert handle_outbox() == 1
+    test_task.assert_called_once_with(lines=["a", "b"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_coalescing_keeps_channel_order(outbox_async, test_task, monkeypatch):
+    monkeypatch.setitem(
+        outbox.OUTBOX_MERGES,
+        "test_task",
+        lambda old, new: {"lines": old["lines"] + new["lines"]},
+    )
+    enqueue_outbox_task("test_task", "C1", coalesce_key="changes", lines=["a"])
+    enqueue_outbox_task("test_task", "C1", lines=["other"])
+    enqueue_outbox_task("test_task", "C1", coalesce_key="changes", lines=["b"])
+
+    OutboxMessage.objects.update(next_attempt_at=datetime.now())
+    assert handle_outbox() == 3
+    assert [c.kwargs["lines"] for c in test_task.call_args_list] == [
+        ["a"],
+        ["other"],
+        ["b"],
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_burst_of_incident_saves_is_coalesced(outbox_async, mock_slack, incident):
+    incident.name = "Something bad happened"
+    incident.save()
+    incident.summary = "Something bad has happened"
+    incident.save()
+
+    assert OutboxMessage.objects.filter(task="update_headline_post").count() == 1
+    assert OutboxMessage.objects.filter(task="sync_bookmarks").count() == 1
+
+    OutboxMessage.objects.update(next_attempt_at=datetime.now())
+    handle_outbox()
+
+    # one combined notice for the comms channel, and one for the headline thread
+    mock_slack.send_or_update_message_block.assert_called_once()
+    notice = mock_slack.send_or_update_message_block.call_args.kwargs["fallback_text"]
+    assert "Incident name updated" in notice
+    assert "Incident summary added" in notice
+
+
+@pytest.mark.django_db
+def test_field_changes_are_sent_as_one_message(mock_slack, incident):
+    incident.name = "Something bad happened"
+    incident.summary = "Something bad has happened"
+    incident.save()
+
+    mock_slack.send_or_update_message_block.assert_called_once()
+    notice = mock_slack.send_or_update_message_block.call_args.kwargs["fallback_text"]
+    assert "Incident name updated" in notice
+    assert "Incident summary added" in notice
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from response.slack.modal_handlers import create_incident_pipeline
+from response.slack.models import CommsChannel, HeadlinePost
+from response.slack.pipeline import Pipeline, get_pipeline_traces
+from tests.factories import IncidentFactory
+
+
+def test_independent_steps_run_concurrently():
+    both_started = threading.Barrier(2, timeout=5)
+    pipeline = Pipeline("test", max_workers=2)
+    pipeline.add("first", lambda results: 1)
+    pipeline.add("left", lambda results: both_started.wait(), requires=["first"])
+    pipeline.add("right", lambda results: both_started.wait(), requires=["first"])
+    pipeline.add(
+        "last",
+        lambda results: sorted(results),
+        requires=["left", "right"],
+    )
+
+    results, trace = pipeline.run()
+
+    assert results["last"] == ["first", "left", "right"]
+    assert set(trace.steps) == {"first", "left", "right", "last"}
+    assert all(step["status"] == "ok" for step in trace.steps.values())
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_failed_step_skips_dependents(workers):
+    def fail(results):
+        raise ValueError("boom")
+
+    pipeline = Pipeline("test", max_workers=workers)
+    pipeline.add("first", fail)
+    pipeline.add("second", lambda results: 2, requires=["first"])
+    pipeline.add("other", lambda results: 3)
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+    trace = get_pipeline_traces()[-1]
+    assert trace["steps"]["first"]["status"] == "failed"
+    assert trace["steps"]["second"]["status"] == "skipped"
+    assert trace["steps"]["other"]["status"] == "ok"
+
+
+def test_optional_step_failure_is_not_raised():
+    def fail(results):
+        raise ValueError("boom")
+
+    pipeline = Pipeline("test", max_workers=0)
+    pipeline.add("optional", fail, optional=True)
+    pipeline.add("other", lambda results: 1)
+
+    results, trace = pipeline.run()
+    assert results == {"other": 1}
+
+
+def test_unknown_requirement():
+    pipeline = Pipeline("test")
+    with pytest.raises(ValueError):
+        pipeline.add("step", lambda results: 1, requires=["missing"])
+
+
+def test_create_incident_pipeline(mock_slack, db):
+    incident = IncidentFactory.create(severity="2", private=False)
+    CommsChannel.objects.filter(incident=incident).delete()
+    mock_slack.get_or_create_channel.return_value = "C-NEW"
+    mock_slack.list_channel_bookmarks.return_value = []
+    mock_slack.send_or_update_message_block.return_value = {"ok": True, "ts": "1.2"}
+
+    results, trace = create_incident_pipeline(incident, "trigger").run()
+
+    assert results["channel"].channel_id == "C-NEW"
+    assert all(step["status"] == "ok" for step in trace.steps.values())
+    mock_slack.invite_user_to_channel.assert_called_once_with(
+        incident.reporter.external_id, "C-NEW"
+    )
+    mock_slack.set_channel_topic.assert_called_once_with(
+        "C-NEW", f"INCIDENT-{incident.pk}"
+    )
+    headline_post = HeadlinePost.objects.get(incident=incident)
+    assert headline_post.comms_channel == results["channel"]
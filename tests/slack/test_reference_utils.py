@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from response.core.models import ExternalUser, Incident, TimelineEvent
+from response.core.serializers import TimelineEventSerializer
+from response.slack.cache import profile_cache
+from response.slack.client import SlackError
+from response.slack.reference_utils import (
+    slack_to_human_readable,
+    slack_to_human_readable_many,
+    user_ids_in,
+)
+
+
+@pytest.fixture
+def users():
+    return [
+        ExternalUser.objects.create(external_id=f"U{i}", display_name=f"user{i}")
+        for i in range(5)
+    ]
+
+
+def test_user_ids_in():
+    assert user_ids_in(["<@U1> and <@U2>", None, "<@U1> again", "nobody"]) == {
+        "U1",
+        "U2",
+    }
+
+
+@pytest.mark.django_db
+def test_slack_to_human_readable(users):
+    assert (
+        slack_to_human_readable("<@U1> posted in <#C123|inc-test>")
+        == "@user1 posted in #inc-test"
+    )
+
+
+@pytest.mark.django_db
+def test_slack_to_human_readable_unknown_user(mock_slack):
+    mock_slack.get_user_profile.side_effect = SlackError(
+        "not found", slack_error="user_not_found"
+    )
+
+    assert slack_to_human_readable("ping <@U0BADBAD>") == "ping @U0BADBAD"
+
+
+@pytest.mark.django_db
+def test_slack_to_human_readable_many_uses_one_query(
+    users, mock_slack, django_assert_num_queries
+):
+    texts = [f"<@U{i % 5}> paged <@U{(i + 1) % 5}>" for i in range(50)]
+
+    with django_assert_num_queries(1):
+        readable = slack_to_human_readable_many(texts)
+
+    assert readable[0] == "@user0 paged @user1"
+    assert readable[4] == "@user4 paged @user0"
+    mock_slack.get_user_profile.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_timeline_serializer_resolves_users_once(
+    users, django_assert_num_queries, settings
+):
+    # sanitizing escapes the references, so they can only be resolved with it
+    # turned off
+    settings.RESPONSE_SANITIZE_USER_INPUT = False
+    incident = Incident.objects.create_incident(
+        name="Something happened", reporter=users[0], incident_time=datetime.now()
+    )
+    TimelineEvent.objects.filter(incident=incident).delete()
+    for i in range(20):
+        TimelineEvent.objects.create(
+            incident=incident, text=f"<@U{i % 5}> did a thing", event_type="text"
+        )
+    events = TimelineEvent.objects.filter(incident=incident).order_by("pk")
+    profile_cache.clear()
+
+    # one query for the events, and one for the users
+    with django_assert_num_queries(2):
+        data = TimelineEventSerializer(events, many=True).data
+
+    assert [e["text_ui"] for e in data[:2]] == ["@user0 did a thing", "@user1 did a thing"]
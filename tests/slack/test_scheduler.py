@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from response.slack.decorators.scheduled_job import ScheduledJob
+from response.slack.models import SchedulerLock
+from response.slack.scheduler import (
+    LEADER_LOCK_NAME,
+    SCHEDULER_ID,
+    create_scheduler,
+    get_job_metrics,
+    get_leader,
+    run_job,
+)
+
+
+@pytest.mark.django_db
+def test_lock_is_held_until_it_expires():
+    assert SchedulerLock.objects.acquire("lock", "a", ttl_seconds=60)
+    assert SchedulerLock.objects.acquire("lock", "a", ttl_seconds=60)
+    assert not SchedulerLock.objects.acquire("lock", "b", ttl_seconds=60)
+
+    SchedulerLock.objects.filter(name="lock").update(
+        expires_at=datetime.now() - timedelta(seconds=1)
+    )
+    assert SchedulerLock.objects.acquire("lock", "b", ttl_seconds=60)
+    assert not SchedulerLock.objects.acquire("lock", "a", ttl_seconds=60)
+
+
+@pytest.mark.django_db
+def test_run_job_only_runs_on_leader():
+    callback = MagicMock()
+    job = ScheduledJob("test_job", callback, "interval", {"minutes": 1})
+
+    SchedulerLock.objects.acquire(LEADER_LOCK_NAME, "another-replica", 60)
+    run_job(job)
+    callback.assert_not_called()
+
+    SchedulerLock.objects.release(LEADER_LOCK_NAME, "another-replica")
+    run_job(job)
+    callback.assert_called_once()
+    assert SchedulerLock.objects.get(name=LEADER_LOCK_NAME).owner == SCHEDULER_ID
+
+    assert get_leader() == SCHEDULER_ID
+    metrics = get_job_metrics()["test_job"]
+    assert metrics["runs"] == 1
+    assert metrics["skipped"] == 1
+    assert metrics["failures"] == 0
+
+
+@pytest.mark.django_db
+def test_run_job_records_failures():
+    job = ScheduledJob("failing_job", MagicMock(side_effect=ValueError), "interval", {})
+
+    run_job(job)
+
+    run_job(job)
+
+    metrics = get_job_metrics()["failing_job"]
+    assert metrics["runs"] == 2
+    assert metrics["failures"] == 2
+    assert metrics["last_scheduler"] == SCHEDULER_ID
+
+
+@pytest.mark.django_db
+def test_run_job_renews_lock_while_job_runs(settings):
+    settings.RESPONSE_SCHEDULER_LOCK_TTL_SECONDS = 0.3
+    job = ScheduledJob("slow_job", lambda: time.sleep(0.5), "interval", {})
+
+    with patch("response.slack.scheduler.SchedulerLock.objects") as locks, patch(
+        "response.slack.scheduler.ScheduledJobMetrics.objects"
+    ) as metrics:
+        locks.acquire.return_value = True
+        run_job(job)
+
+    # once to start the job, then every ttl / 3 until it finishes
+    assert locks.acquire.call_count >= 4
+    locks.acquire.assert_called_with(LEADER_LOCK_NAME, SCHEDULER_ID, 0.3)
+    metrics.record_run.assert_called_once()
+
+
+def test_scheduler_jobs_do_not_overlap():
+    scheduler = create_scheduler()
+    scheduler.start(paused=True)
+    jobs = {job.id: job for job in scheduler.get_jobs()}
+    scheduler.shutdown()
+
+    assert {"cron_minute", "cron_daily"} <= set(jobs)
+    for job in jobs.values():
+        assert job.coalesce
+        assert job.max_instances == 1
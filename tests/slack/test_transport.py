@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from response.slack import client
+from response.slack.rate_limit import RateLimiter
+from response.slack.transport import PooledWebClient
+
+
+class MockSlackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append((self.path, self.client_address))
+
+        status, body, headers = 200, {"ok": True, "user_id": "U1"}, {}
+        if self.path.endswith("/chat.postMessage"):
+            status, body = 429, {"ok": False, "error": "ratelimited"}
+            headers = {"Retry-After": "1"}
+        if self.path.endswith("/conversations.leave"):
+            headers = {"Connection": "close"}
+
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_slack_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockSlackHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def slack_client(mock_slack_api):
+    host, port = mock_slack_api.server_address
+    return client.SlackClient(
+        "test-token",
+        base_url=f"http://{host}:{port}/api/",
+        max_retry_attempts=1,
+        rate_limiter=RateLimiter(method_tiers={}, default_tier=(1000, 1000)),
+    )
+
+
+def test_requests_go_to_base_url(slack_client, mock_slack_api):
+    assert isinstance(slack_client.client, PooledWebClient)
+    assert slack_client.get_slack_token_owner() == "U1"
+    assert mock_slack_api.requests[0][0] == "/api/auth.test"
+
+
+def test_connections_are_reused(slack_client, mock_slack_api):
+    for _ in range(3):
+        slack_client.get_slack_token_owner()
+
+    transport = slack_client.client.transport
+    assert transport.opened == 1
+    assert transport.reused == 2
+    # all over the same client socket
+    assert len({address for _, address in mock_slack_api.requests}) == 1
+
+
+def test_closed_connections_are_not_reused(slack_client, mock_slack_api):
+    slack_client.leave_channel("C1")
+    slack_client.get_slack_token_owner()
+
+    assert slack_client.client.transport.opened == 2
+
+
+def test_error_responses(slack_client):
+    with pytest.raises(client.SlackError) as e:
+        slack_client.send_message("C1", "hello")
+    assert e.value.slack_error == "ratelimited"
+
+
+def test_unpooled_client(mock_slack_api):
+    host, port = mock_slack_api.server_address
+    c = client.SlackClient(
+        "test-token", base_url=f"http://{host}:{port}/api/", pooled=False
+    )
+
+    assert not isinstance(c.client, PooledWebClient)
+    assert c.get_slack_token_owner() == "U1"
@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+
+from response.core.models import Incident
+from response.slack.models import UserStats
+from response.slack.models import user_stats
+from tests.factories import ExternalUserFactory, IncidentFactory
+
+
+@pytest.fixture
+def incident(db):
+    return IncidentFactory.create(severity="2")
+
+
+@pytest.fixture
+def slack_user(db):
+    return ExternalUserFactory(app_id="slack", external_id="U123")
+
+
+def test_increment_creates_and_counts(incident, slack_user):
+    UserStats.increment_message_count(incident, "U123")
+    UserStats.increment_message_count(incident, "U123")
+
+    stats = UserStats.objects.get(incident=incident, user=slack_user)
+    assert stats.message_count == 2
+    assert stats.join_time is not None
+
+
+def test_increment_for_known_user_skips_lookups(
+    incident, slack_user, django_assert_num_queries
+):
+    UserStats.increment_message_count(incident, "U123")
+
+    # just the stats increment
+    with mock.patch.object(user_stats, "get_user_profile") as get_user_profile:
+        with django_assert_num_queries(1):
+            UserStats.increment_message_count(incident, "U123")
+    get_user_profile.assert_not_called()
+
+
+def test_increment_creates_unknown_user(incident, monkeypatch):
+    monkeypatch.setattr(
+        user_stats, "get_user_profile", lambda user_id: {"name": "spengler"}
+    )
+
+    UserStats.increment_message_count(incident, "W012A3CDE")
+
+    stats = UserStats.objects.get(incident=incident)
+    assert stats.user.external_id == "W012A3CDE"
+    assert stats.user.display_name == "spengler"
+
+
+def test_add_messages_recovers_from_concurrent_create(incident, slack_user):
+    UserStats.objects.create(incident=incident, user=slack_user, message_count=3)
+
+    # as if another process created the row between our update and create
+    with mock.patch.object(
+        UserStats.objects, "filter", wraps=UserStats.objects.filter
+    ) as filter_:
+        filter_.return_value.update.side_effect = [0, 1]
+        UserStats.objects.add_messages(incident.pk, slack_user.pk, 2)
+
+    assert filter_.return_value.update.call_count == 2
+
+
+def test_new_participant_marks_incident_modified(incident, slack_user):
+    UserStats.increment_message_count(incident, "U123")
+    assert Incident.objects.get(pk=incident.pk).participants_modified is not None
+
+    Incident.objects.filter(pk=incident.pk).update(participants_modified=None)
+
+    UserStats.increment_message_count(incident, "U123")
+    assert Incident.objects.get(pk=incident.pk).participants_modified is None
+
+
+@override_settings(RESPONSE_USER_STATS_FLUSH_SECONDS=60)
+def test_aggregator_flushes_counts_in_bulk(incident, slack_user, monkeypatch):
+    aggregator = user_stats.UserStatsAggregator(60)
+    monkeypatch.setattr(user_stats, "_aggregator", aggregator)
+    other_user = ExternalUserFactory(app_id="slack", external_id="U456")
+
+    for user_id in ("U123", "U123", "U456", "U123"):
+        UserStats.increment_message_count(incident, user_id)
+    assert not UserStats.objects.exists()
+
+    assert aggregator.flush() == 2
+    assert UserStats.objects.get(user=slack_user).message_count == 3
+    assert UserStats.objects.get(user=other_user).message_count == 1
+
+    UserStats.increment_message_count(incident, "U123")
+    aggregator.flush()
+    assert UserStats.objects.get(user=slack_user).message_count == 4
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # rendered fragments and summaries are cached between requests
+    cache.clear()
+    yield
+    cache.clear()
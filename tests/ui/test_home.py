@@ -0,0 +1,123 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from response.core.models import Incident
+from tests.factories import IncidentFactory
+
+
+@pytest.fixture
+def incidents(db):
+    incidents = [
+        IncidentFactory.create(
+            name="Payments are failing",
+            incident_time=datetime(2020, 1, 10, 12, 0),
+            end_time=None,
+            severity="1",
+        ),
+        IncidentFactory.create(
+            name="Slow logins",
+            summary="Card payments slow too",
+            incident_time=datetime(2020, 2, 10, 12, 0),
+            end_time=datetime(2020, 2, 10, 13, 0),
+            severity="3",
+        ),
+        IncidentFactory.create(
+            name="Feed not loading",
+            incident_time=datetime(2020, 3, 10, 12, 0),
+            end_time=datetime(2020, 3, 10, 13, 0),
+            severity="2",
+        ),
+    ]
+    # the factory doesn't send save signals, which index incidents for search
+    for incident in incidents:
+        incident.save()
+    return incidents
+
+
+def listed(response):
+    return [incident.pk for incident in response.context["page"]]
+
+
+def test_home_lists_most_recent_first(client, incidents):
+    response = client.get(reverse("home"))
+
+    assert response.status_code == 200
+    assert listed(response) == [i.pk for i in reversed(incidents)]
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"status": "open"}, [0]),
+        ({"status": "closed"}, [2, 1]),
+        ({"severity": "3"}, [1]),
+        ({"since": "2020-02-10"}, [2, 1]),
+        ({"until": "2020-02-10"}, [1, 0]),
+        ({"q": "payments"}, [1, 0]),
+        ({"status": "closed", "q": "payments"}, [1]),
+        ({"severity": "bogus", "since": "not-a-date"}, [2, 1, 0]),
+    ],
+)
+def test_home_filters(client, incidents, params, expected):
+    response = client.get(reverse("home"), params)
+
+    assert listed(response) == [incidents[i].pk for i in expected]
+
+
+def test_home_search_excludes_private_incidents(client, incidents):
+    incidents[0].private = True
+    incidents[0].save()
+
+    response = client.get(reverse("home"), {"q": "payments"})
+
+    assert listed(response) == [incidents[1].pk]
+
+
+def test_home_filters_by_lead(client, incidents):
+    lead = incidents[1].lead
+
+    response = client.get(reverse("home"), {"lead": lead.pk})
+
+    assert listed(response) == [incidents[1].pk]
+
+
+@override_settings(RESPONSE_HOME_PAGE_SIZE=2)
+def test_home_is_paginated(client, incidents):
+    response = client.get(reverse("home"), {"status": "closed", "page": 1})
+    assert listed(response) == [incidents[2].pk, incidents[1].pk]
+
+    response = client.get(reverse("home"), {"page": 2})
+    assert listed(response) == [incidents[0].pk]
+    assert b"page=1" in response.content
+
+
+def test_open_incidents_summary_is_cached(
+    client, incidents, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    with django_assert_num_queries(1):
+        summary = Incident.objects.open_summary()
+    assert [incident["pk"] for incident in summary] == [incidents[0].pk]
+
+    with django_assert_num_queries(0):
+        Incident.objects.open_summary()
+
+    # closing the incident drops the cached summary
+    with django_capture_on_commit_callbacks(execute=True):
+        incidents[0].end_time = datetime(2020, 1, 10, 13, 0)
+        incidents[0].save()
+
+    assert Incident.objects.open_summary() == []
+
+
+def test_open_incidents_summary_expires(incidents, settings):
+    settings.RESPONSE_OPEN_INCIDENTS_CACHE_SECONDS = 30
+
+    with mock.patch("response.core.models.incident.cache") as cache:
+        cache.get.return_value = None
+        Incident.objects.open_summary()
+
+    assert cache.set.call_args[0][2] == 30
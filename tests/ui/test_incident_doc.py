@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.urls import reverse
+
+from response.core.models import Incident, TimelineEvent
+from response.slack.models import UserStats
+from tests.factories import ExternalUserFactory, IncidentFactory
+
+
+@pytest.fixture
+def incident(db):
+    return IncidentFactory.create(private=False, severity="2")
+
+
+def test_incident_doc_renders(client, incident):
+    TimelineEvent.objects.bulk_create(
+        [
+            TimelineEvent(
+                incident=incident,
+                timestamp=datetime.now(),
+                text="**database** failed over",
+                event_type="text",
+            )
+        ]
+    )
+
+    response = client.get(reverse("incident_doc", args=[incident.pk]))
+
+    assert response.status_code == 200
+    assert b"<strong>database</strong> failed over" in response.content
+    assert response["ETag"]
+    assert response["Last-Modified"]
+
+
+def test_incident_doc_not_found(client, db):
+    response = client.get(reverse("incident_doc", args=[1234]))
+    assert response.status_code == 404
+
+
+def test_incident_doc_not_modified(client, incident):
+    url = reverse("incident_doc", args=[incident.pk])
+    response = client.get(url)
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+    assert (
+        client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code
+        == 304
+    )
+
+
+def test_timeline_change_refreshes_incident_doc(client, incident):
+    url = reverse("incident_doc", args=[incident.pk])
+    Incident.objects.filter(pk=incident.pk).update(
+        last_modified=datetime.now() - timedelta(minutes=5),
+        timeline_modified=datetime.now() - timedelta(minutes=5),
+    )
+    etag = client.get(url)["ETag"]
+
+    TimelineEvent.objects.create(
+        incident=incident, text="rolled back the deploy", event_type="text"
+    )
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert b"rolled back the deploy" in response.content
+
+
+def test_cached_incident_doc_skips_timeline_queries(
+    client, incident, django_assert_max_num_queries
+):
+    url = reverse("incident_doc", args=[incident.pk])
+    client.get(url)
+
+    # incident, last modified lookup, and user stats - actions and timeline
+    # are rendered from the fragment cache
+    with django_assert_max_num_queries(3):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_sections_are_cached_separately(client, incident):
+    url = reverse("incident_doc", args=[incident.pk])
+    client.get(url)
+
+    # a new timeline event shouldn't re-render the summary or actions
+    Incident.objects.filter(pk=incident.pk).update(
+        summary="changed without saving"
+    )
+    TimelineEvent.objects.create(
+        incident=incident, text="rolled back the deploy", event_type="text"
+    )
+
+    response = client.get(url)
+    assert b"rolled back the deploy" in response.content
+    assert b"changed without saving" not in response.content
+
+
+def test_message_counts_refresh_incident_doc(client, incident):
+    url = reverse("incident_doc", args=[incident.pk])
+    ExternalUserFactory(app_id="slack", external_id="U123", display_name="venkman")
+    UserStats.increment_message_count(incident, "U123")
+    etag = client.get(url)["ETag"]
+
+    UserStats.increment_message_count(incident, "U123")
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert b"venkman (2 messages)" in response.content
+
+
+def test_lead_rename_refreshes_incident_doc(client, incident):
+    url = reverse("incident_doc", args=[incident.pk])
+    etag = client.get(url)["ETag"]
+
+    incident.lead.display_name = "stantz"
+    incident.lead.save()
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert b"stantz" in response.content